@@ -14,8 +14,11 @@ load_dotenv()
 
 # Импортируем модели
 from app.database import Base
-from app.models.product import Product
+from app.models.product import Product, ProductPrice
 from app.models.currency import CurrencyRate
+from app.models.idempotency import IdempotencyKey
+from app.models.analytics import SalesDaily, SalesDailyProduct
+from app.models.outbox import OutboxEvent
 
 config = context.config
 
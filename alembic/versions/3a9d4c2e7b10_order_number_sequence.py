@@ -0,0 +1,30 @@
+"""Order number sequence
+
+Revision ID: 3a9d4c2e7b10
+Revises: cfed262f53ef
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3a9d4c2e7b10'
+down_revision: Union[str, Sequence[str], None] = 'cfed262f53ef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Последовательности есть только в PostgreSQL, на SQLite номер берется из MAX(id)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.CreateSequence(sa.Sequence('order_number_seq', start=1)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(sa.schema.DropSequence(sa.Sequence('order_number_seq')))
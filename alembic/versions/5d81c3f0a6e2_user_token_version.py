@@ -0,0 +1,30 @@
+"""User token version
+
+Revision ID: 5d81c3f0a6e2
+Revises: 0a7e4d2c9f31
+Create Date: 2026-10-19 16:20:07.913455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5d81c3f0a6e2'
+down_revision: Union[str, Sequence[str], None] = '0a7e4d2c9f31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    # Воркеры каждые TOKEN_VERSION_REFRESH_SECONDS читают пользователей с updated_at >= курсора
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_updated_at', table_name='users')
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,57 @@
+"""Materialized product prices per currency
+
+Revision ID: 6e0b2d9c4a17
+Revises: 9b4e6f1d2c78
+Create Date: 2026-10-19 18:11:42.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6e0b2d9c4a17'
+down_revision: Union[str, Sequence[str], None] = '9b4e6f1d2c78'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_prices',
+    sa.Column('currency_code', sa.String(length=3), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=14, scale=4), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('currency_code', 'product_id')
+    )
+    op.create_index(op.f('ix_product_prices_product_id'), 'product_prices', ['product_id'], unique=False)
+    op.create_index('ix_product_prices_currency_code_price', 'product_prices', ['currency_code', 'price'], unique=False)
+
+    # Коды валют ищутся в верхнем регистре (resolve_currency, get_active_rate_map):
+    # старые курсы, сохраненные в нижнем регистре, приводятся к нему же
+    op.execute(
+        "UPDATE currency_rates SET currency_code = upper(currency_code) "
+        "WHERE currency_code <> upper(currency_code)"
+    )
+    # Если активными остались курсы одной валюты в разных регистрах, действует последний
+    op.execute(
+        "UPDATE currency_rates SET is_active = false WHERE is_active AND EXISTS ("
+        "SELECT 1 FROM currency_rates newer WHERE newer.currency_code = currency_rates.currency_code "
+        "AND newer.is_active AND newer.id > currency_rates.id)"
+    )
+
+    # Цены по текущим активным курсам
+    op.execute(
+        "INSERT INTO product_prices (currency_code, product_id, price) "
+        "SELECT r.currency_code, p.id, round(p.price_rub / r.rate_to_rub, 4) "
+        "FROM products p, currency_rates r WHERE r.is_active"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_prices_currency_code_price', table_name='product_prices')
+    op.drop_index(op.f('ix_product_prices_product_id'), table_name='product_prices')
+    op.drop_table('product_prices')
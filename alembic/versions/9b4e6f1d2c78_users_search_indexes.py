@@ -0,0 +1,63 @@
+"""Search indexes for admin user listing
+
+Revision ID: 9b4e6f1d2c78
+Revises: 5d81c3f0a6e2
+Create Date: 2026-10-19 17:02:31.640217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9b4e6f1d2c78'
+down_revision: Union[str, Sequence[str], None] = '5d81c3f0a6e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ['email', 'username', 'full_name']
+
+
+def _indexes(trigram: bool) -> list:
+    """
+    Индексы по lower(колонка): (имя, выражение, метод).
+
+    Триграммные GIN-индексы обслуживают LIKE 'abc%' и LIKE '%abc%'. Если
+    расширение pg_trgm недоступно, создаются B-tree индексы с
+    text_pattern_ops — они ускоряют только поиск по началу строки.
+    """
+    if trigram:
+        return [(f'ix_users_{column}_trgm', f'lower({column}) gin_trgm_ops', 'gin') for column in SEARCH_COLUMNS]
+    return [(f'ix_users_{column}_prefix', f'lower({column}) text_pattern_ops', 'btree') for column in SEARCH_COLUMNS]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы по выражениям с операторными классами есть только в PostgreSQL;
+    # в SQLite поиск работает без индексов
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    trigram = bind.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).scalar() is not None
+    if trigram:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, expression, method in _indexes(trigram):
+            op.create_index(name, 'users', [sa.text(expression)], unique=False,
+                            postgresql_using=method, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    with op.get_context().autocommit_block():
+        for name, _, _ in _indexes(True) + _indexes(False):
+            op.drop_index(name, table_name='users', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,52 @@
+"""Currency rate validity periods
+
+Revision ID: a3f58c1e7d24
+Revises: 6e0b2d9c4a17
+Create Date: 2026-10-19 18:47:09.281553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a3f58c1e7d24'
+down_revision: Union[str, Sequence[str], None] = '6e0b2d9c4a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('currency_rates', sa.Column('valid_from', sa.DateTime(), nullable=True))
+    op.add_column('currency_rates', sa.Column('valid_to', sa.DateTime(), nullable=True))
+
+    # Старые курсы действовали с момента создания до создания следующего курса той же валюты
+    op.execute(
+        "UPDATE currency_rates SET valid_from = COALESCE(created_at, CURRENT_TIMESTAMP)"
+    )
+    op.execute(
+        "UPDATE currency_rates SET valid_to = ("
+        "SELECT MIN(later.valid_from) FROM currency_rates later "
+        "WHERE later.currency_code = currency_rates.currency_code "
+        "AND (later.valid_from > currency_rates.valid_from "
+        "OR (later.valid_from = currency_rates.valid_from AND later.id > currency_rates.id))"
+        ") WHERE NOT is_active"
+    )
+
+    with op.batch_alter_table('currency_rates') as batch_op:
+        batch_op.alter_column(
+            'valid_from', existing_type=sa.DateTime(), nullable=False, server_default=sa.func.now()
+        )
+    op.create_index(
+        'ix_currency_rates_currency_code_valid_from', 'currency_rates', ['currency_code', 'valid_from'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_currency_rates_currency_code_valid_from', table_name='currency_rates')
+    with op.batch_alter_table('currency_rates') as batch_op:
+        batch_op.drop_column('valid_to')
+        batch_op.drop_column('valid_from')
@@ -0,0 +1,34 @@
+"""Orders user/session + created_at indexes
+
+Revision ID: b18f6a3e5c92
+Revises: 7c41e0b9d2a5
+Create Date: 2026-10-19 11:48:05.377201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b18f6a3e5c92'
+down_revision: Union[str, Sequence[str], None] = '7c41e0b9d2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_orders_user_session_created_at', 'orders', ['user_session', 'created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_user_session_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_id_created_at', table_name='orders', postgresql_concurrently=True)
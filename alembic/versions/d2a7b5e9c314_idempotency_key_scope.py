@@ -0,0 +1,47 @@
+"""Idempotency key scope
+
+Revision ID: d2a7b5e9c314
+Revises: c8e1f4a27b60
+Create Date: 2026-10-19 22:05:13.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd2a7b5e9c314'
+down_revision: Union[str, Sequence[str], None] = 'c8e1f4a27b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Клиент старых ключей неизвестен: они остаются с пустым scope до истечения
+    op.add_column('idempotency_keys', sa.Column('scope', sa.String(length=255), server_default='', nullable=False))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+        op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['scope', 'key'])
+    else:
+        # SQLite: таблица пересоздается с новым первичным ключом
+        with op.batch_alter_table('idempotency_keys') as batch_op:
+            batch_op.create_primary_key('idempotency_keys_pkey', ['scope', 'key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Одинаковые ключи разных клиентов не помещаются в прежний первичный ключ
+    op.execute(
+        "DELETE FROM idempotency_keys WHERE EXISTS ("
+        "SELECT 1 FROM idempotency_keys other WHERE other.key = idempotency_keys.key "
+        "AND other.scope < idempotency_keys.scope)"
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('idempotency_keys_pkey', 'idempotency_keys', type_='primary')
+        op.create_primary_key('idempotency_keys_pkey', 'idempotency_keys', ['key'])
+        op.drop_column('idempotency_keys', 'scope')
+    else:
+        with op.batch_alter_table('idempotency_keys') as batch_op:
+            batch_op.drop_column('scope')
@@ -0,0 +1,31 @@
+"""Orders status + created_at index
+
+Revision ID: d47a2c8b1e63
+Revises: b18f6a3e5c92
+Create Date: 2026-10-19 12:31:40.662918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd47a2c8b1e63'
+down_revision: Union[str, Sequence[str], None] = 'b18f6a3e5c92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_status_created_at', table_name='orders', postgresql_concurrently=True)
@@ -0,0 +1,41 @@
+"""Composite indexes for hot queries
+
+Revision ID: e5b93f17a4d8
+Revises: d47a2c8b1e63
+Create Date: 2026-10-19 13:20:12.540871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e5b93f17a4d8'
+down_revision: Union[str, Sequence[str], None] = 'd47a2c8b1e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Индексы заказов по (user_id/user_session/status, created_at) созданы
+# в ревизиях b18f6a3e5c92 и d47a2c8b1e63
+INDEXES = [
+    ('ix_cart_items_user_session_product_id', 'cart_items', ['user_session', 'product_id']),
+    ('ix_currency_rates_currency_code_is_active', 'currency_rates', ['currency_code', 'is_active']),
+    ('ix_products_price_rub', 'products', ['price_rub']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,45 @@
+"""Sales rollup tables
+
+Revision ID: f2c6d8a91b47
+Revises: e5b93f17a4d8
+Create Date: 2026-10-19 14:05:53.118024
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f2c6d8a91b47'
+down_revision: Union[str, Sequence[str], None] = 'e5b93f17a4d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('sales_daily_products',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index(op.f('ix_sales_daily_products_product_id'), 'sales_daily_products', ['product_id'], unique=False)
+    # Заполнить сводки по существующим заказам: python scripts/rebuild_sales_rollups.py
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sales_daily_products_product_id'), table_name='sales_daily_products')
+    op.drop_table('sales_daily_products')
+    op.drop_table('sales_daily')
@@ -7,6 +7,8 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.auth.principal_cache import UserPrincipal, load_principal
+from app.auth.token_versions import token_versions
 from app.schemas.user import TokenData
 from app.config import settings
 
@@ -36,39 +38,102 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Получает текущего пользователя по токену"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Недействительные учетные данные",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """
+    Декодирует токен и проверяет, что он не отозван.
+
+    Токены с claims uid и ver принимаются, только если ver совпадает с
+    текущей версией токенов пользователя (app/auth/token_versions.py).
+    Токены, выданные до появления версий, проверяются по БД в get_current_user.
+
+    Args:
+        token: JWT токен
+
+    Returns:
+        Optional[dict]: Claims токена или None, если токен недействителен или отозван
+    """
     try:
-        # Декодируем токен
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
 
-        # Извлекаем email из токена
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+    if payload.get("sub") is None:
+        return None
 
-        # Извлекаем роль из токена (если есть)
-        role: str = payload.get("role")
+    if "uid" in payload and "ver" in payload:
+        if not token_versions.is_current(payload["uid"], payload["ver"]):
+            return None
+
+    return payload
+
+
+def principal_from_token(token: str, db: Session) -> Optional[UserPrincipal]:
+    """Получает пользователя по токену из кэша или БД, None если токен недействителен"""
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+
+    token_data = TokenData(email=payload["sub"], role=payload.get("role"))
+    return load_principal(db, token_data.email)
 
-        token_data = TokenData(email=email, role=role)
-    except JWTError:
-        raise credentials_exception
 
-    # Получаем пользователя из базы данных
-    user = db.query(User).filter(User.email == token_data.email).first()
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserPrincipal:
+    """
+    Получает текущего пользователя по токену.
+
+    Возвращает неизменяемый снимок пользователя из кэша principal_cache,
+    к БД обращается только при промахе кэша.
+    """
+    user = principal_from_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_token_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UserPrincipal:
+    """
+    Получает пользователя для проверки прав только по подписанным claims.
+
+    При AUTH_STATELESS_ADMIN токен с claims uid, role и ver не требует
+    запроса пользователя: подпись гарантирует подлинность роли, а проверка
+    версии — что пользователь не деактивирован и не сменил пароль или роль
+    после выдачи токена. Остальные токены проверяются через get_current_user.
+    """
+    if not settings.AUTH_STATELESS_ADMIN:
+        return await get_current_user(token, db)
+
+    payload = decode_access_token(token)
+    if payload is None:
+        raise _credentials_exception()
+
+    if "uid" not in payload or "ver" not in payload or payload.get("role") is None:
+        return await get_current_user(token, db)
+
+    try:
+        role = UserRole(payload["role"])
+    except ValueError:
+        raise _credentials_exception()
+
+    return UserPrincipal(
+        id=payload["uid"],
+        email=payload["sub"],
+        username=None,
+        full_name=None,
+        role=role,
+        is_active=True  # Деактивация увеличивает версию токенов
+    )
+
+
+async def get_current_active_user(current_user: UserPrincipal = Depends(get_current_user)) -> UserPrincipal:
     """Проверяет, что текущий пользователь активен"""
     if not current_user.is_active:
         raise HTTPException(
@@ -78,7 +143,7 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
-async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_admin_user(current_user: UserPrincipal = Depends(get_token_principal)) -> UserPrincipal:
     """Проверяет, что текущий пользователь является администратором"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -88,7 +153,7 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
     return current_user
 
 
-async def get_current_superadmin_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_superadmin_user(current_user: UserPrincipal = Depends(get_token_principal)) -> UserPrincipal:
     """Проверяет, что текущий пользователь является суперадмином"""
     if not current_user.is_superadmin:
         raise HTTPException(
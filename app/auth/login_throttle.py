@@ -0,0 +1,207 @@
+# app/auth/login_throttle.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.logger import auth_logger
+
+try:
+    import redis
+except ImportError:  # Общее хранилище необязательно, без redis используется память процесса
+    redis = None
+
+
+class MemoryBuckets:
+    """
+    Token bucket в памяти процесса: ключ → (количество токенов, время обновления).
+
+    Количество ключей ограничено (LRU), поэтому поток запросов с
+    уникальных адресов не приводит к росту памяти.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_second: float, count: float = 1) -> float:
+        """
+        Взять токен из корзины.
+
+        Args:
+            count: Сколько токенов взять; отрицательное значение возвращает токены
+
+        Returns:
+            float: 0, если токен взят, иначе секунды до появления токена
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+            if count < 0:
+                tokens = min(capacity, tokens - count)
+                retry_after = 0.0
+            elif tokens >= count:
+                tokens -= count
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+class RedisBuckets:
+    """Token bucket в Redis — общий для всех воркеров и экземпляров приложения"""
+
+    # Атомарное обновление корзины: KEYS[1] — ключ, ARGV — емкость, скорость, текущее время,
+    # количество токенов (отрицательное — вернуть токены)
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local count = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+    local retry_after = 0
+    if count < 0 then
+        tokens = math.min(capacity, tokens - count)
+    elseif tokens >= count then
+        tokens = tokens - count
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key: str, capacity: float, refill_per_second: float, count: float = 1) -> float:
+        return float(self._script(
+            keys=[f"login-throttle:{key}"], args=[capacity, refill_per_second, time.time(), count]
+        ))
+
+
+class LoginThrottle:
+    """
+    Ограничение попыток входа по IP и по имени пользователя (token bucket).
+
+    Проверка выполняется до обращения к БД и хеширования пароля, поэтому
+    отклоненная попытка стоит только обновления счетчика в памяти (или
+    одного запроса к Redis при общем хранилище). Успешный вход возвращает
+    попытку имени пользователя (login_succeeded): лимит по имени расходуют
+    только неудачные попытки, а повторные входы владельца его не исчерпывают.
+    Если Redis недоступен, используется хранилище в памяти процесса.
+    """
+
+    def __init__(self, ip_capacity: float, ip_per_minute: float,
+                 username_capacity: float, username_per_minute: float,
+                 max_keys: int = 100_000, redis_url: Optional[str] = None):
+        """
+        Args:
+            ip_capacity: Максимум попыток подряд с одного IP
+            ip_per_minute: Скорость восстановления попыток для IP в минуту
+            username_capacity: Максимум попыток подряд для одного имени пользователя
+            username_per_minute: Скорость восстановления попыток для имени пользователя в минуту
+            max_keys: Максимум ключей в памяти процесса
+            redis_url: URL Redis для общего хранилища (опционально)
+        """
+        self.ip_limit = (ip_capacity, ip_per_minute / 60)
+        self.username_limit = (username_capacity, username_per_minute / 60)
+        self._memory = MemoryBuckets(max_keys)
+        self._shared = RedisBuckets(redis_url) if redis_url and redis is not None else None
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected_by_ip = 0
+        self.rejected_by_username = 0
+        self.shared_backend_errors = 0
+
+    def _take(self, key: str, limit: Tuple[float, float], count: float = 1) -> float:
+        if self._shared is not None:
+            try:
+                return self._shared.take(key, *limit, count)
+            except Exception as e:
+                with self._lock:
+                    self.shared_backend_errors += 1
+                auth_logger.warning(f"Ограничение входа: общее хранилище недоступно, используется память: {e}")
+        return self._memory.take(key, *limit, count)
+
+    def check(self, ip: str, username: str) -> None:
+        """
+        Учесть попытку входа.
+
+        Raises:
+            HTTPException: 429 с заголовком Retry-After, если лимит исчерпан
+        """
+        retry_after = self._take(f"ip:{ip}", self.ip_limit)
+        if retry_after:
+            with self._lock:
+                self.rejected_by_ip += 1
+        else:
+            # Попытка по имени занимается до проверки пароля (одновременные попытки
+            # не превышают лимит) и возвращается при успешном входе
+            retry_after = self._take(self._username_key(username), self.username_limit)
+            if retry_after:
+                with self._lock:
+                    self.rejected_by_username += 1
+
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много попыток входа. Попробуйте позже",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+            )
+
+        with self._lock:
+            self.allowed += 1
+
+    def login_succeeded(self, username: str) -> None:
+        """Вернуть попытку имени пользователя, занятую check, после успешного входа"""
+        self._take(self._username_key(username), self.username_limit, count=-1)
+
+    @staticmethod
+    def _username_key(username: str) -> str:
+        return f"user:{username.strip().lower()}"
+
+    def stats(self) -> dict:
+        """Счетчики разрешенных и отклоненных попыток в текущем процессе"""
+        with self._lock:
+            return {
+                "backend": "redis" if self._shared is not None else "memory",
+                "allowed": self.allowed,
+                "rejected_by_ip": self.rejected_by_ip,
+                "rejected_by_username": self.rejected_by_username,
+                "rejected_total": self.rejected_by_ip + self.rejected_by_username,
+                "shared_backend_errors": self.shared_backend_errors
+            }
+
+
+def client_ip(request: Request) -> str:
+    """IP клиента; X-Forwarded-For учитывается только за доверенным прокси"""
+    if settings.LOGIN_THROTTLE_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+login_throttle = LoginThrottle(
+    ip_capacity=settings.LOGIN_THROTTLE_IP_BURST,
+    ip_per_minute=settings.LOGIN_THROTTLE_IP_PER_MINUTE,
+    username_capacity=settings.LOGIN_THROTTLE_USERNAME_BURST,
+    username_per_minute=settings.LOGIN_THROTTLE_USERNAME_PER_MINUTE,
+    redis_url=settings.LOGIN_THROTTLE_REDIS_URL or None
+)
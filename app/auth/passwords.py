@@ -0,0 +1,153 @@
+# app/auth/passwords.py
+import asyncio
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from app.config import settings
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # argon2-cffi не установлен — используется scrypt
+    PasswordHasher = None
+
+SCRYPT_PREFIX = "scrypt"
+ARGON2_PREFIX = "$argon2"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordHashing:
+    """
+    Хеширование паролей через KDF с настраиваемой стоимостью.
+
+    Формат scrypt-хеша: scrypt$n$r$p$соль$хеш (hex), параметры хранятся в
+    самом хеше, поэтому стоимость можно повышать без миграции — старые хеши
+    проверяются со своими параметрами и пересчитываются при входе.
+    Хеши argon2 хранятся в стандартном формате argon2-cffi.
+
+    Старые хеши (один раунд SHA-256 с солью в отдельной колонке)
+    по-прежнему проверяются и считаются требующими пересчета.
+    """
+
+    def __init__(self, algorithm: str = "scrypt", n: int = 2 ** 14, r: int = 8, p: int = 1,
+                 workers: int = 4, max_concurrency: int = 16):
+        """
+        Args:
+            algorithm: scrypt или argon2 (если установлен argon2-cffi)
+            n: Параметр стоимости scrypt (степень двойки)
+            r: Размер блока scrypt
+            p: Параллелизм scrypt
+            workers: Количество потоков для хеширования
+            max_concurrency: Максимум одновременных операций (остальные ждут в очереди)
+        """
+        if algorithm == "argon2" and PasswordHasher is None:
+            algorithm = "scrypt"
+        self.algorithm = algorithm
+        self.n, self.r, self.p = n, r, p
+        self.max_concurrency = max_concurrency
+        self._argon2 = PasswordHasher() if algorithm == "argon2" else None
+        # hashlib.scrypt отпускает GIL, поэтому потоков достаточно
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._semaphores = {}
+
+    @staticmethod
+    def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n, r=r, p=p,
+            maxmem=256 * n * r + 1024 * 1024,
+            dklen=KEY_BYTES
+        )
+
+    # --- Синхронный интерфейс (выполняется в потоке пула или в скриптах) ---
+
+    def hash(self, password: str) -> str:
+        """Хеш пароля с текущими параметрами"""
+        if self._argon2 is not None:
+            return self._argon2.hash(password)
+
+        salt = os.urandom(SALT_BYTES)
+        key = self._scrypt(password, salt, self.n, self.r, self.p)
+        return f"{SCRYPT_PREFIX}${self.n}${self.r}${self.p}${salt.hex()}${key.hex()}"
+
+    def verify(self, password: str, hashed_password: str, legacy_salt: Optional[str] = None) -> bool:
+        """
+        Проверка пароля.
+
+        Args:
+            password: Пароль в открытом виде
+            hashed_password: Сохраненный хеш
+            legacy_salt: Соль старого SHA-256 хеша (колонка users.salt)
+
+        Returns:
+            True если пароль соответствует хешу, иначе False
+        """
+        if not hashed_password:
+            return False
+
+        if hashed_password.startswith(SCRYPT_PREFIX + "$"):
+            try:
+                _, n, r, p, salt, key = hashed_password.split("$")
+                expected = bytes.fromhex(key)
+                actual = self._scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+            except ValueError:
+                return False
+            return hmac.compare_digest(actual, expected)
+
+        if hashed_password.startswith(ARGON2_PREFIX):
+            if PasswordHasher is None:
+                return False
+            try:
+                return PasswordHasher().verify(hashed_password, password)
+            except (VerificationError, InvalidHashError):
+                return False
+
+        # Старый формат: SHA-256(пароль + соль)
+        legacy = hashlib.sha256((password + (legacy_salt or "")).encode("utf-8")).hexdigest()
+        return hmac.compare_digest(legacy, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Хеш старого формата или с другими параметрами стоимости"""
+        if self._argon2 is not None:
+            return not hashed_password.startswith(ARGON2_PREFIX) or self._argon2.check_needs_rehash(hashed_password)
+
+        if not hashed_password.startswith(SCRYPT_PREFIX + "$"):
+            return True
+        params = hashed_password.split("$")[1:4]
+        return params != [str(self.n), str(self.r), str(self.p)]
+
+    # --- Асинхронный интерфейс для обработчиков запросов ---
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, func, *args):
+        async with self._semaphore():
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def hash_async(self, password: str) -> str:
+        """Хеш пароля в пуле потоков, не блокируя event loop"""
+        return await self._run(self.hash, password)
+
+    async def verify_async(self, password: str, hashed_password: str, legacy_salt: Optional[str] = None) -> bool:
+        """Проверка пароля в пуле потоков, не блокируя event loop"""
+        return await self._run(self.verify, password, hashed_password, legacy_salt)
+
+
+password_hashing = PasswordHashing(
+    algorithm=settings.PASSWORD_HASH_ALGORITHM,
+    n=settings.PASSWORD_SCRYPT_N,
+    r=settings.PASSWORD_SCRYPT_R,
+    p=settings.PASSWORD_SCRYPT_P,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY
+)
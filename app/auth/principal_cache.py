@@ -0,0 +1,162 @@
+# app/auth/principal_cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """
+    Неизменяемый снимок аутентифицированного пользователя.
+
+    Содержит только то, что нужно для проверки доступа и ответа /auth/me,
+    и не привязан к сессии БД, поэтому его можно безопасно кэшировать.
+    """
+    id: int
+    email: str
+    username: Optional[str]  # None, если снимок построен из claims токена
+    full_name: Optional[str]
+    role: UserRole
+    is_active: bool
+
+    @property
+    def is_admin(self) -> bool:
+        """Проверка, является ли пользователь админом или суперадмином"""
+        return self.role in (UserRole.ADMIN, UserRole.SUPERADMIN)
+
+    @property
+    def is_superadmin(self) -> bool:
+        """Проверка, является ли пользователь суперадмином"""
+        return self.role == UserRole.SUPERADMIN
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=bool(user.is_active)
+        )
+
+
+class PrincipalCache:
+    """
+    Ограниченный LRU-кэш пользователей с TTL, ключ — email из токена.
+
+    Кэш локален для процесса: изменения пользователя сбрасывают запись
+    сразу только в том процессе, где они выполнены, в остальных воркерах
+    запись устаревает не позже чем через ttl_seconds.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        """
+        Args:
+            max_size: Максимальное количество записей
+            ttl_seconds: Время жизни записи в секундах
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # email → (principal, expires_at)
+        self._emails_by_id: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, email: str) -> Optional[UserPrincipal]:
+        """Получить пользователя из кэша или None"""
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(email)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(email)
+            self.misses += 1
+            return None
+
+    def put(self, principal: UserPrincipal) -> None:
+        """Сохранить пользователя в кэше"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._remove(principal.email)
+            self._entries[principal.email] = (principal, time.monotonic() + self.ttl_seconds)
+            self._emails_by_id[principal.id] = principal.email
+            while len(self._entries) > self.max_size:
+                oldest_email, (oldest, _) = self._entries.popitem(last=False)
+                self._emails_by_id.pop(oldest.id, None)
+                self.evictions += 1
+
+    def invalidate(self, user_id: Optional[int] = None, email: Optional[str] = None) -> None:
+        """Удалить пользователя из кэша по ID и/или email"""
+        with self._lock:
+            if user_id is not None and user_id in self._emails_by_id:
+                self._remove(self._emails_by_id[user_id])
+            if email is not None:
+                self._remove(email)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        with self._lock:
+            self._entries.clear()
+            self._emails_by_id.clear()
+
+    def stats(self) -> dict:
+        """Метрики кэша: размер, попадания, промахи и доля попаданий"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0
+            }
+
+    def _remove(self, email: str) -> None:
+        entry = self._entries.pop(email, None)
+        if entry is not None and self._emails_by_id.get(entry[0].id) == email:
+            del self._emails_by_id[entry[0].id]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+
+def load_principal(db: Session, email: str) -> Optional[UserPrincipal]:
+    """
+    Получить пользователя по email из кэша или из БД.
+
+    Args:
+        db: Сессия базы данных
+        email: Email из токена
+
+    Returns:
+        Optional[UserPrincipal]: Снимок пользователя или None, если пользователь не найден
+    """
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        return None
+
+    principal = UserPrincipal.from_user(user)
+    principal_cache.put(principal)
+    return principal
@@ -0,0 +1,127 @@
+# app/auth/token_versions.py
+import datetime
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import func
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+
+
+class TokenVersionMap:
+    """
+    Версии токенов пользователей в памяти процесса: user_id → token_version.
+
+    Версия увеличивается при деактивации, смене роли, email или пароля
+    (см. app/crud/user.py), и токены со старой версией перестают
+    приниматься. Изменения в текущем процессе применяются сразу, изменения
+    из других воркеров подтягиваются фоновой задачей раз в refresh_seconds
+    одним запросом по users.updated_at. Если фоновая задача не запущена
+    (скрипты) или отстала, карту обновляет один из запросов, остальные в это
+    время проверяют токены по текущей карте.
+    """
+
+    # Перекрытие окна обновления: строки, закоммиченные позже своего updated_at
+    OVERLAP = datetime.timedelta(seconds=60)
+
+    def __init__(self, refresh_seconds: float):
+        """
+        Args:
+            refresh_seconds: Интервал подтягивания изменений из БД
+        """
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[int, int] = {}
+        self._cursor: Optional[datetime.datetime] = None  # Максимальный updated_at из загруженных строк
+        self._refreshed_at: Optional[float] = None
+        self._refreshing = False
+        self._missing: Dict[int, float] = {}  # Несуществующие user_id → когда проверены
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Загрузить версии, изменившиеся с прошлого обновления (при первом вызове — все)"""
+        db = SessionLocal()
+        try:
+            query = db.query(User.id, User.token_version, User.updated_at)
+            if self._cursor is not None:
+                query = query.filter(User.updated_at >= self._cursor - self.OVERLAP)
+            rows = query.all()
+        finally:
+            db.close()
+
+        with self._lock:
+            for user_id, version, updated_at in rows:
+                self._versions[user_id] = max(version or 0, self._versions.get(user_id, 0))
+                if updated_at is not None and (self._cursor is None or updated_at > self._cursor):
+                    self._cursor = updated_at
+            self._refreshed_at = time.monotonic()
+            for user_id in [user_id for user_id in self._missing if user_id in self._versions]:
+                del self._missing[user_id]
+            expired = self._refreshed_at - self.refresh_seconds
+            for user_id in [user_id for user_id, checked_at in self._missing.items() if checked_at <= expired]:
+                del self._missing[user_id]
+
+    def _refresh_if_stale(self, max_age: float) -> None:
+        """Обновить карту, если она старше max_age; одновременно обновляет только один вызов"""
+        with self._lock:
+            stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at >= max_age
+            if not stale or self._refreshing:
+                return
+            self._refreshing = True
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load_one(self, user_id: int) -> Optional[int]:
+        """Версия пользователя, которого еще нет в карте (создан после обновления)"""
+        checked_at = self._missing.get(user_id)
+        if checked_at is not None and time.monotonic() - checked_at < self.refresh_seconds:
+            return None  # Недавно проверен: пользователя нет
+
+        db = SessionLocal()
+        try:
+            version = db.query(func.coalesce(User.token_version, 0)).filter(User.id == user_id).scalar()
+        finally:
+            db.close()
+        if version is not None:
+            self.set(user_id, version)
+        else:
+            with self._lock:
+                self._missing[user_id] = time.monotonic()
+        return version
+
+    def get(self, user_id: int) -> Optional[int]:
+        """
+        Текущая версия токенов пользователя.
+
+        Returns:
+            Optional[int]: Версия или None, если пользователь не существует
+        """
+        # Обычно карту обновляет фоновая задача; здесь — только если ее нет или она отстала
+        self._refresh_if_stale(2 * self.refresh_seconds)
+
+        version = self._versions.get(user_id)
+        if version is None:
+            version = self._load_one(user_id)
+        return version
+
+    def set(self, user_id: int, version: int) -> None:
+        """Запомнить новую версию после изменения пользователя в этом процессе"""
+        with self._lock:
+            self._versions[user_id] = max(version, self._versions.get(user_id, 0))
+            self._missing.pop(user_id, None)
+
+    def refresh_periodically(self) -> None:
+        """Фоновое обновление карты (run_periodic); пропускается, если карта еще свежая"""
+        self._refresh_if_stale(self.refresh_seconds / 2)
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        """Проверить, что токен с этой версией не отозван"""
+        return version == self.get(user_id)
+
+
+token_versions = TokenVersionMap(refresh_seconds=settings.TOKEN_VERSION_REFRESH_SECONDS)
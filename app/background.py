@@ -0,0 +1,46 @@
+# app/background.py
+import asyncio
+from typing import Callable, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.logger import app_logger
+
+_tasks: List[asyncio.Task] = []
+
+
+def run_periodic(name: str, interval_seconds: float, func: Callable[[], object]) -> asyncio.Task:
+    """
+    Запускает синхронную функцию периодически в пуле потоков.
+
+    Должна вызываться из работающего event loop (например, в обработчике startup).
+
+    Args:
+        name: Имя задачи для логов
+        interval_seconds: Интервал между запусками в секундах
+        func: Функция без аргументов
+
+    Returns:
+        asyncio.Task: Фоновая задача
+    """
+
+    async def loop():
+        while True:
+            try:
+                await run_in_threadpool(func)
+            except Exception as e:
+                app_logger.error(f"Ошибка фоновой задачи {name}: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+    task = asyncio.create_task(loop(), name=name)
+    _tasks.append(task)
+    app_logger.info(f"Запущена фоновая задача {name} (интервал {interval_seconds}s)")
+    return task
+
+
+async def stop_background_tasks() -> None:
+    """Останавливает все фоновые задачи"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
@@ -0,0 +1,460 @@
+# app/backup.py
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Connection, make_url
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+
+BACKUP_PREFIX = "perfume_store_backup"
+BACKUP_TIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+DUMP_DIR = "dump"  # Каталог pg_dump --format=directory внутри копии
+MANIFEST_FILE = "manifest.json"
+CHECKSUM_CHUNK_SIZE = 1024 * 1024
+
+# Количество строк и контрольная сумма содержимого таблицы, не зависящая от
+# порядка строк: сумма первых 60 бит md5 текстового представления каждой строки
+TABLE_STATS_SQL = (
+    "SELECT count(*), COALESCE(sum(('x' || left(md5(t::text), 15))::bit(60)::bigint), 0)::text "
+    'FROM "{table}" AS t'
+)
+
+
+class BackupError(Exception):
+    """Ошибка создания, проверки или восстановления резервной копии"""
+    pass
+
+
+def _postgresql_url(database_url: str) -> URL:
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        raise BackupError(f"Резервное копирование поддерживается только для PostgreSQL, а не {url.get_backend_name()}")
+    return url
+
+
+def pg_command(tool: str, database_url: str, *args: str) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Команда pg_dump/pg_restore/vacuumdb для базы из DATABASE_URL.
+
+    URL разбирается через SQLAlchemy make_url, поэтому пароли с ":" и "@"
+    не ломают разбор. Пароль передается через PGPASSWORD, а не в командной
+    строке, параметры запроса (sslmode и т.п.) сохраняются.
+
+    Args:
+        tool: Имя программы (pg_dump, pg_restore, vacuumdb)
+        database_url: URL базы данных
+        *args: Дополнительные аргументы программы
+
+    Returns:
+        Tuple[List[str], Dict[str, str]]: Команда и окружение процесса
+    """
+    url = _postgresql_url(database_url)
+    env = os.environ.copy()
+    if url.password:
+        env["PGPASSWORD"] = str(url.password)
+    dsn = url.set(drivername="postgresql", password=None).render_as_string(hide_password=False)
+
+    executable = str(Path(settings.BACKUP_PG_BIN_DIR) / tool) if settings.BACKUP_PG_BIN_DIR else tool
+    return [executable, f"--dbname={dsn}", *args], env
+
+
+def run_pg_command(tool: str, database_url: str, *args: str) -> subprocess.CompletedProcess:
+    """Выполнить pg_command и вернуть результат; при ненулевом коде — BackupError с stderr"""
+    cmd, env = pg_command(tool, database_url, *args)
+    process = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise BackupError(f"{tool} завершился с кодом {process.returncode}: {process.stderr.strip()}")
+    return process
+
+
+def directory_size(path: Path) -> int:
+    """Суммарный размер файлов каталога в байтах"""
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def _file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(CHECKSUM_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_checksums(directory: Path, jobs: int = 1) -> Dict[str, dict]:
+    """
+    SHA-256 и размер каждого файла каталога.
+
+    Файлы читаются потоком по CHECKSUM_CHUNK_SIZE байт в jobs потоков
+    (hashlib отпускает GIL на больших блоках), без загрузки в память целиком.
+
+    Returns:
+        Dict[str, dict]: Относительный путь → {"size", "sha256"}
+    """
+    files = sorted(file for file in directory.rglob("*") if file.is_file())
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        checksums = executor.map(_file_checksum, files)
+        return {
+            file.relative_to(directory).as_posix(): {"size": file.stat().st_size, "sha256": checksum}
+            for file, checksum in zip(files, checksums)
+        }
+
+
+def table_stats(connection: Connection) -> Dict[str, dict]:
+    """
+    Количество строк и контрольная сумма содержимого каждой таблицы текущей схемы.
+
+    Returns:
+        Dict[str, dict]: Имя таблицы → {"rows", "checksum"}
+    """
+    tables = connection.execute(text(
+        "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() ORDER BY tablename"
+    )).scalars().all()
+    stats = {}
+    for table in tables:
+        rows, checksum = connection.execute(text(TABLE_STATS_SQL.format(table=table))).one()
+        stats[table] = {"rows": rows, "checksum": checksum}
+    return stats
+
+
+def compare_table_stats(expected: Dict[str, dict], actual: Dict[str, dict]) -> List[str]:
+    """
+    Сравнить статистику таблиц восстановленной базы с манифестом.
+
+    Returns:
+        List[str]: Описания расхождений (пустой список — совпадает)
+    """
+    problems = []
+    for table, stats in expected.items():
+        restored = actual.get(table)
+        if restored is None:
+            problems.append(f"{table}: таблица отсутствует")
+        elif restored["rows"] != stats["rows"]:
+            problems.append(f"{table}: строк {restored['rows']}, ожидалось {stats['rows']}")
+        elif restored["checksum"] != stats["checksum"]:
+            problems.append(f"{table}: контрольная сумма содержимого не совпадает")
+    return problems
+
+
+def verify_files(backup_path: Path, manifest: dict, jobs: int = 1) -> List[str]:
+    """
+    Проверить файлы дампа по контрольным суммам манифеста.
+
+    Returns:
+        List[str]: Описания расхождений (пустой список — файлы целы)
+    """
+    actual = file_checksums(backup_path / DUMP_DIR, jobs)
+    problems = [f"{name}: файл отсутствует" for name in manifest["files"] if name not in actual]
+    problems += [f"{name}: лишний файл" for name in actual if name not in manifest["files"]]
+    problems += [
+        f"{name}: контрольная сумма не совпадает"
+        for name, entry in manifest["files"].items()
+        if name in actual and actual[name]["sha256"] != entry["sha256"]
+    ]
+    return problems
+
+
+def load_manifest(backup_path: Path) -> dict:
+    """Прочитать манифест резервной копии"""
+    manifest_path = backup_path / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise BackupError(f"Нет манифеста {manifest_path}: копия не завершена или повреждена")
+    return json.loads(manifest_path.read_text(encoding="utf-8"))
+
+
+def write_manifest(backup_path: Path, manifest: dict) -> None:
+    """Записать манифест атомарно (временный файл + os.replace)"""
+    temporary = backup_path / f"{MANIFEST_FILE}.tmp"
+    temporary.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temporary, backup_path / MANIFEST_FILE)
+
+
+def mark_verified(backup_path: Path, manifest: dict, verified: bool) -> None:
+    """
+    Записать в манифест результат проверки копии.
+
+    Копия с "verified": false не считается пригодной: ее не выбирает
+    latest_backup, и ее удаляет политика хранения.
+    """
+    manifest["verified"] = verified
+    write_manifest(backup_path, manifest)
+
+
+def create_backup(
+        database_url: str,
+        backup_dir: Path,
+        jobs: int,
+        compression: str,
+        with_table_stats: bool = True
+) -> Tuple[Path, dict]:
+    """
+    Создать резервную копию: pg_dump --format=directory в jobs потоков и манифест.
+
+    Дамп и статистика таблиц снимаются с одного экспортированного снимка
+    (pg_export_snapshot), поэтому количество строк и контрольные суммы в
+    манифесте соответствуют именно содержимому дампа. Статистика считается,
+    пока работает pg_dump.
+
+    Args:
+        database_url: URL базы данных
+        backup_dir: Каталог резервных копий
+        jobs: Количество параллельных потоков pg_dump
+        compression: Аргумент pg_dump --compress
+        with_table_stats: Посчитать количество строк и контрольные суммы таблиц
+
+    Returns:
+        Tuple[Path, dict]: Каталог копии и ее манифест
+
+    Raises:
+        BackupError: Если база не PostgreSQL или pg_dump завершился с ошибкой
+    """
+    database = _postgresql_url(database_url).database
+    started_at = datetime.datetime.now()
+    backup_path = backup_dir / f"{BACKUP_PREFIX}_{started_at.strftime(BACKUP_TIME_FORMAT)}"
+    backup_path.mkdir(parents=True)
+    timings = {}
+
+    engine = create_engine(database_url, poolclass=NullPool, isolation_level="REPEATABLE READ")
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SET TRANSACTION READ ONLY"))
+            snapshot = connection.execute(text("SELECT pg_export_snapshot()")).scalar()
+            database_size = connection.execute(text("SELECT pg_database_size(current_database())")).scalar()
+            server_version = connection.execute(text("SHOW server_version")).scalar()
+
+            cmd, env = pg_command(
+                "pg_dump", database_url, "--format=directory", f"--jobs={jobs}",
+                f"--compress={compression}", f"--snapshot={snapshot}", f"--file={backup_path / DUMP_DIR}"
+            )
+            phase_started = time.perf_counter()
+            process = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+            stats = {}
+            if with_table_stats:
+                stats_started = time.perf_counter()
+                stats = table_stats(connection)
+                timings["table_stats"] = time.perf_counter() - stats_started
+
+            _, stderr = process.communicate()
+            timings["dump"] = time.perf_counter() - phase_started
+            connection.rollback()
+        if process.returncode != 0:
+            raise BackupError(f"pg_dump завершился с кодом {process.returncode}: {stderr.strip()}")
+
+        phase_started = time.perf_counter()
+        files = file_checksums(backup_path / DUMP_DIR, jobs)
+        timings["checksums"] = time.perf_counter() - phase_started
+    except BaseException:
+        shutil.rmtree(backup_path, ignore_errors=True)
+        raise
+    finally:
+        engine.dispose()
+
+    manifest = {
+        "created_at": started_at.isoformat(timespec="seconds"),
+        "database": database,
+        "server_version": server_version,
+        "format": "directory",
+        "jobs": jobs,
+        "compression": compression,
+        "database_size": database_size,
+        "dump_size": sum(entry["size"] for entry in files.values()),
+        "timings": {phase: round(seconds, 3) for phase, seconds in timings.items()},
+        "files": files,
+        "tables": stats,
+    }
+    # Манифест пишется последним: копия без манифеста считается незавершенной
+    write_manifest(backup_path, manifest)
+    return backup_path, manifest
+
+
+@contextlib.contextmanager
+def scratch_database(database_url: str, name: Optional[str] = None) -> Iterator[str]:
+    """
+    Временная пустая база на том же сервере; удаляется после выхода из блока.
+
+    Args:
+        database_url: URL исходной базы (кодировка и локаль берутся у нее)
+        name: Имя временной базы (по умолчанию <база>_verify_<pid>)
+
+    Yields:
+        str: URL временной базы
+    """
+    url = make_url(database_url)
+    name = name or f"{url.database}_verify_{os.getpid()}"
+    admin_engine = create_engine(url.set(database="postgres"), poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    try:
+        with admin_engine.connect() as connection:
+            # Кодировка и локаль как у исходной базы: от них зависят длины строк и сортировка
+            encoding, collate, ctype = connection.execute(text(
+                "SELECT pg_encoding_to_char(encoding), datcollate, datctype FROM pg_database WHERE datname = :name"
+            ), {"name": url.database}).one()
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+            connection.execute(text(
+                f"CREATE DATABASE \"{name}\" TEMPLATE template0 "
+                f"ENCODING '{encoding}' LC_COLLATE '{collate}' LC_CTYPE '{ctype}'"
+            ))
+        try:
+            yield url.set(database=name).render_as_string(hide_password=False)
+        finally:
+            with admin_engine.connect() as connection:
+                connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+    finally:
+        admin_engine.dispose()
+
+
+def restore_backup(
+        backup_path: Path,
+        database_url: str,
+        jobs: int,
+        section: Optional[str] = None,
+        clean: bool = False
+) -> None:
+    """
+    Восстановить копию: pg_restore -j в jobs потоков.
+
+    Args:
+        backup_path: Каталог копии
+        database_url: URL базы, в которую восстанавливать
+        jobs: Количество параллельных потоков pg_restore
+        section: Только одна часть дампа: pre-data (схема без индексов),
+            data или post-data (индексы, ограничения, внешние ключи)
+        clean: Удалить существующие объекты перед созданием
+
+    Raises:
+        BackupError: Если pg_restore завершился с ошибкой
+    """
+    args = [f"--jobs={jobs}", "--no-owner", "--exit-on-error"]
+    if section:
+        args.append(f"--section={section}")
+    if clean:
+        args += ["--clean", "--if-exists"]
+    run_pg_command("pg_restore", database_url, *args, str(backup_path / DUMP_DIR))
+
+
+def analyze_database(database_url: str, jobs: int) -> None:
+    """
+    Собрать статистику планировщика после восстановления (vacuumdb --analyze-only -j).
+
+    Raises:
+        BackupError: Если vacuumdb завершился с ошибкой
+    """
+    run_pg_command("vacuumdb", database_url, "--analyze-only", f"--jobs={jobs}")
+
+
+def failed_backups(backup_dir: Path) -> List[Path]:
+    """Копии, не прошедшие проверку (в манифесте "verified": false)"""
+    if not backup_dir.exists():
+        return []
+    return sorted(
+        path for path in backup_dir.iterdir()
+        if path.is_dir() and (path / MANIFEST_FILE).exists() and load_manifest(path).get("verified") is False
+    )
+
+
+def list_backups(backup_dir: Path) -> List[Tuple[Path, datetime.datetime]]:
+    """
+    Пригодные резервные копии: завершенные копии каталога (с манифестом, кроме
+    не прошедших проверку) и старые дампы *.sql.
+
+    Returns:
+        List[Tuple[Path, datetime.datetime]]: Путь и время создания
+    """
+    if not backup_dir.exists():
+        return []
+    backups = []
+    for path in backup_dir.iterdir():
+        if path.is_dir() and (path / MANIFEST_FILE).exists():
+            manifest = load_manifest(path)
+            if manifest.get("verified") is False:
+                continue
+            created_at = datetime.datetime.fromisoformat(manifest["created_at"])
+        elif path.is_file() and path.suffix == ".sql":
+            created_at = datetime.datetime.fromtimestamp(path.stat().st_mtime)
+        else:
+            continue
+        backups.append((path, created_at))
+    return sorted(backups, key=lambda backup: backup[1], reverse=True)
+
+
+def latest_backup(backup_dir: Path) -> Optional[Path]:
+    """Последняя завершенная резервная копия в формате каталога"""
+    for path, _ in list_backups(backup_dir):
+        if path.is_dir():
+            return path
+    return None
+
+
+def select_retained(
+        backups: Iterable[Tuple[Path, datetime.datetime]],
+        now: datetime.datetime,
+        keep_last: int,
+        keep_daily: int,
+        keep_weekly: int
+) -> set:
+    """
+    Копии, которые остаются по политике хранения.
+
+    Хранятся keep_last последних копий, последняя копия каждого из
+    keep_daily последних дней и каждой из keep_weekly последних недель
+    (неделя начинается с понедельника).
+
+    Returns:
+        set: Пути сохраняемых копий
+    """
+    ordered = sorted(backups, key=lambda backup: backup[1], reverse=True)
+    retained = {path for path, _ in ordered[:keep_last]}
+    this_week = now.date() - datetime.timedelta(days=now.weekday())
+    days_seen, weeks_seen = set(), set()
+
+    for path, created_at in ordered:
+        day = created_at.date()
+        if (now.date() - day).days < keep_daily and day not in days_seen:
+            days_seen.add(day)
+            retained.add(path)
+        week = day - datetime.timedelta(days=day.weekday())
+        if (this_week - week).days // 7 < keep_weekly and week not in weeks_seen:
+            weeks_seen.add(week)
+            retained.add(path)
+    return retained
+
+
+def apply_retention(
+        backup_dir: Path,
+        now: datetime.datetime,
+        keep_last: int,
+        keep_daily: int,
+        keep_weekly: int
+) -> List[Path]:
+    """
+    Удалить копии, не попавшие в политику хранения (select_retained), и копии,
+    не прошедшие проверку: они не занимают места хороших копий в политике.
+
+    Returns:
+        List[Path]: Удаленные копии
+    """
+    backups = list_backups(backup_dir)
+    retained = select_retained(backups, now, keep_last, keep_daily, keep_weekly)
+    removed = []
+    for path in failed_backups(backup_dir):
+        shutil.rmtree(path)
+        removed.append(path)
+    for path, _ in backups:
+        if path in retained:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        removed.append(path)
+    return removed
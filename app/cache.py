@@ -4,6 +4,10 @@ import json
 from typing import Any, Callable, Dict, Optional, TypeVar
 import time
 
+from sqlalchemy import inspect
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import InstanceState, Session
+
 # Простая реализация кэша в памяти
 cache_store: Dict[str, Dict[str, Any]] = {}
 
@@ -14,6 +18,12 @@ def cache(ttl_seconds: int = 300):
     """
     Декоратор для кэширования результатов функции.
 
+    Сессия БД (позиционный или именованный аргумент) в ключ не входит, поэтому
+    результат общий для всех запросов и потоков процесса. Кэшировать можно
+    только простые значения и неизменяемые записи (например, CatalogProduct):
+    объекты моделей привязаны к сессии загрузившего запроса, и для них
+    декоратор выбрасывает TypeError.
+
     Args:
         ttl_seconds: Время жизни кэша в секундах
 
@@ -24,10 +34,11 @@ def cache(ttl_seconds: int = 300):
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
-            # Создаем ключ кэша на основе имени функции и аргументов
+            # Создаем ключ кэша на основе имени функции и аргументов.
+            # Сессия БД в ключ не входит: у каждого запроса она своя
             key_parts = [func.__name__]
-            key_parts.extend([str(arg) for arg in args])
-            key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
+            key_parts.extend([str(arg) for arg in args if not isinstance(arg, Session)])
+            key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items()) if not isinstance(v, Session)])
             cache_key = ":".join(key_parts)
 
             # Проверяем, есть ли результат в кэше и не истек ли он
@@ -40,6 +51,7 @@ def cache(ttl_seconds: int = 300):
             result = func(*args, **kwargs)
 
             # Сохраняем результат в кэше
+            _ensure_detached(func.__name__, result)
             cache_store[cache_key] = {
                 "data": result,
                 "expires": time.time() + ttl_seconds
@@ -52,6 +64,18 @@ def cache(ttl_seconds: int = 300):
     return decorator
 
 
+def _is_orm_instance(value: Any) -> bool:
+    return isinstance(inspect(value, raiseerr=False), InstanceState)
+
+
+def _ensure_detached(name: str, result: Any) -> None:
+    """Проверить, что в кэш не попадают объекты моделей (по результату и его первой строке)"""
+    first = result[0] if isinstance(result, (list, tuple)) and result else None
+    values = [result, first] + (list(first) if isinstance(first, (tuple, Row)) else [])
+    if any(_is_orm_instance(value) for value in values):
+        raise TypeError(f"{name}: объекты моделей SQLAlchemy нельзя кэшировать между запросами")
+
+
 def clear_cache(prefix: Optional[str] = None) -> None:
     """
     Очищает кэш.
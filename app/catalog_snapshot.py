@@ -0,0 +1,452 @@
+# app/catalog_snapshot.py
+from array import array
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: снимок отключается, каталог читается из БД
+    fcntl = None
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logger import app_logger
+from app.models.currency import BASE_CURRENCY, CurrencyRate
+from app.models.product import CatalogVersion, Product, ProductPrice
+
+MAGIC = b"CATSNAP1"
+# id, price_rub, created_at, updated_at (мкс от эпохи), (смещение, длина) для name, brand, volume, description
+RECORD = struct.Struct("<qdqq8I")
+NO_TIME = -(2 ** 63)
+NO_TEXT = 0xFFFFFFFF
+EPOCH = datetime.datetime(1970, 1, 1)
+CATALOG_VERSION_ID = 1  # Единственная строка таблицы catalog_version
+
+
+class CatalogProduct(NamedTuple):
+    """Товар из снимка каталога (поля как у модели Product)"""
+    id: int
+    name: str
+    price_rub: float
+    brand: Optional[str]
+    volume: Optional[str]
+    description: Optional[str]
+    created_at: Optional[datetime.datetime]
+    updated_at: Optional[datetime.datetime]
+
+
+def _to_micros(value: Optional[datetime.datetime]) -> int:
+    return NO_TIME if value is None else (value.replace(tzinfo=None) - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> Optional[datetime.datetime]:
+    return None if value == NO_TIME else EPOCH + datetime.timedelta(microseconds=value)
+
+
+def _data_start(header_size: int) -> int:
+    """Начало данных снимка: после заголовка, с выравниванием на 8 байт"""
+    end = len(MAGIC) + 4 + header_size
+    return end + (-end % 8)
+
+
+class CatalogSnapshot:
+    """
+    Снимок каталога в файле, отображенном в память (только чтение).
+
+    Формат: MAGIC, длина заголовка, заголовок JSON (версия каталога, номер
+    сборки, время сборки, количество, бренды, диапазоны цен, смещения секций), затем массив записей
+    фиксированной длины, упорядоченных по id, массивы цен float64 по
+    валютам и куча строк UTF-8. Все процессы отображают один и тот же файл,
+    поэтому данные лежат в общих страницах page cache, а каждый процесс
+    декодирует только запрошенные записи.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Неверный формат снимка каталога: {path}")
+        header_size, = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start:start + header_size])
+
+        self.path = path
+        self.version: int = header["version"]
+        # Снимки прежнего формата (до номера сборки) считаются устаревшими
+        self.build: int = header.get("build", self.version)
+        self.built_at: float = header.get("built_at", 0.0)
+        self.count: int = header["count"]
+        self.brands: List[str] = header["brands"]
+        self.price_ranges: Dict[str, Tuple[float, float]] = {
+            code: tuple(bounds) for code, bounds in header["price_ranges"].items()
+        }
+
+        view = memoryview(self._mmap)[_data_start(header_size):]
+        records = header["records_offset"]
+        self._records = view[records:records + self.count * RECORD.size]
+        self._prices = {
+            code: view[offset:offset + 8 * self.count].cast("d")
+            for code, offset in header["prices_offsets"].items()
+        }
+        self._heap = view[header["heap_offset"]:]
+
+    def has_currency(self, currency: str) -> bool:
+        return currency == BASE_CURRENCY or currency in self._prices
+
+    def _text(self, offset: int, length: int) -> Optional[str]:
+        if length == NO_TEXT:
+            return None
+        return str(self._heap[offset:offset + length], "utf-8")
+
+    def product(self, index: int) -> CatalogProduct:
+        """Декодировать одну запись снимка"""
+        (product_id, price_rub, created, updated,
+         name_offset, name_length, brand_offset, brand_length,
+         volume_offset, volume_length, description_offset, description_length) = RECORD.unpack_from(
+            self._records, index * RECORD.size
+        )
+        return CatalogProduct(
+            id=product_id,
+            name=self._text(name_offset, name_length),
+            price_rub=price_rub,
+            brand=self._text(brand_offset, brand_length),
+            volume=self._text(volume_offset, volume_length),
+            description=self._text(description_offset, description_length),
+            created_at=_from_micros(created),
+            updated_at=_from_micros(updated),
+        )
+
+    def products_page(self, skip: int, limit: int, currency: str) -> List[Tuple[CatalogProduct, float]]:
+        """
+        Страница каталога по id с ценой в валюте (как get_all_products).
+
+        Args:
+            skip: Сколько товаров пропустить
+            limit: Максимальное количество товаров
+            currency: Валюта цены (должна быть в снимке, см. has_currency)
+        """
+        prices = self._prices.get(currency)
+        page = []
+        for index in range(max(skip, 0), min(skip + limit, self.count)):
+            product = self.product(index)
+            page.append((product, product.price_rub if prices is None else prices[index]))
+        return page
+
+
+def bump_catalog_version(db: Session) -> None:
+    """
+    Увеличить версию каталога в транзакции изменения товаров, цен или курсов (без commit).
+
+    Версия хранится в БД, поэтому изменение видят воркеры всех хостов, в том
+    числе сделанное скриптами (rebuild_product_prices). Строка блокируется до
+    конца транзакции: одновременные изменения каталога выполняются по очереди.
+    """
+    updated = db.query(CatalogVersion).filter(CatalogVersion.id == CATALOG_VERSION_ID).update(
+        {CatalogVersion.version: CatalogVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        # База создана без миграций (create_all)
+        db.add(CatalogVersion(id=CATALOG_VERSION_ID, version=1))
+        db.flush()
+
+
+def read_catalog_version(db: Session) -> int:
+    """Текущая версия каталога из БД (0, если строки еще нет)"""
+    version = db.query(CatalogVersion.version).filter(CatalogVersion.id == CATALOG_VERSION_ID).scalar()
+    return version or 0
+
+
+def write_snapshot(db: Session, path: Path, version: int, build: int) -> int:
+    """
+    Записать снимок каталога из БД в файл.
+
+    Args:
+        db: Сессия базы данных
+        path: Путь к файлу снимка
+        version: Версия каталога, на момент которой читаются данные
+        build: Номер сборки (растет с каждым снимком в каталоге снимков)
+
+    Returns:
+        int: Количество товаров в снимке
+    """
+    products = db.query(
+        Product.id, Product.price_rub, Product.created_at, Product.updated_at,
+        Product.name, Product.brand, Product.volume, Product.description
+    ).order_by(Product.id).all()
+    index = {row.id: position for position, row in enumerate(products)}
+
+    # Цены по активным курсам: из product_prices, а для отсутствующих строк — по курсу
+    rates = {
+        code: float(rate)
+        for code, rate in db.query(CurrencyRate.currency_code, CurrencyRate.rate_to_rub).filter(
+            CurrencyRate.is_active == True
+        )
+    }
+    prices = {
+        code: [float(row.price_rub) / rate for row in products]
+        for code, rate in rates.items()
+    }
+    for code, product_id, price in db.query(
+            ProductPrice.currency_code, ProductPrice.product_id, ProductPrice.price
+    ).filter(ProductPrice.currency_code.in_(list(rates))):
+        if product_id in index:
+            prices[code][index[product_id]] = float(price)
+
+    heap = bytearray()
+    records = bytearray(RECORD.size * len(products))
+    for position, row in enumerate(products):
+        texts = []
+        for value in (row.name, row.brand, row.volume, row.description):
+            if value is None:
+                texts.extend((0, NO_TEXT))
+            else:
+                encoded = value.encode("utf-8")
+                texts.extend((len(heap), len(encoded)))
+                heap.extend(encoded)
+        RECORD.pack_into(
+            records, position * RECORD.size,
+            row.id, float(row.price_rub), _to_micros(row.created_at), _to_micros(row.updated_at), *texts
+        )
+
+    def bounds(values: List[float]) -> Tuple[float, float]:
+        return (min(values), max(values)) if values else (0, 0)
+
+    price_ranges = {BASE_CURRENCY: bounds([float(row.price_rub) for row in products])}
+    price_ranges.update({code: bounds(values) for code, values in prices.items()})
+    brands = sorted({row.brand for row in products if row.brand})
+
+    # Смещения секций считаются от начала данных (сразу после заголовка,
+    # с выравниванием на 8 байт для массивов float64)
+    offset = len(records)
+    prices_offsets = {}
+    for code in prices:
+        prices_offsets[code] = offset
+        offset += 8 * len(products)
+    header = {
+        "version": version,
+        "build": build,
+        "built_at": time.time(),
+        "count": len(products),
+        "brands": brands,
+        "price_ranges": price_ranges,
+        "records_offset": 0,
+        "prices_offsets": prices_offsets,
+        "heap_offset": offset,
+    }
+    encoded_header = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(encoded_header)))
+        f.write(encoded_header)
+        f.write(b"\0" * (_data_start(len(encoded_header)) - f.tell()))
+        f.write(records)
+        for values in prices.values():
+            f.write(array("d", values).tobytes())
+        f.write(heap)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(products)
+
+
+class CatalogSnapshotStore:
+    """
+    Общий для воркеров одного хоста снимок каталога в каталоге файловой системы.
+
+    Версия каталога хранится в БД (таблица catalog_version) и увеличивается
+    в транзакции каждого изменения товаров и курсов (bump_catalog_version).
+    Каждый воркер опрашивает ее в периодической задаче refresh, поэтому
+    изменение на любом хосте доходит до всех хостов за
+    CATALOG_SNAPSHOT_BUILD_INTERVAL_SECONDS.
+
+    Файлы:
+        current      — номер опубликованной сборки (меняется через os.replace)
+        catalog-N.bin — снимки
+        builder.lock — блокировка: снимки строит только воркер, который ее держит
+
+    Читатели раз в CATALOG_SNAPSHOT_CHECK_SECONDS сверяют current и атомарно
+    подменяют ссылку на новое отображение. Если опубликованный снимок старше
+    версии каталога (строитель еще не успел), читатели возвращают None и
+    каталог читается из БД. Изменения в обход версии (SQL вручную) попадают
+    в снимок не позже чем через max_age_seconds: снимок старше этого
+    пересобирается.
+    """
+
+    def __init__(self, directory: Path, check_seconds: float = 0.5, max_age_seconds: float = 300.0, keep: int = 2):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self.max_age_seconds = max_age_seconds
+        self.keep = keep
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._catalog_version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._builder_file = None
+        self._built: Optional[Tuple[int, float]] = None  # Версия и время последней сборки этого строителя
+
+    @property
+    def enabled(self) -> bool:
+        return settings.CATALOG_SNAPSHOT_ENABLED and fcntl is not None
+
+    def _read_int(self, name: str) -> int:
+        try:
+            return int((self.directory / name).read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_int(self, name: str, value: int) -> None:
+        """Записать число в файл атомарно (временный файл + os.replace)"""
+        temporary = self.directory / f".{name}.{os.getpid()}.tmp"
+        temporary.write_text(str(value))
+        os.replace(temporary, self.directory / name)
+
+    def sync_version(self, db: Session) -> None:
+        """
+        Перечитать версию каталога из БД.
+
+        Вызывается после commit изменения (bump_catalog_version): этот воркер
+        сразу перестает читать устаревший снимок, не дожидаясь опроса в refresh.
+        """
+        self._catalog_version = max(self._catalog_version, read_catalog_version(db))
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        """
+        Актуальный снимок каталога или None (снимок отключен, еще не построен или устарел).
+        """
+        if not self.enabled:
+            return None
+
+        self._check()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version < self._catalog_version:
+            return None
+        # Строитель пересобирает снимок каждые max_age_seconds; более старый —
+        # значит, строителя нет, и снимок мог пропустить изменения в обход версии
+        if time.time() - snapshot.built_at > 2 * self.max_age_seconds:
+            return None
+        return snapshot
+
+    def catalog_version(self) -> int:
+        """
+        Общая для всех хостов версия каталога (растет при каждом bump_catalog_version).
+
+        Опрашивается в refresh; после изменения в этом воркере — сразу (sync_version).
+        """
+        return self._catalog_version
+
+    def _check(self) -> None:
+        """Перечитать версии, если с прошлой проверки прошло check_seconds"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_seconds:
+            with self._lock:
+                if now - self._checked_at >= self.check_seconds:
+                    self._reload()
+                    self._checked_at = now
+
+    def _reload(self) -> None:
+        """Отобразить новый снимок, если строитель опубликовал его"""
+        published = self._read_int("current")
+        if not published or (self._snapshot is not None and self._snapshot.build == published):
+            return
+        try:
+            # Старое отображение освобождается, когда его перестанут использовать запросы
+            self._snapshot = CatalogSnapshot(self.directory / f"catalog-{published}.bin")
+        except (FileNotFoundError, ValueError) as e:
+            app_logger.warning(f"Не удалось открыть снимок каталога {published}: {str(e)}")
+
+    def _acquire_builder(self) -> bool:
+        """Стать строителем снимков, если блокировка свободна (держится до завершения процесса)"""
+        if self._builder_file is not None:
+            return True
+        lock_file = open(self.directory / "builder.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._builder_file = lock_file
+        app_logger.info(f"Воркер {os.getpid()} строит снимки каталога в {self.directory}")
+        # Каталог мог измениться, пока строителя не было (перезапуск, миграции):
+        # первый снимок нового строителя всегда собирается заново (self._built пуст)
+        return True
+
+    def build(self, db: Session) -> Optional[int]:
+        """
+        Построить и опубликовать снимок, если он устарел (только строитель).
+
+        Returns:
+            Optional[int]: Номер сборки нового снимка или None, если строить не нужно
+        """
+        if not self.enabled:
+            return None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self._acquire_builder():
+            return None
+
+        # Версия читается до чтения данных: изменения во время сборки
+        # увеличат ее, и следующий вызов соберет снимок заново
+        catalog_version = read_catalog_version(db)
+        if self._built is not None:
+            built_version, built_at = self._built
+            if built_version == catalog_version and time.time() - built_at < self.max_age_seconds:
+                return None
+
+        started = time.perf_counter()
+        build = self._read_int("current") + 1
+        path = self.directory / f"catalog-{build}.bin"
+        temporary = self.directory / f".catalog-{build}.{os.getpid()}.tmp"
+        count = write_snapshot(db, temporary, catalog_version, build)
+        os.replace(temporary, path)
+        self._write_int("current", build)
+        self._built = (catalog_version, time.time())
+        self._checked_at = 0.0
+
+        # Старые снимки удаляются; уже отображенные остаются доступны до закрытия
+        snapshots = sorted(
+            self.directory.glob("catalog-*.bin"),
+            key=lambda item: int(item.stem.split("-")[1])
+        )
+        for old in snapshots[:-self.keep]:
+            old.unlink(missing_ok=True)
+
+        app_logger.info(
+            f"Снимок каталога {build} (версия {catalog_version}): {count} товаров, "
+            f"{path.stat().st_size / 1024:.0f} КБ за {time.perf_counter() - started:.3f}s"
+        )
+        return build
+
+    def refresh(self) -> None:
+        """Периодическая задача всех воркеров: опросить версию каталога и построить снимок при необходимости"""
+        db = SessionLocal()
+        try:
+            self._catalog_version = read_catalog_version(db)
+            self.build(db)
+        finally:
+            db.close()
+
+
+def _default_directory() -> Path:
+    """Каталог снимков: свой для каждой базы данных (на каждом хосте строится свой снимок)"""
+    if settings.CATALOG_SNAPSHOT_DIR:
+        return Path(settings.CATALOG_SNAPSHOT_DIR)
+    digest = hashlib.sha256(settings.DATABASE_URL.encode("utf-8")).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"catalog-snapshot-{digest}"
+
+
+catalog_snapshot = CatalogSnapshotStore(
+    _default_directory(),
+    check_seconds=settings.CATALOG_SNAPSHOT_CHECK_SECONDS,
+    max_age_seconds=settings.CATALOG_SNAPSHOT_MAX_AGE_SECONDS
+)
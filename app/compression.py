@@ -0,0 +1,237 @@
+# app/compression.py
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli не установлен — ответы сжимаются только gzip
+    brotli = None
+
+# Типы содержимого, которые имеет смысл сжимать (изображения и архивы уже сжаты)
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "text/", "image/svg+xml",
+)
+
+
+def available_encodings() -> List[str]:
+    """Поддерживаемые кодировки в порядке предпочтения сервера"""
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding != "br" or brotli is not None]
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Выбрать кодировку по заголовку Accept-Encoding.
+
+    Выбирается кодировка с наибольшим q; при равных q — по порядку available.
+    q=0 запрещает кодировку, "*" относится ко всем не перечисленным явно.
+
+    Args:
+        accept_encoding: Значение заголовка Accept-Encoding
+        available: Кодировки сервера в порядке предпочтения
+
+    Returns:
+        Optional[str]: Кодировка или None (ответ без сжатия)
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Сжать тело ответа целиком"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """Потоковое сжатие ответов StreamingResponse: каждый фрагмент отправляется сразу"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressedVariantCache:
+    """
+    Сжатые варианты ответов по хешу тела (LRU с ограничением по объему).
+
+    Горячие страницы отдают одни и те же байты, поэтому повторное сжатие
+    заменяется хешированием тела (blake2b в десятки раз быстрее сжатия).
+    """
+
+    def __init__(self, max_bytes: int, max_body_size: int):
+        self.max_bytes = max_bytes
+        self.max_body_size = max_body_size
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        """Сжатое тело из кэша или сжатое сейчас (и сохраненное в кэш)"""
+        if len(body) > self.max_body_size or self.max_bytes <= 0:
+            return compress(body, encoding)
+
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compressed
+            self.misses += 1
+
+        compressed = compress(body, encoding)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = compressed
+                self._size += len(compressed)
+                while self._size > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+compressed_variants = CompressedVariantCache(
+    max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    max_body_size=settings.COMPRESSION_CACHE_MAX_BODY_SIZE
+)
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов gzip/br по Accept-Encoding.
+
+    Сжимаются ответы типов COMPRESSIBLE_TYPES не меньше COMPRESSION_MIN_SIZE
+    байт без своего Content-Encoding и Cache-Control: no-transform. Ответ
+    из одного фрагмента сжимается целиком через compressed_variants,
+    потоковый — по фрагментам.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.available = available_encodings()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.available)
+        start_message: Optional[Message] = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, stream, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or "content-encoding" in headers
+                    or "no-transform" in headers.get("cache-control", "")
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message  # Заголовки отправятся вместе с первым фрагментом тела
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                chunk = stream.process(body) if body else b""
+                if not more_body:
+                    chunk += stream.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            if more_body:
+                stream = _StreamCompressor(encoding)
+                del headers["Content-Length"]
+                await send(start_message)
+                await send({"type": "http.response.body", "body": stream.process(body), "more_body": True})
+            else:
+                compressed = compressed_variants.get_or_compress(body, encoding)
+                headers["Content-Length"] = str(len(compressed))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
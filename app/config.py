@@ -14,11 +14,136 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 часа
 
+    # Кэш аутентифицированных пользователей (app/auth/principal_cache.py)
+    AUTH_CACHE_TTL_SECONDS: float = 60.0
+    AUTH_CACHE_MAX_SIZE: int = 10000
+
+    # Хеширование паролей (app/auth/passwords.py)
+    PASSWORD_HASH_ALGORITHM: str = "scrypt"  # scrypt или argon2 (если установлен argon2-cffi)
+    PASSWORD_SCRYPT_N: int = 2 ** 14
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    PASSWORD_HASH_WORKERS: int = 4  # Потоков для хеширования
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 16  # Одновременных проверок, остальные ждут
+
+    # Ограничение попыток входа (token bucket по IP и имени пользователя)
+    LOGIN_THROTTLE_IP_BURST: int = 20
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = 20.0
+    LOGIN_THROTTLE_USERNAME_BURST: int = 5
+    LOGIN_THROTTLE_USERNAME_PER_MINUTE: float = 5.0
+    LOGIN_THROTTLE_TRUST_FORWARDED: bool = False  # True, если приложение за прокси (X-Forwarded-For)
+    LOGIN_THROTTLE_REDIS_URL: str = os.getenv("LOGIN_THROTTLE_REDIS_URL", "")  # Общее хранилище (нужен пакет redis)
+
+    # Авторизация админских маршрутов по подписанным claims (role, ver) без запроса пользователя
+    AUTH_STATELESS_ADMIN: bool = True
+    TOKEN_VERSION_REFRESH_SECONDS: float = 2.0  # Как быстро отзыв токенов доходит до других воркеров
+
     # Настройки приложения
     APP_NAME: str = "Perfume Store API"
     APP_VERSION: str = "1.0.0"
     APP_DESCRIPTION: str = "API для интернет-магазина парфюмерии"
 
+    # Настройки номеров заказов (8 цифр не пересекаются со старыми 6-значными номерами)
+    ORDER_NUMBER_DIGITS: int = 8
+    # Ключ перестановки номеров (app/order_numbers.py): обязателен для PostgreSQL и НИКОГДА не должен
+    # меняться — иначе новые номера совпадут с выданными. Если раньше номера строились от SECRET_KEY,
+    # задайте здесь прежнее значение SECRET_KEY
+    ORDER_NUMBER_KEY: str = os.getenv("ORDER_NUMBER_KEY", "")
+
+    # Настройки ключей идемпотентности (заголовок Idempotency-Key)
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 60 * 60 * 24  # 24 часа
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # Ожидание завершения первого запроса
+    IDEMPOTENCY_LEASE_SECONDS: float = 30.0  # Аренда ключа: после нее повтор занимает ключ упавшего запроса
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 60 * 10
+
+    # Настройки outbox (побочные эффекты заказов: уведомления, письма)
+    OUTBOX_WORKER_ENABLED: bool = True  # False — события обрабатывает scripts/outbox_worker.py
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 2.0
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_LEASE_SECONDS: float = 300.0  # Через сколько зависшее событие снова доступно
+    OUTBOX_MAX_ATTEMPTS: int = 10
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 5.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 60 * 60
+    OUTBOX_RETENTION_HOURS: int = 24 * 7
+    OUTBOX_PURGE_INTERVAL_SECONDS: int = 60 * 10  # Как часто удаляются обработанные события
+    OUTBOX_SINK: str = os.getenv("OUTBOX_SINK", "file")  # file или smtp
+    OUTBOX_SINK_FILE: str = "outbox_messages.log"
+    OUTBOX_SMTP_HOST: str = os.getenv("OUTBOX_SMTP_HOST", "localhost")
+    OUTBOX_SMTP_PORT: int = int(os.getenv("OUTBOX_SMTP_PORT", "1025"))
+    OUTBOX_EMAIL_FROM: str = "shop@dediparfum.ru"
+    OUTBOX_MANAGER_EMAILS: list = []
+
+    # Список пользователей в админке: выше этого количества total_count оценочный
+    USERS_EXACT_COUNT_THRESHOLD: int = 10000
+
+    # Отображение цен по валютам (app/pricing.py); для кодов не из списка
+    # символом служит сам код валюты
+    CURRENCY_FORMATS: dict = {
+        "RUB": {"symbol": "руб.", "decimals": 1},
+        "USD": {"symbol": "$", "decimals": 1},
+        "EUR": {"symbol": "€", "decimals": 1},
+        "KZT": {"symbol": "₸", "decimals": 0},
+    }
+    CURRENCY_DEFAULT_DECIMALS: int = 2
+    CURRENCY_PRICE_TEMPLATE: str = "{amount} {symbol}"
+
+    # Прогрев после запуска (app/warmup.py); до его окончания /health/ready отвечает 503
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 5
+    WARMUP_CATALOG_PAGE_SIZE: int = 50  # Совпадает с per_page по умолчанию в /api/products
+    WARMUP_PATHS: list = [
+        "/api/products?currency={currency}",
+        "/api/products/search?sort_by=price&currency={currency}",
+        "/api/products/filters?currency={currency}",
+        "/api/products/{product_id}?currency={currency}",
+        "/api/admin/currency-rates",
+    ]
+
+    # Общий для воркеров снимок каталога в памяти (app/catalog_snapshot.py)
+    CATALOG_SNAPSHOT_ENABLED: bool = True
+    CATALOG_SNAPSHOT_DIR: str = os.getenv("CATALOG_SNAPSHOT_DIR", "")  # По умолчанию — во временном каталоге
+    CATALOG_SNAPSHOT_CHECK_SECONDS: float = 0.5  # Как часто читатели проверяют версию
+    CATALOG_SNAPSHOT_BUILD_INTERVAL_SECONDS: float = 1.0  # Как часто воркеры опрашивают версию каталога в БД
+    CATALOG_SNAPSHOT_MAX_AGE_SECONDS: float = 300.0  # Снимок пересобирается не реже: изменения в обход версии (SQL вручную)
+
+    # Кэш карточек товаров в памяти процесса (app/product_detail_cache.py): (ID, валюта) → готовый JSON
+    PRODUCT_DETAIL_CACHE_MAX_SIZE: int = 10000
+    PRODUCT_DETAIL_CACHE_TTL_SECONDS: float = 60.0  # Как долго доходят изменения в обход версии каталога (SQL вручную)
+
+    # Сжатие ответов по Accept-Encoding (app/compression.py); br — если установлен пакет brotli
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: list = ["br", "gzip"]  # В порядке предпочтения сервера
+    COMPRESSION_MIN_SIZE: int = 1024  # Меньшие ответы не сжимаются: выигрыш меньше накладных расходов
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 4–5 для динамических ответов; 11 слишком медленно
+    COMPRESSION_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # Сжатые варианты одинаковых ответов
+    COMPRESSION_CACHE_MAX_BODY_SIZE: int = 2 * 1024 * 1024  # Большие ответы (выгрузки) не кэшируются
+
+    # HTTP-кэширование ответов (app/http_cache.py): шаблон маршрута → max_age и stale_while_revalidate в секундах
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_POLICIES: dict = {
+        "/api/products": {"max_age": 30, "stale_while_revalidate": 300},
+        "/api/products/search": {"max_age": 30, "stale_while_revalidate": 300},
+        "/api/products/filters": {"max_age": 300, "stale_while_revalidate": 3600},
+        "/api/products/{product_id}": {"max_age": 60, "stale_while_revalidate": 600},
+    }
+    HTTP_CACHE_NO_STORE_PREFIXES: list = ["/api/admin", "/api/cart", "/api/orders", "/api/auth"]
+    HTTP_CACHE_PURGE_URL: str = os.getenv("HTTP_CACHE_PURGE_URL", "")  # Очистка фронтового кэша по Surrogate-Key
+    HTTP_CACHE_PURGE_METHOD: str = "POST"  # Fastly — POST, Varnish с xkey — обычно PURGE
+    HTTP_CACHE_PURGE_HEADERS: dict = {}  # Например {"Fastly-Key": "..."}
+
+    # Заголовок X-Query-Count с числом SQL-запросов (для scripts/benchmark_http.py)
+    QUERY_COUNT_HEADER: bool = False
+
+    # Резервные копии (app/backup.py, scripts/backup_db.py, scripts/restore_db.py)
+    BACKUP_DIR: str = "backups"
+    BACKUP_JOBS: int = 4  # Параллельных потоков pg_dump и pg_restore
+    BACKUP_COMPRESSION: str = "6"  # pg_dump --compress: уровень gzip или, с PostgreSQL 16, "zstd:3"
+    BACKUP_KEEP_LAST: int = 3  # Последние копии хранятся всегда
+    BACKUP_KEEP_DAILY: int = 7  # Последняя копия каждого из стольких дней
+    BACKUP_KEEP_WEEKLY: int = 4  # Последняя копия каждой из стольких недель
+    BACKUP_PG_BIN_DIR: str = os.getenv("BACKUP_PG_BIN_DIR", "")  # Каталог pg_dump, pg_restore и vacuumdb, если их нет в PATH
+
     # Настройки CORS
     CORS_ORIGINS: list = [
         "https://dediparfum.ru" # Продакшен URL (если есть)
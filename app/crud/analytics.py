@@ -0,0 +1,296 @@
+# app/crud/analytics.py
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy import func, cast, String
+from app.models.analytics import SalesDaily, SalesDailyProduct
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import datetime
+
+
+class OrderStatusChange(NamedTuple):
+    """Смена статуса заказа для пересчета сводок"""
+    order_id: int
+    day: datetime.date
+    total_amount: float
+    old_status: str
+    new_status: str
+
+
+def _status_value(status) -> str:
+    return status.value if hasattr(status, "value") else status
+
+
+def _insert(db: Session):
+    """Конструктор INSERT ... ON CONFLICT для текущей СУБД"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def _apply_deltas(db: Session, model, keys: Tuple[str, ...], deltas: Dict[tuple, Dict[str, float]]) -> None:
+    """
+    Прибавляет приращения к строкам сводки одним INSERT ... ON CONFLICT DO UPDATE.
+
+    Args:
+        db: Сессия базы данных
+        model: Модель сводки
+        keys: Колонки первичного ключа
+        deltas: Ключ строки → приращения счетчиков
+    """
+    rows = []
+    for key, values in deltas.items():
+        if any(values.values()):
+            rows.append({**dict(zip(keys, key)), **values})
+    if not rows:
+        return
+
+    table = model.__table__
+    stmt = _insert(db)(table).values(rows)
+    counters = [name for name in rows[0] if name not in keys]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + stmt.excluded[name] for name in counters}
+    )
+    db.execute(stmt)
+
+
+def record_order_created(db: Session, order: Order, items: Iterable[OrderItem]) -> None:
+    """
+    Учесть новый заказ в сводках (без commit, в транзакции создания заказа).
+
+    Args:
+        db: Сессия базы данных
+        order: Созданный заказ (после flush)
+        items: Товары заказа
+    """
+    day = order.created_at.date()
+    status = _status_value(order.status)
+
+    _apply_deltas(db, SalesDaily, ("day", "status"), {
+        (day, status): {"orders_count": 1, "revenue": float(order.total_amount)}
+    })
+
+    if status == OrderStatus.CANCELLED.value:
+        return
+
+    product_deltas = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    for item in items:
+        delta = product_deltas[(day, item.product_id)]
+        delta["units"] += item.quantity
+        delta["revenue"] += item.quantity * float(item.price)
+    _apply_deltas(db, SalesDailyProduct, ("day", "product_id"), product_deltas)
+
+
+def record_status_changes(db: Session, changes: List[OrderStatusChange]) -> None:
+    """
+    Перенести суммы заказов между статусами в сводках (без commit).
+
+    При отмене заказа его товары вычитаются из сводки по товарам, при
+    возврате из отмены — добавляются обратно.
+
+    Args:
+        db: Сессия базы данных
+        changes: Изменения статусов
+    """
+    status_deltas = defaultdict(lambda: {"orders_count": 0, "revenue": 0.0})
+    product_signs = {}
+    cancelled = OrderStatus.CANCELLED.value
+
+    for change in changes:
+        old_status = _status_value(change.old_status)
+        new_status = _status_value(change.new_status)
+        if old_status == new_status:
+            continue
+
+        amount = float(change.total_amount)
+        status_deltas[(change.day, old_status)]["orders_count"] -= 1
+        status_deltas[(change.day, old_status)]["revenue"] -= amount
+        status_deltas[(change.day, new_status)]["orders_count"] += 1
+        status_deltas[(change.day, new_status)]["revenue"] += amount
+
+        if new_status == cancelled:
+            product_signs[change.order_id] = (change.day, -1)
+        elif old_status == cancelled:
+            product_signs[change.order_id] = (change.day, 1)
+
+    _apply_deltas(db, SalesDaily, ("day", "status"), status_deltas)
+
+    if not product_signs:
+        return
+
+    # Товары всех затронутых заказов одним запросом
+    items = db.query(
+        OrderItem.order_id,
+        OrderItem.product_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.price)
+    ).filter(
+        OrderItem.order_id.in_(list(product_signs))
+    ).group_by(OrderItem.order_id, OrderItem.product_id).all()
+
+    product_deltas = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    for order_id, product_id, units, revenue in items:
+        day, sign = product_signs[order_id]
+        delta = product_deltas[(day, product_id)]
+        delta["units"] += sign * int(units)
+        delta["revenue"] += sign * float(revenue)
+    _apply_deltas(db, SalesDailyProduct, ("day", "product_id"), product_deltas)
+
+
+def record_order_deleted(db: Session, order: Order) -> None:
+    """Исключить удаляемый заказ из сводок (без commit)"""
+    day = order.created_at.date()
+    status = _status_value(order.status)
+
+    _apply_deltas(db, SalesDaily, ("day", "status"), {
+        (day, status): {"orders_count": -1, "revenue": -float(order.total_amount)}
+    })
+
+    if status == OrderStatus.CANCELLED.value:
+        return
+
+    product_deltas = defaultdict(lambda: {"units": 0, "revenue": 0.0})
+    for item in order.items:
+        delta = product_deltas[(day, item.product_id)]
+        delta["units"] -= item.quantity
+        delta["revenue"] -= item.quantity * float(item.price)
+    _apply_deltas(db, SalesDailyProduct, ("day", "product_id"), product_deltas)
+
+
+def rebuild_sales_rollups(db: Session, date_from: datetime.date, date_to: datetime.date) -> Tuple[int, int]:
+    """
+    Перестроить сводки за период из orders и order_items.
+
+    Args:
+        db: Сессия базы данных
+        date_from: Первый день периода
+        date_to: Последний день периода (включительно)
+
+    Returns:
+        Tuple[int, int]: Количество строк сводки по статусам и по товарам
+    """
+    start = datetime.datetime.combine(date_from, datetime.time.min)
+    end = datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min)
+    day = func.date(Order.created_at)
+
+    db.query(SalesDaily).filter(SalesDaily.day.between(date_from, date_to)).delete(synchronize_session=False)
+    db.query(SalesDailyProduct).filter(
+        SalesDailyProduct.day.between(date_from, date_to)
+    ).delete(synchronize_session=False)
+
+    status_select = db.query(
+        day,
+        cast(Order.status, String),
+        func.count(Order.id),
+        func.sum(Order.total_amount)
+    ).filter(
+        Order.created_at >= start,
+        Order.created_at < end
+    ).group_by(day, Order.status)
+    status_rows = db.execute(
+        SalesDaily.__table__.insert().from_select(
+            ["day", "status", "orders_count", "revenue"], status_select.statement
+        )
+    ).rowcount
+
+    product_select = db.query(
+        day,
+        OrderItem.product_id,
+        func.sum(OrderItem.quantity),
+        func.sum(OrderItem.quantity * OrderItem.price)
+    ).join(Order, Order.id == OrderItem.order_id).filter(
+        Order.created_at >= start,
+        Order.created_at < end,
+        Order.status != OrderStatus.CANCELLED
+    ).group_by(day, OrderItem.product_id)
+    product_rows = db.execute(
+        SalesDailyProduct.__table__.insert().from_select(
+            ["day", "product_id", "units", "revenue"], product_select.statement
+        )
+    ).rowcount
+
+    db.commit()
+    return status_rows, product_rows
+
+
+def get_sales_by_day(db: Session, date_from: datetime.date, date_to: datetime.date) -> List[dict]:
+    """
+    Продажи по дням за период из сводки.
+
+    Returns:
+        List[dict]: day, orders_count, revenue (без отмененных), cancelled_count, cancelled_revenue
+    """
+    is_cancelled = SalesDaily.status == OrderStatus.CANCELLED.value
+    rows = db.query(
+        SalesDaily.day,
+        func.sum(SalesDaily.orders_count).filter(~is_cancelled),
+        func.sum(SalesDaily.revenue).filter(~is_cancelled),
+        func.sum(SalesDaily.orders_count).filter(is_cancelled),
+        func.sum(SalesDaily.revenue).filter(is_cancelled)
+    ).filter(
+        SalesDaily.day.between(date_from, date_to)
+    ).group_by(SalesDaily.day).order_by(SalesDaily.day).all()
+
+    return [
+        {
+            "day": day,
+            "orders_count": int(orders_count or 0),
+            "revenue": float(revenue or 0),
+            "cancelled_count": int(cancelled_count or 0),
+            "cancelled_revenue": float(cancelled_revenue or 0)
+        }
+        for day, orders_count, revenue, cancelled_count, cancelled_revenue in rows
+    ]
+
+
+def get_sales_by_status(db: Session, date_from: datetime.date, date_to: datetime.date) -> List[dict]:
+    """Продажи по статусам за период из сводки"""
+    rows = db.query(
+        SalesDaily.status,
+        func.sum(SalesDaily.orders_count),
+        func.sum(SalesDaily.revenue)
+    ).filter(
+        SalesDaily.day.between(date_from, date_to)
+    ).group_by(SalesDaily.status).having(func.sum(SalesDaily.orders_count) != 0).all()
+
+    return [
+        {"status": status, "orders_count": int(orders_count or 0), "revenue": float(revenue or 0)}
+        for status, orders_count, revenue in rows
+    ]
+
+
+def get_sales_by_product(
+        db: Session,
+        date_from: datetime.date,
+        date_to: datetime.date,
+        limit: Optional[int] = 50
+) -> List[dict]:
+    """Самые продаваемые товары за период из сводки (по выручке)"""
+    revenue = func.sum(SalesDailyProduct.revenue)
+    query = db.query(
+        SalesDailyProduct.product_id,
+        Product.name,
+        func.sum(SalesDailyProduct.units),
+        revenue
+    ).outerjoin(
+        Product, Product.id == SalesDailyProduct.product_id
+    ).filter(
+        SalesDailyProduct.day.between(date_from, date_to)
+    ).group_by(
+        SalesDailyProduct.product_id, Product.name
+    ).having(
+        # После отмен в сводке могут оставаться нулевые строки
+        func.sum(SalesDailyProduct.units) != 0
+    ).order_by(revenue.desc())
+
+    if limit:
+        query = query.limit(limit)
+
+    return [
+        {"product_id": product_id, "product_name": name, "units": int(units or 0), "revenue": float(total or 0)}
+        for product_id, name, units, total in query.all()
+    ]
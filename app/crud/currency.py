@@ -1,5 +1,17 @@
 from sqlalchemy.orm import Session
-from app.models.currency import CurrencyRate
+from sqlalchemy import DateTime, Integer, Numeric, and_, column, func, literal, or_, select, true, values
+from app.models.currency import BASE_CURRENCY, CurrencyRate
+from app.models.order import Order
+from app.models.product import Product, ProductPrice
+from app.cache import cache, clear_cache
+from app.catalog_snapshot import bump_catalog_version, catalog_snapshot
+from app.http_cache import currency_key, enqueue_cache_purge
+from app.product_detail_cache import product_detail_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import datetime
+
+# Сколько сумм сопоставляется с курсами за один запрос (convert_amounts_at)
+CONVERT_BATCH_SIZE = 1000
 
 
 def get_active_currency_rate(db: Session, currency_code: str):
@@ -10,10 +22,7 @@ def get_active_currency_rate(db: Session, currency_code: str):
 
 
 def create_currency_rate(db: Session, currency_code: str, rate: float, admin_id: int):
-    # Деактивируем старый курс
-    db.query(CurrencyRate).filter(
-        CurrencyRate.currency_code == currency_code
-    ).update({"is_active": False})
+    currency_code = currency_code.strip().upper()
 
     # Создаем новый
     db_rate = CurrencyRate(
@@ -22,10 +31,235 @@ def create_currency_rate(db: Session, currency_code: str, rate: float, admin_id:
         created_by=admin_id
     )
     db.add(db_rate)
+    db.flush()
+
+    # Деактивируем старый курс: он действовал до начала действия нового
+    db.query(CurrencyRate).filter(
+        CurrencyRate.currency_code == currency_code,
+        CurrencyRate.is_active == True,
+        CurrencyRate.id != db_rate.id
+    ).update({"is_active": False, "valid_to": db_rate.valid_from}, synchronize_session=False)
+
+    # Цены в валюте пересчитываются в той же транзакции, что и курс
+    rebuild_product_prices(db, currency_code=currency_code)
+
+    # Ответы каталога в этой валюте во фронтовом кэше устарели
+    enqueue_cache_purge(db, [currency_key(currency_code)])
+
     db.commit()
     db.refresh(db_rate)
+
+    # Курсы и цены каталога в валютах изменились
+    for prefix in ("get_active_rate_map", "get_all_products", "get_price_range"):
+        clear_cache(prefix)
+    catalog_snapshot.sync_version(db)
+    product_detail_cache.invalidate_currency(currency_code)
     return db_rate
 
 
 def get_all_active_rates(db: Session):
-    return db.query(CurrencyRate).filter(CurrencyRate.is_active == True).all()
\ No newline at end of file
+    return db.query(CurrencyRate).filter(CurrencyRate.is_active == True).all()
+
+
+@cache(ttl_seconds=60)
+def get_active_rate_map(db: Session) -> Dict[str, float]:
+    """
+    Активные курсы всех валют (кэшируется, сбрасывается в create_currency_rate).
+
+    Returns:
+        Dict[str, float]: Код валюты → курс к рублю
+    """
+    return {rate.currency_code: float(rate.rate_to_rub) for rate in get_all_active_rates(db)}
+
+
+def _insert(db: Session):
+    """Конструктор INSERT ... ON CONFLICT для текущей СУБД"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def rebuild_product_prices(
+        db: Session,
+        currency_code: Optional[str] = None,
+        product_ids: Optional[Iterable[int]] = None
+) -> int:
+    """
+    Пересчитать цены товаров в валютах по активным курсам (без commit).
+
+    Один запрос INSERT ... SELECT ... ON CONFLICT DO UPDATE по произведению
+    товаров и активных курсов, без обхода строк в Python. Увеличивает версию
+    каталога, поэтому пересчет из скриптов тоже доходит до снимков каталога.
+
+    Args:
+        db: Сессия базы данных
+        currency_code: Только эта валюта (по умолчанию все с активным курсом)
+        product_ids: Только эти товары (по умолчанию все)
+
+    Returns:
+        int: Количество записанных цен
+    """
+    price = func.round(Product.price_rub / CurrencyRate.rate_to_rub, 4)
+    rows = select(
+        CurrencyRate.currency_code, Product.id, price
+    ).select_from(Product).join(CurrencyRate, true()).where(
+        # Явный WHERE нужен SQLite для разбора INSERT ... SELECT ... ON CONFLICT
+        CurrencyRate.is_active == True
+    )
+    if currency_code is not None:
+        rows = rows.where(CurrencyRate.currency_code == currency_code)
+    if product_ids is not None:
+        rows = rows.where(Product.id.in_(list(product_ids)))
+
+    table = ProductPrice.__table__
+    stmt = _insert(db)(table).from_select(["currency_code", "product_id", "price"], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["currency_code", "product_id"],
+        set_={"price": stmt.excluded.price}
+    )
+    count = db.execute(stmt).rowcount
+    bump_catalog_version(db)
+    return count
+
+
+def _valid_at(moment):
+    """Условие: курс действовал в момент moment (полуинтервал [valid_from, valid_to))"""
+    return and_(
+        CurrencyRate.valid_from <= moment,
+        or_(CurrencyRate.valid_to.is_(None), CurrencyRate.valid_to > moment)
+    )
+
+
+def get_currency_rate_at(db: Session, currency_code: str, at: datetime.datetime) -> Optional[CurrencyRate]:
+    """
+    Курс валюты, действовавший в указанный момент.
+
+    Args:
+        db: Сессия базы данных
+        currency_code: Код валюты
+        at: Момент времени
+
+    Returns:
+        Optional[CurrencyRate]: Курс или None, если курса на этот момент не было
+    """
+    # Тот же полуинтервал, что в convert_amounts_at: закрытый курс без замены не действует
+    return db.query(CurrencyRate).filter(
+        CurrencyRate.currency_code == currency_code,
+        _valid_at(at)
+    ).order_by(CurrencyRate.valid_from.desc(), CurrencyRate.id.desc()).first()
+
+
+def get_currency_rate_history(
+        db: Session,
+        currency_code: str,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None
+) -> List[CurrencyRate]:
+    """
+    Курсы валюты, действовавшие в периоде, по времени начала действия.
+
+    Args:
+        db: Сессия базы данных
+        currency_code: Код валюты
+        date_from: Начало периода
+        date_to: Конец периода (не включительно)
+
+    Returns:
+        List[CurrencyRate]: Курсы с пересекающимся периодом действия
+    """
+    query = db.query(CurrencyRate).filter(CurrencyRate.currency_code == currency_code)
+    if date_to is not None:
+        query = query.filter(CurrencyRate.valid_from < date_to)
+    if date_from is not None:
+        query = query.filter(or_(CurrencyRate.valid_to.is_(None), CurrencyRate.valid_to > date_from))
+    return query.order_by(CurrencyRate.valid_from, CurrencyRate.id).all()
+
+
+def _moments(rows: List[Tuple[int, float, datetime.datetime]]):
+    """Таблица (idx, amount_rub, at) из переданных значений: WITH moments AS (VALUES ...)"""
+    return values(
+        column("idx", Integer), column("amount_rub", Numeric(14, 2)), column("at", DateTime),
+        name="moments"
+    ).data(rows).cte("moments")
+
+
+def convert_amounts_at(
+        db: Session,
+        currency_code: str,
+        items: Sequence[Tuple[float, datetime.datetime]]
+) -> List[Tuple[Optional[float], Optional[float]]]:
+    """
+    Пересчитать суммы в рублях в валюту по курсам на их собственные моменты времени.
+
+    Суммы сопоставляются с историей курсов одним запросом с диапазонным
+    соединением по (currency_code, valid_from, valid_to) на каждые
+    CONVERT_BATCH_SIZE сумм, а не отдельным запросом на каждую сумму.
+
+    Args:
+        db: Сессия базы данных
+        currency_code: Код валюты
+        items: Пары (сумма в рублях, момент времени)
+
+    Returns:
+        List[Tuple[Optional[float], Optional[float]]]: (курс, сумма в валюте) в порядке
+        items; (None, None), если курса на момент не было
+    """
+    if currency_code == BASE_CURRENCY:
+        return [(1.0, float(amount)) for amount, _ in items]
+
+    result: List[Tuple[Optional[float], Optional[float]]] = [(None, None)] * len(items)
+    for start in range(0, len(items), CONVERT_BATCH_SIZE):
+        rows = [
+            (start + offset, amount, at)
+            for offset, (amount, at) in enumerate(items[start:start + CONVERT_BATCH_SIZE])
+        ]
+        moments = _moments(rows)
+        matched = db.execute(
+            select(moments.c.idx, CurrencyRate.rate_to_rub).select_from(moments).join(
+                CurrencyRate,
+                and_(CurrencyRate.currency_code == currency_code, _valid_at(moments.c.at))
+            )
+        ).all()
+        for idx, rate in matched:
+            amount = float(items[idx][0])
+            result[idx] = (float(rate), round(amount / float(rate), 4))
+    return result
+
+
+def convert_order_totals(db: Session, currency_code: str, order_ids: Sequence[int]) -> Dict[int, dict]:
+    """
+    Суммы заказов в валюте по курсу на момент создания каждого заказа.
+
+    Один запрос: заказы соединяются с историей курсов по диапазону действия.
+
+    Args:
+        db: Сессия базы данных
+        currency_code: Код валюты
+        order_ids: ID заказов
+
+    Returns:
+        Dict[int, dict]: ID заказа → total_amount_rub, created_at, rate_to_rub, total_amount
+        (курс и сумма None, если курса на момент заказа не было)
+    """
+    if not order_ids:
+        return {}
+
+    rate = CurrencyRate.rate_to_rub if currency_code != BASE_CURRENCY else literal(1.0)
+    query = db.query(Order.id, Order.total_amount, Order.created_at, rate).filter(Order.id.in_(list(order_ids)))
+    if currency_code != BASE_CURRENCY:
+        query = query.outerjoin(
+            CurrencyRate,
+            and_(CurrencyRate.currency_code == currency_code, _valid_at(Order.created_at))
+        )
+
+    totals = {}
+    for order_id, total_amount, created_at, rate_to_rub in query.all():
+        totals[order_id] = {
+            "total_amount_rub": float(total_amount),
+            "created_at": created_at,
+            "rate_to_rub": float(rate_to_rub) if rate_to_rub is not None else None,
+            "total_amount": round(float(total_amount) / float(rate_to_rub), 4) if rate_to_rub else None
+        }
+    return totals
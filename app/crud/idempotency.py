@@ -0,0 +1,148 @@
+# app/crud/idempotency.py
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models.idempotency import IdempotencyKey
+from typing import Optional, Tuple
+import datetime
+import json
+
+
+def get_idempotency_key(db: Session, scope: str, key: str) -> Optional[IdempotencyKey]:
+    """Получить запись ключа идемпотентности клиента"""
+    return db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).first()
+
+
+class IdempotencyClaimLost(Exception):
+    """Аренда ключа истекла, и ключ занял другой запрос: результат текущего нужно откатить"""
+
+
+def claim_idempotency_key(
+        db: Session,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        lease_seconds: float
+) -> Tuple[Optional[IdempotencyKey], bool]:
+    """
+    Занять ключ идемпотентности для выполнения запроса.
+
+    Вставка защищена первичным ключом (scope, key), поэтому из нескольких
+    одновременных запросов клиента с одним ключом выполнение получает только один. Занятый ключ
+    арендуется на lease_seconds (expires_at): если процесс упал, не завершив
+    запрос, после окончания аренды ключ занимает повторный запрос.
+
+    Args:
+        db: Сессия базы данных
+        scope: Клиент, в пределах которого уникален ключ (idempotency_scope)
+        key: Значение заголовка Idempotency-Key
+        fingerprint: Отпечаток запроса
+        lease_seconds: Время аренды ключа до завершения запроса
+
+    Returns:
+        Tuple[Optional[IdempotencyKey], bool]: Запись (None, если ключ так и не
+            удалось ни занять, ни прочитать) и признак того, что ключ занят этим запросом
+    """
+    for _ in range(2):
+        now = datetime.datetime.utcnow()
+        record = IdempotencyKey(
+            scope=scope,
+            key=key,
+            fingerprint=fingerprint,
+            status=IdempotencyKey.IN_PROGRESS,
+            expires_at=now + datetime.timedelta(seconds=lease_seconds)
+        )
+        db.add(record)
+        try:
+            db.commit()
+            return record, True
+        except IntegrityError:
+            db.rollback()
+
+        existing = get_idempotency_key(db, scope, key)
+        if existing is None:
+            continue
+        if existing.expires_at > now:
+            return existing, False
+
+        # Ключ истек (ответ устарел или аренда брошена упавшим процессом) — занимаем заново.
+        # Условие повторяется в DELETE: ключ, завершенный в этот момент, не удаляется
+        db.expunge(existing)
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    return get_idempotency_key(db, scope, key), False
+
+
+def complete_idempotency_key(
+        db: Session,
+        scope: str,
+        key: str,
+        claimed_until: datetime.datetime,
+        response_code: int,
+        response_body: dict,
+        ttl_seconds: int
+) -> None:
+    """
+    Сохранить ответ для ключа идемпотентности (без commit, в транзакции результата запроса).
+
+    Ответ фиксируется вместе с результатом (например, заказом): либо есть оба,
+    либо нет ни одного, поэтому повтор не выполнит запрос второй раз.
+
+    Args:
+        db: Сессия базы данных
+        scope: Клиент ключа
+        key: Ключ идемпотентности
+        claimed_until: expires_at записи, занятой этим запросом (защита от чужой аренды)
+        response_code: HTTP-код ответа
+        response_body: Тело ответа
+        ttl_seconds: Сколько хранить ответ
+
+    Raises:
+        IdempotencyClaimLost: Если аренда истекла и ключ занят другим запросом
+    """
+    updated = db.query(IdempotencyKey).filter(
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status == IdempotencyKey.IN_PROGRESS,
+        IdempotencyKey.expires_at == claimed_until
+    ).update({
+        "status": IdempotencyKey.COMPLETED,
+        "response_code": response_code,
+        "response_body": json.dumps(response_body, ensure_ascii=False),
+        "expires_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl_seconds)
+    }, synchronize_session=False)
+    if not updated:
+        raise IdempotencyClaimLost(key)
+
+
+def release_idempotency_key(db: Session, scope: str, key: str, claimed_until: datetime.datetime) -> None:
+    """Освободить ключ, если результат запроса не зафиксирован, чтобы повтор выполнился заново"""
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.status == IdempotencyKey.IN_PROGRESS,
+        IdempotencyKey.expires_at == claimed_until
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def delete_expired_idempotency_keys(db: Session) -> int:
+    """
+    Удалить истекшие ключи идемпотентности.
+
+    Args:
+        db: Сессия базы данных
+
+    Returns:
+        int: Количество удаленных ключей
+    """
+    deleted = db.query(IdempotencyKey).filter(
+        IdempotencyKey.expires_at < datetime.datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,18 +1,51 @@
 # app/crud/order.py
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.models.order import Order, OrderItem, OrderStatus
+from sqlalchemy import desc, func, select, update, or_
+from app.models.order import Order, OrderItem, OrderStatus, order_number_seq
 from app.models.product import Product
 from app.models.cart import CartItem
-from typing import List, Optional  # ← добавлено
-import random
-import string
+from app.crud.analytics import OrderStatusChange, record_order_created, record_status_changes, record_order_deleted
+from app.crud.outbox import enqueue_event
+from app.outbox import ORDER_CREATED, ORDER_STATUS_CHANGED
+from app.order_numbers import order_number_generator
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple  # ← добавлено
+import datetime
 
+# Допустимые переходы статусов для массового обновления: целевой статус → исходные
+ALLOWED_STATUS_TRANSITIONS: Dict[OrderStatus, Tuple[OrderStatus, ...]] = {
+    OrderStatus.PROCESSING: (OrderStatus.PENDING,),
+    OrderStatus.SHIPPED: (OrderStatus.PENDING, OrderStatus.PROCESSING),
+    OrderStatus.DELIVERED: (OrderStatus.SHIPPED,),
+    OrderStatus.CANCELLED: (OrderStatus.PENDING, OrderStatus.PROCESSING),
+}
 
+MAX_BULK_ORDERS = 1000
 
-def generate_order_number():
-    """Генерация уникального 6-значного номера заказа"""
-    return ''.join(random.choices(string.digits, k=6))
+
+def next_order_sequence(db: Session) -> int:
+    """
+    Получить следующий порядковый номер заказа.
+
+    В PostgreSQL используется последовательность order_number_seq, которая
+    выдает уникальные значения даже при параллельном оформлении заказов.
+    Для остальных СУБД берется MAX(id) + 1 — только для однопользовательской
+    локальной разработки на SQLite: два одновременных оформления получат
+    один номер, и второе упадет на уникальном индексе order_number.
+
+    Args:
+        db: Сессия базы данных
+
+    Returns:
+        int: Порядковый номер
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return db.execute(select(order_number_seq.next_value())).scalar()
+    return (db.query(func.max(Order.id)).scalar() or 0) + 1
+
+
+def generate_order_number(db: Session) -> str:
+    """Генерация уникального номера заказа без проверки занятости в БД"""
+    return order_number_generator.format(next_order_sequence(db))
 
 
 def create_order(
@@ -22,7 +55,8 @@ def create_order(
         contact_phone: str,
         contact_email: str,
         notes: Optional[str] = None,
-        user_id: Optional[int] = None
+        user_id: Optional[int] = None,
+        commit: bool = True
 ) -> Order:
     """
     Создание нового заказа из товаров в корзине.
@@ -35,6 +69,8 @@ def create_order(
         contact_email: контактный email
         notes: дополнительные примечания
         user_id: ID пользователя (если авторизован)
+        commit: False — не фиксировать транзакцию (вызывающий код дописывает
+            в нее свои изменения, например ответ для ключа идемпотентности)
 
     Returns:
         Order: созданный заказ
@@ -48,10 +84,8 @@ def create_order(
     if not cart_items:
         raise ValueError("Корзина пуста")
 
-    # Генерируем уникальный номер заказа
-    order_number = generate_order_number()
-    while db.query(Order).filter(Order.order_number == order_number).first():
-        order_number = generate_order_number()
+    # Генерируем уникальный номер заказа (уникален по построению)
+    order_number = generate_order_number(db)
 
     # Вычисляем общую сумму заказа
     total_amount = 0
@@ -77,6 +111,7 @@ def create_order(
     db.flush()  # Получаем ID заказа
 
     # Добавляем товары из корзины в заказ
+    order_items = []
     for item in cart_items:
         product = db.query(Product).filter(Product.id == item.product_id).first()
         if product:
@@ -88,42 +123,201 @@ def create_order(
                 comment=item.comment
             )
             db.add(order_item)
+            order_items.append(order_item)
+
+    # Обновляем сводки продаж в той же транзакции
+    record_order_created(db, new_order, order_items)
+
+    # Уведомления обрабатываются фоново (app/outbox.py), здесь только запись события
+    enqueue_event(db, ORDER_CREATED, {
+        "order_id": new_order.id,
+        "order_number": new_order.order_number,
+        "user_id": user_id,
+        "total_amount": total_amount,
+        "customer_name": customer_name,
+        "contact_phone": contact_phone,
+        "contact_email": contact_email,
+        "notes": notes,
+        "items": [
+            {"product_id": item.product_id, "quantity": item.quantity, "price": item.price}
+            for item in order_items
+        ]
+    })
 
     # Очищаем корзину
     db.query(CartItem).filter(CartItem.user_session == user_session).delete()
 
-    db.commit()
+    if commit:
+        db.commit()
+    else:
+        db.flush()
     db.refresh(new_order)
     return new_order
 
 
 
-def get_user_orders(db: Session, user_session: str) -> List[Order]:
+def items_count_column():
     """
-    Получить все заказы пользователя по сессии.
+    Количество товаров в заказе, вычисляемое в SQL.
+
+    Коррелированный подзапрос по индексу ix_order_items_order_id считается
+    только для строк, попавших на страницу, без ленивой загрузки order.items.
+    """
+    return (
+        select(func.coalesce(func.sum(OrderItem.quantity), 0))
+        .where(OrderItem.order_id == Order.id)
+        .correlate(Order)
+        .scalar_subquery()
+        .label("items_count")
+    )
+
+
+def get_user_orders_page(
+        db: Session,
+        user_id: Optional[int] = None,
+        user_session: Optional[str] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+        skip: int = 0,
+        limit: int = 10
+) -> Tuple[List[Tuple[Order, int]], int]:
+    """
+    Получить страницу заказов пользователя вместе с количеством товаров.
+
+    Фильтр по дате, пагинация, общее количество и сумма товаров считаются
+    в базе данных одним запросом по индексам (user_id, created_at) и
+    (user_session, created_at).
 
     Args:
         db: Сессия базы данных
-        user_session: Идентификатор сессии пользователя
+        user_id: ID пользователя (если авторизован)
+        user_session: Идентификатор сессии пользователя (если не авторизован)
+        date_from: Начало периода (включительно)
+        date_to: Конец периода (не включительно)
+        skip: Сколько записей пропустить
+        limit: Максимальное количество записей
 
     Returns:
-        List[Order]: Список заказов пользователя
+        Tuple[List[Tuple[Order, int]], int]: Пары (заказ, количество товаров) и общее количество заказов
     """
-    return db.query(Order).filter(Order.user_session == user_session).order_by(desc(Order.created_at)).all()
+    query = db.query(Order, items_count_column(), func.count().over().label("total_count"))
+
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    else:
+        query = query.filter(Order.user_session == user_session)
+
+    return _orders_page(query, date_from, date_to, skip, limit)
+
+
+def get_orders_admin_page(
+        db: Session,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+        skip: int = 0,
+        limit: int = 20
+) -> Tuple[List[Tuple[Order, int]], int]:
+    """
+    Получить страницу всех заказов для администратора одним запросом.
+
+    Количество товаров и общее количество заказов считаются в том же запросе,
+    фильтр по статусу и дате использует индекс (status, created_at).
+
+    Args:
+        db: Сессия базы данных
+        status: Статус для фильтрации (опционально)
+        date_from: Начало периода (включительно)
+        date_to: Конец периода (не включительно)
+        skip: Сколько записей пропустить
+        limit: Максимальное количество записей
+
+    Returns:
+        Tuple[List[Tuple[Order, int]], int]: Пары (заказ, количество товаров) и общее количество заказов
+    """
+    query = db.query(Order, items_count_column(), func.count().over().label("total_count"))
+
+    if status:
+        query = query.filter(Order.status == status)
+
+    return _orders_page(query, date_from, date_to, skip, limit)
+
+
+def _orders_page(query, date_from, date_to, skip: int, limit: int) -> Tuple[List[Tuple[Order, int]], int]:
+    """Применяет фильтр по дате и пагинацию к запросу (Order, items_count, total_count)"""
+    if date_from is not None:
+        query = query.filter(Order.created_at >= date_from)
+    if date_to is not None:
+        query = query.filter(Order.created_at < date_to)
+
+    rows = query.order_by(desc(Order.created_at)).offset(skip).limit(limit).all()
+
+    if rows:
+        total_count = rows[0].total_count
+    elif skip:
+        # Страница за пределами списка — общее количество считаем отдельно
+        total_count = query.with_entities(func.count(Order.id)).order_by(None).scalar()
+    else:
+        total_count = 0
 
+    return [(row.Order, row.items_count) for row in rows], total_count
 
-def get_user_orders_by_id(db: Session, user_id: int) -> List[Order]:
+
+def iter_order_export_rows(
+        db: Session,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+        batch_size: int = 1000
+) -> Iterator:
     """
-    Получить все заказы пользователя по ID.
+    Построчно прочитать заказы с товарами и названиями товаров для выгрузки.
+
+    Один упорядоченный запрос orders ⟕ order_items ⟕ products читается через
+    серверный курсор пачками по batch_size строк, поэтому память не зависит
+    от размера выгрузки. Строки одного заказа идут подряд.
 
     Args:
         db: Сессия базы данных
-        user_id: ID пользователя
+        status: Статус для фильтрации (опционально)
+        date_from: Начало периода (включительно)
+        date_to: Конец периода (не включительно)
+        batch_size: Размер пачки курсора
 
     Returns:
-        List[Order]: Список заказов пользователя
+        Iterator: Строки с колонками заказа и товара (item_id равен None у заказов без товаров)
     """
-    return db.query(Order).filter(Order.user_id == user_id).order_by(desc(Order.created_at)).all()
+    query = select(
+        Order.id,
+        Order.order_number,
+        Order.created_at,
+        Order.status,
+        Order.customer_name,
+        Order.contact_phone,
+        Order.contact_email,
+        Order.total_amount,
+        Order.notes,
+        OrderItem.id.label("item_id"),
+        OrderItem.product_id,
+        Product.name.label("product_name"),
+        OrderItem.quantity,
+        OrderItem.price,
+        OrderItem.comment
+    ).outerjoin(
+        OrderItem, OrderItem.order_id == Order.id
+    ).outerjoin(
+        Product, Product.id == OrderItem.product_id
+    )
+
+    if status:
+        query = query.where(Order.status == status)
+    if date_from is not None:
+        query = query.where(Order.created_at >= date_from)
+    if date_to is not None:
+        query = query.where(Order.created_at < date_to)
+
+    query = query.order_by(Order.created_at, Order.id, OrderItem.id)
+    return db.execute(query.execution_options(stream_results=True, yield_per=batch_size))
 
 
 def get_order_by_number(db: Session, order_number: str, user_session: str = None, user_id: int = None) -> Optional[Order]:
@@ -176,83 +370,169 @@ def update_order_status(db: Session, order_id: int, status: OrderStatus) -> Opti
     Returns:
         Optional[Order]: Обновленный заказ или None, если заказ не найден
     """
-    order = get_order_by_id(db, order_id)
+    # Блокировка строки: параллельная смена статуса ждет, иначе обе применят
+    # к сводкам продаж разницу от одного и того же старого статуса
+    order = db.query(Order).filter(Order.id == order_id).populate_existing().with_for_update().first()
     if not order:
         return None
 
+    old_status = order.status
     order.status = status
+    record_status_changes(db, [
+        OrderStatusChange(order.id, order.created_at.date(), order.total_amount, old_status, status)
+    ])
+    enqueue_event(db, ORDER_STATUS_CHANGED, _status_changed_payload(order, old_status, status))
     db.commit()
     db.refresh(order)
     return order
 
 
-def get_order_items(db: Session, order_id: int) -> List[OrderItem]:
-    """
-    Получить все товары в заказе.
+def _status_changed_payload(order, old_status, new_status) -> dict:
+    """Данные события смены статуса для outbox"""
+    return {
+        "order_id": order.id,
+        "order_number": order.order_number,
+        "customer_name": order.customer_name,
+        "contact_email": order.contact_email,
+        "old_status": OrderStatus(old_status).value,
+        "new_status": OrderStatus(new_status).value
+    }
 
-    Args:
-        db: Сессия базы данных
-        order_id: ID заказа
-
-    Returns:
-        List[OrderItem]: Список товаров в заказе
-    """
-    return db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
-
-
-def get_order_items_count(db: Session, order_id: int) -> int:
-    """
-    Получить количество товаров в заказе.
 
-    Args:
-        db: Сессия базы данных
-        order_id: ID заказа
-
-    Returns:
-        int: Количество товаров в заказе
+def bulk_update_order_status(
+        db: Session,
+        status: OrderStatus,
+        order_ids: Sequence[int] = (),
+        order_numbers: Sequence[str] = ()
+) -> List[dict]:
     """
-    items = get_order_items(db, order_id)
-    return sum(item.quantity for item in items)
-
+    Массово обновить статус заказов одним UPDATE.
 
-def get_all_orders(db: Session, skip: int = 0, limit: int = 100, status: Optional[OrderStatus] = None) -> List[Order]:
-    """
-    Получить все заказы с возможностью фильтрации по статусу.
+    Допустимость перехода проверяется в самом запросе: обновляются только
+    заказы, текущий статус которых входит в ALLOWED_STATUS_TRANSITIONS для
+    целевого статуса. В PostgreSQL старые статусы берутся из заблокированного
+    подзапроса (UPDATE ... FROM ... RETURNING), поэтому сводки продаж и события
+    outbox пишутся в той же транзакции без повторного чтения заказов.
 
     Args:
         db: Сессия базы данных
-        skip: Сколько записей пропустить
-        limit: Максимальное количество записей
-        status: Статус для фильтрации (опционально)
+        status: Целевой статус
+        order_ids: ID заказов
+        order_numbers: Номера заказов
 
     Returns:
-        List[Order]: Список заказов
+        List[dict]: Результат по каждому запрошенному заказу в порядке запроса:
+            order_id, order_number, old_status, status и result
+            (updated, unchanged, invalid_transition или not_found)
     """
-    query = db.query(Order)
+    status = OrderStatus(status)
+    order_ids = list(dict.fromkeys(order_ids))
+    order_numbers = list(dict.fromkeys(order_numbers))
+    if not order_ids and not order_numbers:
+        return []
+
+    requested = or_(Order.id.in_(order_ids), Order.order_number.in_(order_numbers))
+    previous = select(Order.id, Order.status.label("old_status")).where(
+        requested,
+        Order.status.in_(ALLOWED_STATUS_TRANSITIONS.get(status, ()))
+    ).with_for_update().subquery()
+
+    returning = (
+        Order.id,
+        Order.order_number,
+        previous.c.old_status,
+        Order.created_at,
+        Order.total_amount,
+        Order.customer_name,
+        Order.contact_email
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        updated_rows = db.execute(
+            update(Order)
+            .where(Order.id == previous.c.id)
+            .values(status=status)
+            .returning(*returning)
+            .execution_options(synchronize_session=False)
+        ).all()
+    else:
+        # SQLite не умеет возвращать колонки из FROM в RETURNING: читаем старые
+        # статусы тем же подзапросом, затем обновляем найденные заказы
+        updated_rows = db.execute(select(*returning).join(previous, Order.id == previous.c.id)).all()
+        if updated_rows:
+            db.execute(
+                update(Order)
+                .where(Order.id.in_([row.id for row in updated_rows]))
+                .values(status=status)
+                .execution_options(synchronize_session=False)
+            )
 
-    if status:
-        query = query.filter(Order.status == status)
+    if updated_rows:
+        record_status_changes(db, [
+            OrderStatusChange(row.id, row.created_at.date(), row.total_amount, row.old_status, status)
+            for row in updated_rows
+        ])
+        for row in updated_rows:
+            enqueue_event(db, ORDER_STATUS_CHANGED, _status_changed_payload(row, row.old_status, status))
+    db.commit()
 
-    return query.order_by(desc(Order.created_at)).offset(skip).limit(limit).all()
+    # Статусы остальных запрошенных заказов — для объяснения, почему они не обновлены
+    updated = {row.id: row for row in updated_rows}
+    others = {
+        row.id: row for row in db.query(Order.id, Order.order_number, Order.status).filter(
+            requested, Order.id.notin_(list(updated))
+        )
+    }
+    by_number = {row.order_number: row for row in list(updated.values()) + list(others.values())}
+
+    results = [
+        _bulk_status_result(updated.get(order_id) or others.get(order_id), status, updated, order_id=order_id)
+        for order_id in order_ids
+    ]
+    results += [
+        _bulk_status_result(by_number.get(number), status, updated, order_number=number)
+        for number in order_numbers
+    ]
+    return results
+
+
+def _bulk_status_result(row, status: OrderStatus, updated: dict, order_id: int = None, order_number: str = None) -> dict:
+    """Результат массового обновления для одного запрошенного заказа"""
+    if row is None:
+        return {
+            "order_id": order_id,
+            "order_number": order_number,
+            "old_status": None,
+            "status": None,
+            "result": "not_found"
+        }
+
+    if row.id in updated:
+        old_status, new_status, result = OrderStatus(row.old_status), status, "updated"
+    else:
+        old_status = new_status = OrderStatus(row.status)
+        result = "unchanged" if old_status == status else "invalid_transition"
+
+    return {
+        "order_id": row.id,
+        "order_number": row.order_number,
+        "old_status": old_status.value,
+        "status": new_status.value,
+        "result": result
+    }
 
 
-def count_orders(db: Session, status: Optional[OrderStatus] = None) -> int:
+def get_order_items(db: Session, order_id: int) -> List[OrderItem]:
     """
-    Получить общее количество заказов с возможностью фильтрации по статусу.
+    Получить все товары в заказе.
 
     Args:
         db: Сессия базы данных
-        status: Статус для фильтрации (опционально)
+        order_id: ID заказа
 
     Returns:
-        int: Количество заказов
+        List[OrderItem]: Список товаров в заказе
     """
-    query = db.query(Order)
-
-    if status:
-        query = query.filter(Order.status == status)
-
-    return query.count()
+    return db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
 
 
 def delete_order(db: Session, order_id: int) -> bool:
@@ -270,6 +550,7 @@ def delete_order(db: Session, order_id: int) -> bool:
     if not order:
         return False
 
+    record_order_deleted(db, order)
     db.delete(order)
     db.commit()
     return True
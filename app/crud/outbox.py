@@ -0,0 +1,104 @@
+# app/crud/outbox.py
+from sqlalchemy.orm import Session
+from app.models.outbox import OutboxEvent
+from typing import List
+import datetime
+import json
+
+
+def enqueue_event(db: Session, event_type: str, payload: dict) -> OutboxEvent:
+    """
+    Добавить событие в outbox (без commit, в транзакции вызывающего кода).
+
+    Args:
+        db: Сессия базы данных
+        event_type: Тип события
+        payload: Данные события (сериализуются в JSON)
+
+    Returns:
+        OutboxEvent: Добавленное событие
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        payload=json.dumps(payload, ensure_ascii=False, default=str),
+        status=OutboxEvent.PENDING,
+        attempts=0,
+        available_at=datetime.datetime.utcnow()
+    )
+    db.add(event)
+    return event
+
+
+def claim_outbox_events(db: Session, batch_size: int, lease_seconds: float) -> List[OutboxEvent]:
+    """
+    Занять пачку готовых к обработке событий.
+
+    Событиям увеличивается счетчик попыток, а available_at сдвигается на
+    время аренды: если обработчик упадет, не отметив событие, оно снова
+    станет доступным после истечения аренды. В PostgreSQL строки выбираются
+    с FOR UPDATE SKIP LOCKED, поэтому несколько обработчиков не берут одни
+    и те же события.
+
+    Args:
+        db: Сессия базы данных
+        batch_size: Максимальный размер пачки
+        lease_seconds: Время аренды событий в секундах
+
+    Returns:
+        List[OutboxEvent]: Занятые события
+    """
+    now = datetime.datetime.utcnow()
+    events = db.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxEvent.PENDING,
+        OutboxEvent.available_at <= now
+    ).order_by(OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    for event in events:
+        event.attempts += 1
+        event.available_at = now + datetime.timedelta(seconds=lease_seconds)
+    db.commit()
+    return events
+
+
+def mark_outbox_event_done(db: Session, event: OutboxEvent) -> None:
+    """Отметить событие обработанным (без commit)"""
+    event.status = OutboxEvent.DONE
+    event.processed_at = datetime.datetime.utcnow()
+    event.last_error = None
+
+
+def mark_outbox_event_failed(db: Session, event: OutboxEvent, error: str, retry_in_seconds: float = None) -> None:
+    """
+    Запланировать повтор события или отметить его окончательно неудачным (без commit).
+
+    Args:
+        db: Сессия базы данных
+        event: Событие
+        error: Текст ошибки
+        retry_in_seconds: Задержка до повтора; None — попытки исчерпаны
+    """
+    event.last_error = error
+    if retry_in_seconds is None:
+        event.status = OutboxEvent.FAILED
+        event.processed_at = datetime.datetime.utcnow()
+    else:
+        event.available_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=retry_in_seconds)
+
+
+def delete_processed_outbox_events(db: Session, older_than: datetime.datetime) -> int:
+    """
+    Удалить обработанные события старше указанного времени.
+
+    Args:
+        db: Сессия базы данных
+        older_than: Граница времени обработки
+
+    Returns:
+        int: Количество удаленных событий
+    """
+    deleted = db.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxEvent.DONE,
+        OutboxEvent.processed_at < older_than
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -1,28 +1,103 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from app.models.product import Product
-from app.models.currency import CurrencyRate
-from typing import List, Optional
-from app.cache import cache
+from sqlalchemy import and_, desc, func
+from app.models.product import Product, ProductPrice
+from app.crud.currency import get_active_rate_map, rebuild_product_prices
+from app.pricing import BASE_CURRENCY, currency_symbol, format_price
+from app.schemas.product import ProductDetail
+from typing import List, Optional, Tuple
+from app.cache import cache, clear_cache
+from app.catalog_snapshot import CatalogProduct, bump_catalog_version, catalog_snapshot
+from app.product_detail_cache import RenderedDetail, product_detail_cache
+from app.http_cache import PRODUCT_FILTERS_KEY, PRODUCT_LIST_KEY, enqueue_cache_purge, product_keys
+
+# Кэшируемые функции каталога: сбрасываются при изменении товаров и курсов
+CATALOG_CACHE_PREFIXES = ("get_all_products", "count_products", "get_unique_brands", "get_price_range")
+
+
+def clear_catalog_cache(db: Session) -> None:
+    """
+    Сбросить кэш списка товаров и фильтров после commit изменения каталога.
+
+    Версия каталога уже увеличена в транзакции изменения (bump_catalog_version);
+    этот воркер перечитывает ее сразу, остальные — при опросе.
+    """
+    for prefix in CATALOG_CACHE_PREFIXES:
+        clear_cache(prefix)
+    catalog_snapshot.sync_version(db)
 
 
-@cache(ttl_seconds=60 * 5)  # Кэшируем на 5 минут
-def get_all_products(db: Session, skip: int = 0, limit: int = 100) -> List[Product]:
+def _price_column(currency: str):
+    """Колонка цены в валюте: products.price_rub или product_prices.price"""
+    return Product.price_rub if currency == BASE_CURRENCY else ProductPrice.price
+
+
+def _priced_query(db: Session, currency: str, *entities):
+    """
+    Запрос товаров вместе с ценой в валюте.
+
+    Для валюты, отличной от рубля, присоединяются материализованные цены
+    (product_prices), поэтому фильтр и сортировка по цене идут по индексу
+    (currency_code, price), а не пересчитываются для каждой строки.
+    """
+    price = _price_column(currency)
+    query = db.query(*(entities or (Product, price)))
+    if currency != BASE_CURRENCY:
+        query = query.join(ProductPrice, and_(
+            ProductPrice.product_id == Product.id,
+            ProductPrice.currency_code == currency
+        ))
+    return query
+
+
+def get_all_products(db: Session, skip: int = 0, limit: int = 100, currency: str = BASE_CURRENCY) -> List[Tuple[CatalogProduct, float]]:
     """
     Получить все товары с пагинацией.
 
+    Читается из общего снимка каталога (app/catalog_snapshot.py), если он
+    актуален, иначе из БД через кэш процесса.
+
     Args:
         db: Сессия базы данных
         skip: Сколько записей пропустить
         limit: Максимальное количество записей
+        currency: Валюта цены
 
     Returns:
-        List[Product]: Список товаров
+        List[Tuple[CatalogProduct, float]]: Неизменяемые записи товаров с ценой в валюте
     """
-    return db.query(Product).offset(skip).limit(limit).all()
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None and snapshot.has_currency(currency):
+        return snapshot.products_page(skip, limit, currency)
+    return get_all_products_from_db(db, skip=skip, limit=limit, currency=currency)
+
+
+@cache(ttl_seconds=60 * 5)  # Кэшируем на 5 минут
+def get_all_products_from_db(db: Session, skip: int = 0, limit: int = 100, currency: str = BASE_CURRENCY) -> List[Tuple[CatalogProduct, float]]:
+    """
+    Страница товаров с ценой в валюте из БД (см. get_all_products).
+
+    Результат общий для всех запросов и потоков, поэтому кэшируются не объекты
+    Product (привязаны к сессии загрузившего запроса), а неизменяемые CatalogProduct.
+    """
+    rows = _priced_query(db, currency).order_by(Product.id).offset(skip).limit(limit).all()
+    return [
+        (
+            CatalogProduct(
+                id=product.id,
+                name=product.name,
+                price_rub=float(product.price_rub),
+                brand=product.brand,
+                volume=product.volume,
+                description=product.description,
+                created_at=product.created_at,
+                updated_at=product.updated_at
+            ),
+            float(price)
+        )
+        for product, price in rows
+    ]
 
 
-@cache(ttl_seconds=60 * 5)
 def count_products(db: Session) -> int:
     """
     Получить общее количество товаров.
@@ -33,6 +108,15 @@ def count_products(db: Session) -> int:
     Returns:
         int: Количество товаров
     """
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        return snapshot.count
+    return count_products_from_db(db)
+
+
+@cache(ttl_seconds=60 * 5)
+def count_products_from_db(db: Session) -> int:
+    """Количество товаров из БД"""
     return db.query(Product).count()
 
 
@@ -50,6 +134,61 @@ def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
     return db.query(Product).filter(Product.id == product_id).first()
 
 
+def render_product_detail(db: Session, product: Product, currency: str = BASE_CURRENCY) -> RenderedDetail:
+    """
+    Карточка товара в валюте в виде готового JSON для ответа и кэша карточек.
+
+    Args:
+        db: Сессия базы данных
+        product: Товар
+        currency: Код валюты с активным курсом
+
+    Returns:
+        RenderedDetail: Тело ответа GET /api/products/{product_id}
+
+    Raises:
+        ValueError: Если валюта не поддерживается
+    """
+    price = convert_price(db, float(product.price_rub), currency)
+    detail = ProductDetail(
+        id=product.id,
+        name=product.name,
+        price=price,
+        price_formatted=format_price(price, currency),
+        currency=currency_symbol(currency),
+        description=product.description,
+        brand=product.brand,
+        volume=product.volume,
+        created_at=product.created_at,
+        updated_at=product.updated_at
+    )
+    return RenderedDetail(
+        product_id=product.id,
+        currency=currency,
+        brand=product.brand,
+        body=detail.model_dump_json().encode()
+    )
+
+
+def load_product_detail(db: Session, product_id: int, currency: str = BASE_CURRENCY) -> Optional[RenderedDetail]:
+    """
+    Карточка товара из БД для кэша карточек (product_detail_cache.get_or_load).
+
+    Args:
+        db: Сессия базы данных
+        product_id: ID товара
+        currency: Код валюты в верхнем регистре (resolve_currency)
+
+    Returns:
+        Optional[RenderedDetail]: Карточка или None, если товар не найден
+
+    Raises:
+        ValueError: Если валюта не поддерживается
+    """
+    product = get_product_by_id(db, product_id)
+    return render_product_detail(db, product, currency) if product is not None else None
+
+
 def create_product(
         db: Session,
         name: str,
@@ -80,8 +219,13 @@ def create_product(
         volume=volume
     )
     db.add(db_product)
+    db.flush()
+    rebuild_product_prices(db, product_ids=[db_product.id])
+    enqueue_cache_purge(db, [PRODUCT_LIST_KEY, PRODUCT_FILTERS_KEY])
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_product)
+    clear_catalog_cache(db)
     return db_product
 
 
@@ -113,6 +257,9 @@ def update_product(
     if not product:
         return None
 
+    # Ключи до изменения: при смене бренда очищаются ответы и старого бренда
+    purge_keys = product_keys(product)
+
     if name is not None:
         product.name = name
     if price_rub is not None:
@@ -124,8 +271,18 @@ def update_product(
     if volume is not None:
         product.volume = volume
 
+    if price_rub is not None:
+        db.flush()
+        rebuild_product_prices(db, product_ids=[product.id])
+
+    enqueue_cache_purge(db, purge_keys + product_keys(product))
+    bump_catalog_version(db)
     db.commit()
     db.refresh(product)
+    clear_catalog_cache(db)
+    # Карточки в валютах пересчитываются при следующем запросе, рублевая записывается сразу
+    product_detail_cache.invalidate_product(product.id)
+    product_detail_cache.put(render_product_detail(db, product))
     return product
 
 
@@ -144,19 +301,25 @@ def delete_product(db: Session, product_id: int) -> bool:
     if not product:
         return False
 
+    # ON DELETE CASCADE не срабатывает в SQLite без PRAGMA foreign_keys
+    db.query(ProductPrice).filter(ProductPrice.product_id == product_id).delete(synchronize_session=False)
+    enqueue_cache_purge(db, product_keys(product))
     db.delete(product)
+    bump_catalog_version(db)
     db.commit()
+    clear_catalog_cache(db)
+    product_detail_cache.invalidate_product(product_id)
     return True
 
 
-def convert_price(db: Session, price_rub: float, currency: str = "RUB") -> float:
+def convert_price(db: Session, price_rub: float, currency: str = BASE_CURRENCY) -> float:
     """
     Конвертировать цену в указанную валюту.
 
     Args:
         db: Сессия базы данных
         price_rub: Цена в рублях
-        currency: Валюта для конвертации (RUB или USD)
+        currency: Код валюты с активным курсом в currency_rates
 
     Returns:
         float: Цена в указанной валюте
@@ -164,18 +327,13 @@ def convert_price(db: Session, price_rub: float, currency: str = "RUB") -> float
     Raises:
         ValueError: Если валюта не поддерживается
     """
-    if currency == "RUB":
+    if currency == BASE_CURRENCY:
         return price_rub
-    elif currency == "USD":
-        # Получаем курс доллара
-        rate = db.query(CurrencyRate).filter(CurrencyRate.code == "USD").first()
-        if rate:
-            return price_rub / float(rate.rate)
-        else:
-            # Если курс не найден, используем фиксированный курс
-            return price_rub / 75.0
-    else:
+
+    rate = get_active_rate_map(db).get(currency)
+    if rate is None:
         raise ValueError(f"Неподдерживаемая валюта: {currency}")
+    return round(price_rub / rate, 4)
 
 
 def search_products(
@@ -187,8 +345,9 @@ def search_products(
         sort_by: str = "name",
         sort_dir: str = "asc",
         skip: int = 0,
-        limit: int = 50
-) -> List[Product]:
+        limit: int = 50,
+        currency: str = BASE_CURRENCY
+) -> List[Tuple[Product, float]]:
     """
     Расширенный поиск товаров с фильтрацией и сортировкой.
 
@@ -196,17 +355,19 @@ def search_products(
         db: Сессия базы данных
         title: Фильтр по названию (частичное совпадение)
         brand: Фильтр по бренду (частичное совпадение)
-        min_price: Минимальная цена
-        max_price: Максимальная цена
+        min_price: Минимальная цена (в валюте currency)
+        max_price: Максимальная цена (в валюте currency)
         sort_by: Поле для сортировки (name, price, date)
         sort_dir: Направление сортировки (asc, desc)
         skip: Сколько записей пропустить
         limit: Максимальное количество записей
+        currency: Валюта цены, фильтра и сортировки
 
     Returns:
-        List[Product]: Список товаров, соответствующих критериям
+        List[Tuple[Product, float]]: Товары, соответствующие критериям, с ценой в валюте
     """
-    query = db.query(Product)
+    price = _price_column(currency)
+    query = _priced_query(db, currency)
 
     # Применяем фильтры
     if title:
@@ -214,9 +375,9 @@ def search_products(
     if brand:
         query = query.filter(Product.brand.ilike(f"%{brand}%"))
     if min_price is not None:
-        query = query.filter(Product.price_rub >= min_price)
+        query = query.filter(price >= min_price)
     if max_price is not None:
-        query = query.filter(Product.price_rub <= max_price)
+        query = query.filter(price <= max_price)
 
     # Применяем сортировку
     if sort_by == "name":
@@ -226,9 +387,9 @@ def search_products(
             query = query.order_by(desc(Product.name))
     elif sort_by == "price":
         if sort_dir == "asc":
-            query = query.order_by(Product.price_rub)
+            query = query.order_by(price)
         else:
-            query = query.order_by(desc(Product.price_rub))
+            query = query.order_by(desc(price))
     elif sort_by == "date":
         if sort_dir == "asc":
             query = query.order_by(Product.created_at)
@@ -244,7 +405,8 @@ def count_search_results(
         title: Optional[str] = None,
         brand: Optional[str] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
+        max_price: Optional[float] = None,
+        currency: str = BASE_CURRENCY
 ) -> int:
     """
     Подсчет количества товаров, соответствующих критериям поиска.
@@ -255,11 +417,13 @@ def count_search_results(
         brand: Фильтр по бренду (частичное совпадение)
         min_price: Минимальная цена
         max_price: Максимальная цена
+        currency: Валюта фильтра по цене
 
     Returns:
         int: Количество товаров
     """
-    query = db.query(Product)
+    price = _price_column(currency)
+    query = _priced_query(db, currency, Product.id)
 
     # Применяем фильтры
     if title:
@@ -267,9 +431,9 @@ def count_search_results(
     if brand:
         query = query.filter(Product.brand.ilike(f"%{brand}%"))
     if min_price is not None:
-        query = query.filter(Product.price_rub >= min_price)
+        query = query.filter(price >= min_price)
     if max_price is not None:
-        query = query.filter(Product.price_rub <= max_price)
+        query = query.filter(price <= max_price)
 
     return query.count()
 
@@ -284,20 +448,42 @@ def get_unique_brands(db: Session) -> List[str]:
     Returns:
         List[str]: Список уникальных брендов
     """
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None:
+        return snapshot.brands
+    return get_unique_brands_from_db(db)
+
+
+@cache(ttl_seconds=60 * 5)
+def get_unique_brands_from_db(db: Session) -> List[str]:
+    """Уникальные бренды из БД"""
     brands = db.query(Product.brand).filter(Product.brand != None).distinct().all()
     return [brand[0] for brand in brands if brand[0]]
 
 
-def get_price_range(db: Session) -> tuple:
+def get_price_range(db: Session, currency: str = BASE_CURRENCY) -> tuple:
     """
     Получить минимальную и максимальную цену товаров.
 
     Args:
         db: Сессия базы данных
+        currency: Валюта цены
 
     Returns:
         tuple: (min_price, max_price)
     """
-    min_price = db.query(func.min(Product.price_rub)).scalar() or 0
-    max_price = db.query(func.max(Product.price_rub)).scalar() or 0
-    return (min_price, max_price)
\ No newline at end of file
+    snapshot = catalog_snapshot.current()
+    if snapshot is not None and currency in snapshot.price_ranges:
+        return snapshot.price_ranges[currency]
+    return get_price_range_from_db(db, currency=currency)
+
+
+@cache(ttl_seconds=60 * 5)
+def get_price_range_from_db(db: Session, currency: str = BASE_CURRENCY) -> tuple:
+    """Минимальная и максимальная цена в валюте из БД"""
+    price = _price_column(currency)
+    query = db.query(func.min(price), func.max(price))
+    if currency != BASE_CURRENCY:
+        query = query.filter(ProductPrice.currency_code == currency)
+    min_price, max_price = query.one()
+    return (min_price or 0, max_price or 0)
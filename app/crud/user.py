@@ -1,7 +1,12 @@
 # app/crud/user.py
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 from app.models.user import User, UserRole
-from typing import Optional, List
+from app.database import estimated_row_count
+from app.auth.principal_cache import principal_cache
+from app.auth.token_versions import token_versions
+from app.auth.passwords import password_hashing
+from typing import Optional, List, Tuple
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -24,6 +29,110 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _users_query(
+        db: Session,
+        search: Optional[str] = None,
+        search_mode: str = "prefix",
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None
+):
+    """
+    Запрос пользователей с фильтрами.
+
+    Поиск идет по lower(email), lower(username) и lower(full_name): в PostgreSQL
+    для них есть триграммные GIN-индексы (ревизия 9b4e6f1d2c78), которые
+    обслуживают и поиск по началу строки, и поиск подстроки. Без pg_trgm
+    создаются B-tree индексы, ускоряющие только поиск по началу строки.
+    """
+    query = db.query(User)
+
+    if search:
+        pattern = _escape_like(search.strip())
+        # Приводим к нижнему регистру в БД, чтобы правила совпадали с lower(колонка) в индексах
+        pattern = func.lower(f"{pattern}%" if search_mode == "prefix" else f"%{pattern}%")
+        query = query.filter(
+            func.lower(User.email).like(pattern, escape="\\")
+            | func.lower(User.username).like(pattern, escape="\\")
+            | func.lower(User.full_name).like(pattern, escape="\\")
+        )
+    if role is not None:
+        query = query.filter(User.role == role)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+
+    return query
+
+
+def get_users_page(
+        db: Session,
+        search: Optional[str] = None,
+        search_mode: str = "prefix",
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None,
+        after_id: Optional[int] = None,
+        limit: int = 50,
+        skip: int = 0
+) -> Tuple[List[User], Optional[int]]:
+    """
+    Получить страницу пользователей с keyset-пагинацией (новые сначала).
+
+    Args:
+        db: Сессия базы данных
+        search: Строка поиска по email, username и full_name
+        search_mode: prefix — по началу строки, substring — по подстроке
+        role: Фильтр по роли
+        is_active: Фильтр по активности
+        after_id: ID последнего пользователя предыдущей страницы
+        limit: Размер страницы
+        skip: Смещение для старых клиентов без курсора (медленно на дальних страницах)
+
+    Returns:
+        Tuple[List[User], Optional[int]]: Пользователи и курсор следующей страницы (None, если страница последняя)
+    """
+    query = _users_query(db, search, search_mode, role, is_active)
+    query = query.order_by(User.id.desc())
+    if after_id is not None:
+        query = query.filter(User.id < after_id)
+    elif skip:
+        query = query.offset(skip)
+
+    users = query.limit(limit + 1).all()
+    if len(users) > limit:
+        return users[:limit], users[limit - 1].id
+    return users, None
+
+
+def count_users_filtered(
+        db: Session,
+        search: Optional[str] = None,
+        search_mode: str = "prefix",
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None,
+        exact_threshold: int = 10000
+) -> Tuple[int, bool]:
+    """
+    Количество пользователей с фильтрами, точное или оценочное.
+
+    В PostgreSQL сначала берется оценка планировщика (EXPLAIN); если она
+    больше exact_threshold, точный COUNT не выполняется.
+
+    Returns:
+        Tuple[int, bool]: Количество и признак того, что это оценка
+    """
+    query = _users_query(db, search, search_mode, role, is_active)
+
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = estimated_row_count(db, query.with_entities(User.id).statement)
+        if estimate > exact_threshold:
+            return estimate, True
+
+    return query.with_entities(func.count(User.id)).scalar(), False
+
+
 def create_user(
         db: Session,
         email: str,
@@ -67,6 +176,17 @@ def update_user(
     if not user:
         return None
 
+    old_email = user.email
+
+    # Смена email, роли или активности отзывает выданные токены
+    revoke_tokens = (
+        (email is not None and email != user.email)
+        or (role is not None and role != user.role)
+        or (is_active is not None and is_active != user.is_active)
+    )
+    if revoke_tokens:
+        user.token_version = (user.token_version or 0) + 1
+
     if email is not None:
         user.email = email
     if username is not None:
@@ -82,6 +202,10 @@ def update_user(
 
     db.commit()
     db.refresh(user)
+
+    # Роль, активность и email в кэше аутентификации больше не актуальны
+    principal_cache.invalidate(user_id=user.id, email=old_email)
+    token_versions.set(user.id, user.token_version)
     return user
 
 
@@ -94,9 +218,13 @@ def change_user_password(db: Session, user_id: int, new_password: str) -> Option
     hashed_password, salt = User.get_password_hash(new_password)
     user.hashed_password = hashed_password
     user.salt = salt
+    user.token_version = (user.token_version or 0) + 1  # Отзываем выданные токены
 
     db.commit()
     db.refresh(user)
+
+    principal_cache.invalidate(user_id=user.id, email=user.email)
+    token_versions.set(user.id, user.token_version)
     return user
 
 
@@ -109,9 +237,49 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     if not User.verify_password(password, user.hashed_password, user.salt):
         return None
 
+    if password_hashing.needs_rehash(user.hashed_password):
+        _upgrade_password_hash(db, user, password_hashing.hash(password))
+
+    return user
+
+
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    Аутентифицировать пользователя по email и паролю, не блокируя event loop.
+
+    Проверка и пересчет хеша выполняются в пуле потоков password_hashing
+    с ограничением числа одновременных операций. Хеш старого формата или
+    с устаревшими параметрами прозрачно пересчитывается после успешного входа.
+
+    Args:
+        db: Сессия базы данных
+        email: Email пользователя
+        password: Пароль в открытом виде
+
+    Returns:
+        Optional[User]: Пользователь или None, если email или пароль неверны
+    """
+    user = get_user_by_email(db, email)
+    if not user:
+        return None
+
+    if not await password_hashing.verify_async(password, user.hashed_password, user.salt):
+        return None
+
+    if password_hashing.needs_rehash(user.hashed_password):
+        _upgrade_password_hash(db, user, await password_hashing.hash_async(password))
+
     return user
 
 
+def _upgrade_password_hash(db: Session, user: User, hashed_password: str) -> None:
+    """Сохранить пересчитанный хеш пароля (пароль не менялся, токены не отзываются)"""
+    user.hashed_password = hashed_password
+    user.salt = ""
+    db.commit()
+    db.refresh(user)
+
+
 def count_users(db: Session) -> int:
     """Получить общее количество пользователей"""
     return db.query(User).count()
\ No newline at end of file
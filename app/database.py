@@ -1,6 +1,11 @@
 # app/database.py
-from sqlalchemy import create_engine
+import json
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
@@ -14,9 +19,52 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Счетчик SQL-запросов текущего HTTP-запроса (заголовок X-Query-Count, см. app/middleware.py).
+# Список, а не число: обработчики в пуле потоков работают с копией контекста,
+# но изменяют тот же объект
+request_query_count: ContextVar[Optional[List[int]]] = ContextVar("request_query_count", default=None)
+
+if settings.QUERY_COUNT_HEADER:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count_request_query(conn, cursor, statement, parameters, context, executemany):
+        counter = request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) для запроса SQLAlchemy с обычной обработкой параметров (только PostgreSQL)"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimated_row_count(db, statement) -> int:
+    """
+    Оценка количества строк запроса по плану PostgreSQL без его выполнения.
+
+    Args:
+        db: Сессия базы данных
+        statement: SELECT-запрос
+
+    Returns:
+        int: Оценка планировщика (Plan Rows)
+    """
+    plan = db.execute(Explain(statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,173 @@
+# app/http_cache.py
+import urllib.request
+from typing import Iterable, List, Optional
+from urllib.parse import quote
+
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.responses import Response
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.crud.outbox import enqueue_event
+from app.logger import app_logger
+
+# Тип события outbox: очистка фронтового кэша по суррогатным ключам
+CACHE_PURGE = "cache.purge"
+
+SURROGATE_KEY_HEADER = "Surrogate-Key"
+
+# Суррогатные ключи ответов каталога
+CATALOG_KEY = "catalog"  # Все публичные ответы каталога
+PRODUCT_LIST_KEY = "product-list"  # Списки и поиск: меняются при любом изменении товаров
+PRODUCT_FILTERS_KEY = "product-filters"  # Бренды и диапазон цен
+
+
+def _token(value: str) -> str:
+    """Значение для ключа: без пробелов и не-ASCII символов (ключи разделяются пробелом)"""
+    return quote(str(value).strip().lower(), safe="")
+
+
+def product_key(product_id: int) -> str:
+    return f"product-{product_id}"
+
+
+def brand_key(brand: str) -> str:
+    return f"brand-{_token(brand)}"
+
+
+def currency_key(currency: str) -> str:
+    return f"currency-{_token(currency)}"
+
+
+def product_keys(product) -> List[str]:
+    """Ключи, которые нужно очистить при изменении или удалении товара"""
+    keys = [product_key(product.id), PRODUCT_LIST_KEY, PRODUCT_FILTERS_KEY]
+    if product.brand:
+        keys.append(brand_key(product.brand))
+    return keys
+
+
+def tag_response(response: Response, *keys: Optional[str]) -> None:
+    """
+    Добавить суррогатные ключи в заголовок Surrogate-Key ответа.
+
+    По этим ключам фронтовой кэш (CDN, Varnish) точечно очищает ответы:
+    например, все страницы с товаром или все ответы в валюте после смены курса.
+
+    Args:
+        response: Ответ маршрута (параметр Response обработчика)
+        keys: Ключи; пустые пропускаются
+    """
+    tagged = response.headers.get(SURROGATE_KEY_HEADER, "").split() or [CATALOG_KEY]
+    for key in keys:
+        if key and key not in tagged:
+            tagged.append(key)
+    response.headers[SURROGATE_KEY_HEADER] = " ".join(tagged)
+
+
+def cache_control(policy: dict) -> str:
+    """Значение Cache-Control для политики маршрута из HTTP_CACHE_POLICIES"""
+    value = f"public, max-age={int(policy.get('max_age', 0))}"
+    if policy.get("stale_while_revalidate"):
+        value += f", stale-while-revalidate={int(policy['stale_while_revalidate'])}"
+    return value
+
+
+def enqueue_cache_purge(db: Session, keys: Iterable[str]) -> bool:
+    """
+    Поставить очистку фронтового кэша в outbox (без commit, в транзакции изменения).
+
+    Очистка отправляется после фиксации изменения и повторяется при ошибке;
+    без HTTP_CACHE_PURGE_URL ничего не ставится — ответы устаревают по max-age.
+
+    Args:
+        db: Сессия базы данных
+        keys: Суррогатные ключи
+
+    Returns:
+        bool: True если очистка поставлена в очередь
+    """
+    keys = sorted(set(keys))
+    if not settings.HTTP_CACHE_PURGE_URL or not keys:
+        return False
+    enqueue_event(db, CACHE_PURGE, {"keys": keys})
+    return True
+
+
+def purge_surrogate_keys(keys: List[str]) -> None:
+    """
+    Очистить фронтовой кэш по ключам запросом на HTTP_CACHE_PURGE_URL.
+
+    Ключи передаются в заголовке Surrogate-Key через пробел (Fastly, Varnish
+    с xkey); метод и дополнительные заголовки (токен API) задаются в настройках.
+
+    Raises:
+        urllib.error.URLError: Кэш недоступен или ответил ошибкой (событие outbox повторится)
+    """
+    if not settings.HTTP_CACHE_PURGE_URL or not keys:
+        return
+    request = urllib.request.Request(
+        settings.HTTP_CACHE_PURGE_URL,
+        method=settings.HTTP_CACHE_PURGE_METHOD,
+        headers={SURROGATE_KEY_HEADER: " ".join(keys), **settings.HTTP_CACHE_PURGE_HEADERS}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+    app_logger.info(f"Фронтовой кэш очищен по ключам: {' '.join(keys)}")
+
+
+class HttpCacheMiddleware:
+    """
+    Заголовки HTTP-кэширования по маршруту.
+
+    Успешные GET/HEAD ответы путей из HTTP_CACHE_POLICIES (точный путь или
+    шаблон, например "/api/products/{product_id}") получают Cache-Control: public
+    с max-age и stale-while-revalidate политики. Валюта передается параметром
+    currency, поэтому входит в URL — ключ кэша — и варианты в разных валютах
+    не смешиваются. Ответы путей из HTTP_CACHE_NO_STORE_PREFIXES (админка,
+    корзина, заказы) и ошибки кэшируемых маршрутов получают no-store.
+    Cache-Control, выставленный самим маршрутом, не меняется.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.no_store_prefixes = tuple(settings.HTTP_CACHE_NO_STORE_PREFIXES)
+        # Точные пути проверяются раньше шаблонов: /api/products/search не попадает под {product_id}
+        self.exact = {path: policy for path, policy in settings.HTTP_CACHE_POLICIES.items() if "{" not in path}
+        self.patterns = [
+            (compile_path(path)[0], policy)
+            for path, policy in settings.HTTP_CACHE_POLICIES.items() if "{" in path
+        ]
+
+    def _policy(self, path: str) -> Optional[dict]:
+        policy = self.exact.get(path)
+        if policy is None:
+            policy = next((policy for regex, policy in self.patterns if regex.match(path)), None)
+        return policy
+
+    def _cache_control(self, scope: Scope, status: int) -> Optional[str]:
+        if scope["path"].startswith(self.no_store_prefixes):
+            return "private, no-store"
+        policy = self._policy(scope["path"])
+        if policy is None:
+            return None
+        if scope["method"] not in ("GET", "HEAD") or status != 200:
+            return "no-store"
+        return cache_control(policy)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                value = self._cache_control(scope, message["status"])
+                if value is not None and "cache-control" not in headers:
+                    headers["Cache-Control"] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_headers)
@@ -0,0 +1,124 @@
+# app/idempotency.py
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.idempotency import get_idempotency_key, delete_expired_idempotency_keys
+from app.database import SessionLocal
+from app.logger import app_logger
+from app.models.idempotency import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(*parts: Any) -> str:
+    """
+    Отпечаток запроса для проверки, что ключ повторно используется с тем же телом.
+
+    Args:
+        parts: Значимые части запроса (сессия, пользователь, тело)
+
+    Returns:
+        str: SHA-256 в hex
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def idempotency_scope(user_id: Optional[int], user_session: Optional[str]) -> str:
+    """
+    Клиент, в пределах которого уникален Idempotency-Key: пользователь или, для гостей, сессия.
+
+    Одинаковые ключи разных клиентов не конфликтуют друг с другом.
+    """
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"session:{user_session or ''}"[:MAX_KEY_LENGTH]
+
+
+def validate_idempotency_key(key: str) -> None:
+    """Проверяет формат заголовка Idempotency-Key"""
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key должен содержать от 1 до {MAX_KEY_LENGTH} символов"
+        )
+
+
+def _replay(record_code: int, record_body: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=record_code,
+        content=json.loads(record_body),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+async def replay_idempotent_response(db: Session, record: Optional[IdempotencyKey], fingerprint: str) -> JSONResponse:
+    """
+    Ответ на повторный запрос с уже использованным ключом.
+
+    Если первый запрос еще выполняется, ожидает его завершения и возвращает
+    сохраненный ответ, не выполняя запрос повторно.
+
+    Args:
+        db: Сессия базы данных
+        record: Запись ключа идемпотентности (None — ключ не удалось прочитать)
+        fingerprint: Отпечаток текущего запроса
+
+    Returns:
+        JSONResponse: Сохраненный ответ первого запроса
+
+    Raises:
+        HTTPException: 422 если ключ использован с другим запросом, 409 если
+            первый запрос не завершился за отведенное время или записи ключа нет
+    """
+    if record is None:
+        # Ключ занят и освобожден другими запросами, пока этот пытался его занять
+        raise HTTPException(status_code=409, detail="Запрос с этим ключом еще выполняется, повторите запрос")
+
+    scope, key = record.scope, record.key
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+
+    while True:
+        if record is None:
+            # Первый запрос завершился ошибкой и освободил ключ
+            raise HTTPException(status_code=409, detail="Предыдущий запрос с этим ключом завершился ошибкой, повторите запрос")
+
+        if record.fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key уже использован с другим запросом")
+
+        if record.status == IdempotencyKey.COMPLETED:
+            code, body = record.response_code, record.response_body
+            db.commit()
+            return _replay(code, body)
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=409, detail="Запрос с этим ключом еще выполняется")
+
+        # Не держим транзакцию открытой во время ожидания
+        db.commit()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+        db.expire_all()
+        record = get_idempotency_key(db, scope, key)
+
+
+def purge_expired_idempotency_keys() -> Optional[int]:
+    """Фоновая очистка истекших ключей идемпотентности"""
+    db = SessionLocal()
+    try:
+        deleted = delete_expired_idempotency_keys(db)
+        if deleted:
+            app_logger.info(f"Удалено истекших ключей идемпотентности: {deleted}")
+        return deleted
+    finally:
+        db.close()
@@ -1,11 +1,23 @@
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi import HTTPException
-from app.routers import products, admin, cart, order, auth, admin_users, admin_orders, admin_currency
+from app.routers import products, admin, cart, order, auth, admin_users, admin_orders, admin_currency, \
+    admin_analytics
 from app.middleware import log_requests_middleware
+from app.compression import CompressionMiddleware
+from app.http_cache import HttpCacheMiddleware
+from app.background import run_periodic, stop_background_tasks
+from app.idempotency import purge_expired_idempotency_keys
+from app.outbox import drain_outbox, purge_processed_outbox_events
 from app.logger import app_logger
+from app.warmup import run_warmup, warmup_state
+from app.catalog_snapshot import catalog_snapshot
+from app.auth.token_versions import token_versions
+from app.database import engine
+from app.order_numbers import check_order_number_key
 from app.config import settings
 
 app = FastAPI(
@@ -26,6 +38,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Сжатие ответов (внутри логирования: время запроса включает сжатие) ---
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# --- Заголовки HTTP-кэширования (Cache-Control по маршруту) ---
+if settings.HTTP_CACHE_ENABLED:
+    app.add_middleware(HttpCacheMiddleware)
+
 # --- Логирование запросов ---
 app.middleware("http")(log_requests_middleware)
 
@@ -40,9 +60,51 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 app.add_exception_handler(HTTPException, lambda request, exc: JSONResponse(
     status_code=exc.status_code,
-    content={"detail": exc.detail}
+    content={"detail": exc.detail},
+    headers=exc.headers  # Retry-After, WWW-Authenticate
 ))
 
+# --- Проверка конфигурации ---
+@app.on_event("startup")
+async def check_configuration():
+    check_order_number_key(engine.dialect.name)
+
+
+# --- Фоновые задачи ---
+@app.on_event("startup")
+async def start_background_tasks():
+    run_periodic(
+        "idempotency-keys-purge",
+        settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+        purge_expired_idempotency_keys
+    )
+    if settings.OUTBOX_WORKER_ENABLED:
+        run_periodic("outbox-worker", settings.OUTBOX_POLL_INTERVAL_SECONDS, drain_outbox)
+        run_periodic(
+            "outbox-purge",
+            settings.OUTBOX_PURGE_INTERVAL_SECONDS,
+            purge_processed_outbox_events
+        )
+    # Версии токенов из других воркеров подтягиваются в фоне, а не в запросах
+    run_periodic("token-versions", settings.TOKEN_VERSION_REFRESH_SECONDS, token_versions.refresh_periodically)
+    # Версию каталога из БД опрашивают все воркеры (по ней устаревают снимок и кэш карточек);
+    # строит снимки только воркер, захвативший блокировку, остальные ждут ее освобождения
+    run_periodic("catalog-snapshot", settings.CATALOG_SNAPSHOT_BUILD_INTERVAL_SECONDS, catalog_snapshot.refresh)
+
+
+@app.on_event("startup")
+async def start_warmup():
+    # Прогрев идет в фоне: сервер уже принимает запросы, /health/ready отвечает 503
+    if settings.WARMUP_ENABLED:
+        app.state.warmup_task = asyncio.create_task(run_warmup(app), name="warmup")
+    else:
+        warmup_state.ready = True
+
+
+@app.on_event("shutdown")
+async def shutdown_background_tasks():
+    await stop_background_tasks()
+
 # --- Подключение роутеров ---
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(products.router, prefix="/api", tags=["products"])
@@ -52,6 +114,7 @@ app.include_router(admin_orders.router, prefix="/api/admin", tags=["admin_orders
 app.include_router(cart.router, prefix="/api", tags=["cart"])
 app.include_router(order.router, prefix="/api", tags=["orders"])
 app.include_router(admin_currency.router, prefix="/api/admin", tags=["admin_currency"])
+app.include_router(admin_analytics.router, prefix="/api/admin", tags=["admin_analytics"])
 
 @app.get("/")
 async def root():
@@ -60,3 +123,11 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "api_version": settings.APP_VERSION}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Готовность принимать трафик: 503, пока не закончен прогрев"""
+    return JSONResponse(
+        status_code=200 if warmup_state.ready else 503,
+        content=warmup_state.as_dict()
+    )
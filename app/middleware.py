@@ -1,6 +1,8 @@
 # app/middleware.py
 from fastapi import Request
 import time
+from app.config import settings
+from app.database import request_query_count
 from app.logger import api_logger
 
 
@@ -12,7 +14,16 @@ async def log_requests_middleware(request: Request, call_next):
     api_logger.info(f"Начало запроса: {request.method} {request.url.path}")
 
     # Выполняем запрос
-    response = await call_next(request)
+    if settings.QUERY_COUNT_HEADER:
+        counter = [0]
+        token = request_query_count.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            request_query_count.reset(token)
+        response.headers["X-Query-Count"] = str(counter[0])
+    else:
+        response = await call_next(request)
 
     # Вычисляем время выполнения
     process_time = time.time() - start_time
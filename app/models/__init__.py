@@ -1,5 +1,8 @@
-from app.models.product import Product
+from app.models.product import CatalogVersion, Product, ProductPrice
 from app.models.currency import CurrencyRate
 from app.models.cart import CartItem
 from app.models.order import Order, OrderItem
-from app.models.user import User  # Добавьте эту строку
\ No newline at end of file
+from app.models.user import User  # Добавьте эту строку
+from app.models.idempotency import IdempotencyKey
+from app.models.analytics import SalesDaily, SalesDailyProduct
+from app.models.outbox import OutboxEvent
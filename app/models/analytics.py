@@ -0,0 +1,30 @@
+# app/models/analytics.py
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey
+from app.database import Base
+
+
+class SalesDaily(Base):
+    """
+    Дневная сводка продаж по статусам заказов.
+
+    Обновляется инкрементально при создании заказа и смене статуса,
+    перестраивается скриптом scripts/rebuild_sales_rollups.py.
+    """
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    status = Column(String(32), primary_key=True)  # Значение OrderStatus
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
+
+
+class SalesDailyProduct(Base):
+    """
+    Дневная сводка продаж по товарам (без отмененных заказов).
+    """
+    __tablename__ = "sales_daily_products"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True, index=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)
@@ -1,5 +1,5 @@
 # app/models/cart.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -17,4 +17,9 @@ class CartItem(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
     # Связь с товаром
-    product = relationship("Product", backref="cart_items")
\ No newline at end of file
+    product = relationship("Product", backref="cart_items")
+
+    __table_args__ = (
+        # Поиск товара в корзине сессии (get_cart_item, add_to_cart)
+        Index("ix_cart_items_user_session_product_id", "user_session", "product_id"),
+    )
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Валюта, в которой хранятся цены товаров и суммы заказов
+BASE_CURRENCY = "RUB"
+
 
 class CurrencyRate(Base):
     __tablename__ = "currency_rates"
@@ -10,6 +13,16 @@ class CurrencyRate(Base):
     currency_code = Column(String(3), nullable=False, index=True)  # USD, EUR
     rate_to_rub = Column(Numeric(10, 4), nullable=False)  # Курс к рублю
     is_active = Column(Boolean, default=True)
+    # Период действия курса [valid_from, valid_to); у активного курса valid_to пустой
+    valid_from = Column(DateTime, nullable=False, server_default=func.now())
+    valid_to = Column(DateTime, nullable=True)
     created_by = Column(Integer)  # ID администратора
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Активный курс валюты (get_active_currency_rate)
+        Index("ix_currency_rates_currency_code_is_active", "currency_code", "is_active"),
+        # Курс на момент времени (get_currency_rate_at, convert_amounts_at)
+        Index("ix_currency_rates_currency_code_valid_from", "currency_code", "valid_from"),
+    )
@@ -0,0 +1,28 @@
+# app/models/idempotency.py
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Ключ идемпотентности запроса (заголовок Idempotency-Key).
+
+    Хранит отпечаток запроса и сериализованный ответ, чтобы повторный запрос
+    с тем же ключом получил сохраненный ответ без повторного выполнения.
+    Ключи уникальны в пределах клиента (scope): одинаковые ключи разных
+    пользователей и сессий не пересекаются.
+    """
+    __tablename__ = "idempotency_keys"
+
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
+    scope = Column(String(255), primary_key=True)  # Клиент: "user:<id>" или "session:<id>"
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 тела запроса и сессии
+    status = Column(String(20), nullable=False, default=IN_PROGRESS)
+    response_code = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON ответа
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Sequence, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -13,6 +13,10 @@ class OrderStatus(str, enum.Enum):
     CANCELLED = "отменен"
 
 
+# Последовательность для генерации номеров заказов (см. app/order_numbers.py)
+order_number_seq = Sequence("order_number_seq", metadata=Base.metadata)
+
+
 class Order(Base):
     __tablename__ = "orders"
 
@@ -40,13 +44,24 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")  # 🔥 ВАЖНО
     user = relationship("User", backref="orders")
 
+    __table_args__ = (
+        # Список заказов пользователя с сортировкой по дате
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_user_session_created_at", "user_session", "created_at"),
+        # Админский список заказов с фильтром по статусу
+        Index("ix_orders_status_created_at", "status", "created_at"),
+    )
+
+    # created_at нужен сразу после flush для сводок продаж (RETURNING вместо отдельного SELECT)
+    __mapper_args__ = {"eager_defaults": True}
+
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     comment = Column(Text, nullable=True)
@@ -0,0 +1,34 @@
+# app/models/outbox.py
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class OutboxEvent(Base):
+    """
+    Событие transactional outbox.
+
+    Записывается в той же транзакции, что и изменение заказа, и позже
+    обрабатывается фоновым обработчиком (уведомления, почта, CRM), поэтому
+    побочные эффекты не задерживают оформление заказа и не теряются при сбое.
+    """
+    __tablename__ = "outbox_events"
+
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, server_default=func.now())  # Не раньше этого времени
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Выборка очередной пачки: WHERE status = 'pending' AND available_at <= now ORDER BY id
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text
+from sqlalchemy import BigInteger, Column, Integer, String, Numeric, DateTime, Text, Index, ForeignKey
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -13,4 +13,43 @@ class Product(Base):
     volume = Column(String)
     description = Column(Text)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Фильтр и сортировка по цене (search_products, get_price_range)
+        Index("ix_products_price_rub", "price_rub"),
+    )
+
+
+class ProductPrice(Base):
+    """
+    Цены товаров в валютах по активным курсам.
+
+    Пересчитывается одним запросом при смене курса (create_currency_rate)
+    и для одного товара при его создании или изменении цены. Цены в рублях
+    здесь не хранятся — они берутся из products.price_rub.
+    """
+    __tablename__ = "product_prices"
+
+    currency_code = Column(String(3), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True, index=True)
+    price = Column(Numeric(14, 4), nullable=False)
+
+    __table_args__ = (
+        # Фильтр и сортировка по цене в валюте (search_products, get_price_range)
+        Index("ix_product_prices_currency_code_price", "currency_code", "price"),
+    )
+
+
+class CatalogVersion(Base):
+    """
+    Версия каталога: одна строка, увеличивается в транзакции каждого
+    изменения товаров, цен и курсов (app/catalog_snapshot.py).
+
+    Воркеры всех хостов опрашивают ее и по ней узнают, что снимок каталога
+    и кэш карточек устарели.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
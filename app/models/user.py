@@ -1,9 +1,8 @@
 # app/models/user.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum, Index
 from sqlalchemy.sql import func
 from app.database import Base
-import hashlib
-import os
+from app.auth.passwords import password_hashing
 import enum
 
 
@@ -29,9 +28,15 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     role = Column(Enum(UserRole), default=UserRole.USER)  # Заменяем is_admin на role
     created_by = Column(Integer, nullable=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Увеличивается для отзыва токенов
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Подтягивание изменившихся версий токенов (app/auth/token_versions.py)
+        Index("ix_users_updated_at", "updated_at"),
+    )
+
     @property
     def is_admin(self):
         """Проверка, является ли пользователь админом или суперадмином"""
@@ -45,21 +50,16 @@ class User(Base):
     @staticmethod
     def get_password_hash(password):
         """
-        Создает хеш пароля с использованием SHA256 и случайной соли.
+        Создает хеш пароля (scrypt или argon2, см. app/auth/passwords.py).
 
         Args:
             password: Пароль в открытом виде
 
         Returns:
-            Кортеж (хешированный пароль, соль)
+            Кортеж (хешированный пароль, соль); соль хранится в самом хеше,
+            поэтому вторым элементом возвращается пустая строка
         """
-        # Генерируем случайную соль
-        salt = os.urandom(32).hex()
-
-        # Создаем хеш с солью
-        hashed = hashlib.sha256((password + salt).encode('utf-8')).hexdigest()
-
-        return hashed, salt
+        return password_hashing.hash(password), ""
 
     @staticmethod
     def verify_password(plain_password, hashed_password, salt):
@@ -69,16 +69,12 @@ class User(Base):
         Args:
             plain_password: Пароль в открытом виде
             hashed_password: Хешированный пароль
-            salt: Соль, использованная при хешировании
+            salt: Соль старого SHA-256 хеша (для новых хешей не используется)
 
         Returns:
             True если пароль соответствует хешу, иначе False
         """
-        # Создаем хеш с той же солью
-        hashed = hashlib.sha256((plain_password + salt).encode('utf-8')).hexdigest()
-
-        # Сравниваем хеши
-        return hashed == hashed_password
+        return password_hashing.verify(plain_password, hashed_password, salt)
 
     def __repr__(self):
         """Строковое представление объекта пользователя"""
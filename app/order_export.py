@@ -0,0 +1,133 @@
+# app/order_export.py
+import csv
+import io
+import json
+from itertools import groupby
+from typing import Iterable, Iterator, Optional
+import datetime
+
+from app.crud.order import iter_order_export_rows
+from app.database import SessionLocal
+from app.models.order import OrderStatus
+
+# Формат выгрузки → тип содержимого
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+CSV_COLUMNS = [
+    "order_number", "created_at", "status", "customer_name", "contact_phone", "contact_email",
+    "total_amount", "notes", "product_id", "product_name", "quantity", "price", "line_total", "comment"
+]
+
+# Сколько заказов собирать в один фрагмент ответа
+ORDERS_PER_CHUNK = 200
+
+
+def group_export_rows(rows: Iterable) -> Iterator[dict]:
+    """
+    Сгруппировать строки выгрузки по заказам на лету.
+
+    Строки одного заказа идут подряд (запрос упорядочен по заказу), поэтому
+    в памяти держится только текущий заказ.
+
+    Args:
+        rows: Строки из iter_order_export_rows
+
+    Returns:
+        Iterator[dict]: Заказы со списком товаров items
+    """
+    for _, order_rows in groupby(rows, key=lambda row: row.id):
+        order_rows = list(order_rows)
+        first = order_rows[0]
+        yield {
+            "order_number": first.order_number,
+            "created_at": first.created_at.isoformat() if first.created_at else None,
+            "status": OrderStatus(first.status).value,
+            "customer_name": first.customer_name,
+            "contact_phone": first.contact_phone,
+            "contact_email": first.contact_email,
+            "total_amount": float(first.total_amount),
+            "notes": first.notes,
+            "items": [
+                {
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "quantity": row.quantity,
+                    "price": float(row.price),
+                    "line_total": round(row.quantity * float(row.price), 2),
+                    "comment": row.comment
+                }
+                for row in order_rows if row.item_id is not None
+            ]
+        }
+
+
+def _csv_lines(orders: Iterable[dict]) -> Iterator[str]:
+    """CSV: строка на каждый товар, у заказа без товаров — одна строка с пустыми колонками товара"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM, чтобы Excel открывал кириллицу без выбора кодировки
+    buffer.write("\ufeff")
+    writer.writerow(CSV_COLUMNS)
+
+    for count, order in enumerate(orders, start=1):
+        order_columns = [order[name] for name in CSV_COLUMNS[:8]]
+        for item in order["items"] or [None]:
+            item_columns = [item[name] for name in CSV_COLUMNS[8:]] if item else [""] * 6
+            writer.writerow(order_columns + item_columns)
+
+        if count % ORDERS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(orders: Iterable[dict]) -> Iterator[str]:
+    """JSONL: объект на каждый заказ с вложенным списком товаров"""
+    chunk = []
+    for order in orders:
+        chunk.append(json.dumps(order, ensure_ascii=False) + "\n")
+        if len(chunk) == ORDERS_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    yield "".join(chunk)
+
+
+def iter_order_export(
+        export_format: str,
+        status: Optional[OrderStatus] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None
+) -> Iterator[str]:
+    """
+    Потоковая выгрузка заказов с товарами в CSV или JSONL.
+
+    Открывает собственную сессию, чтобы ее время жизни совпадало со временем
+    передачи ответа, а не обработчика запроса.
+
+    Args:
+        export_format: csv или jsonl
+        status: Статус для фильтрации (опционально)
+        date_from: Начало периода (включительно)
+        date_to: Конец периода (не включительно)
+
+    Returns:
+        Iterator[str]: Фрагменты выгрузки
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
+
+    db = SessionLocal()
+    try:
+        orders = group_export_rows(iter_order_export_rows(db, status, date_from, date_to))
+        lines = _csv_lines(orders) if export_format == "csv" else _jsonl_lines(orders)
+        for chunk in lines:
+            if chunk:
+                yield chunk
+    finally:
+        db.close()
@@ -0,0 +1,137 @@
+# app/order_numbers.py
+import hashlib
+from array import array
+
+from app.config import settings
+
+# Ключ перестановки для локальной разработки на SQLite; в PostgreSQL нужен ORDER_NUMBER_KEY
+DEV_ORDER_NUMBER_KEY = "dev-only-order-number-key"
+
+
+class OrderNumberGenerator:
+    """
+    Генератор номеров заказов без коллизий.
+
+    Порядковый номер (значение последовательности БД) проходит через ключевую
+    сеть Фейстеля, которая является перестановкой диапазона [0, 10**digits).
+    Разные порядковые номера всегда дают разные номера заказов, поэтому
+    проверять занятость номера в базе не нужно, а сами номера выглядят
+    случайными и не раскрывают количество заказов.
+    """
+
+    def __init__(self, key: str, digits: int = 8, rounds: int = 4):
+        """
+        Args:
+            key: Секретный ключ перестановки
+            digits: Количество цифр в номере заказа
+            rounds: Количество раундов сети Фейстеля
+        """
+        if digits < 1:
+            raise ValueError("Количество цифр должно быть положительным")
+
+        self.digits = digits
+        self.rounds = rounds
+        self.domain = 10 ** digits
+
+        # Сеть Фейстеля работает на двоичном домене из двух равных половин,
+        # значения за пределами 10**digits отбрасываются (cycle walking)
+        bits = max(self.domain - 1, 1).bit_length()
+        self._half_bits = (bits + 1) // 2
+        self._half_mask = (1 << self._half_bits) - 1
+        self._key = hashlib.sha256(key.encode("utf-8")).digest()
+        self._tables = None
+
+    def _round(self, index: int, value: int) -> int:
+        """Раундовая функция: ключевой хеш правой половины"""
+        digest = hashlib.blake2b(
+            value.to_bytes(8, "big") + bytes([index]),
+            key=self._key,
+            digest_size=8
+        ).digest()
+        return int.from_bytes(digest, "big") & self._half_mask
+
+    def _round_tables(self):
+        """
+        Таблицы значений раундовой функции.
+
+        Для номеров до 8 цифр половина блока не больше 14 бит, поэтому все
+        значения раундовой функции помещаются в небольшие таблицы (~256 КБ)
+        и считаются один раз при первом обращении.
+        """
+        if self._tables is None and self._half_bits <= 14:
+            self._tables = [
+                array("L", (self._round(index, value) for value in range(1 << self._half_bits)))
+                for index in range(self.rounds)
+            ]
+        return self._tables
+
+    def _encrypt(self, value: int) -> int:
+        left = value >> self._half_bits
+        right = value & self._half_mask
+        tables = self._round_tables()
+        if tables is not None:
+            for table in tables:
+                left, right = right, left ^ table[right]
+        else:
+            for index in range(self.rounds):
+                left, right = right, left ^ self._round(index, right)
+        return (left << self._half_bits) | right
+
+    def permute(self, sequence: int) -> int:
+        """
+        Перестановка порядкового номера в диапазоне [0, 10**digits).
+
+        Args:
+            sequence: Порядковый номер
+
+        Returns:
+            int: Уникальное число из того же диапазона
+
+        Raises:
+            ValueError: Если порядковый номер вне диапазона
+        """
+        if not 0 <= sequence < self.domain:
+            raise ValueError("Исчерпан диапазон номеров заказов")
+
+        value = self._encrypt(sequence)
+        while value >= self.domain:
+            value = self._encrypt(value)
+        return value
+
+    def format(self, sequence: int) -> str:
+        """
+        Номер заказа фиксированной длины для порядкового номера.
+
+        Args:
+            sequence: Порядковый номер
+
+        Returns:
+            str: Номер заказа из digits цифр
+        """
+        return f"{self.permute(sequence):0{self.digits}d}"
+
+
+def check_order_number_key(dialect_name: str) -> None:
+    """
+    Проверить, что задан ключ перестановки номеров заказов.
+
+    Ключ не должен зависеть от других секретов (например, SECRET_KEY для JWT):
+    при его смене перестановка меняется, новые номера начинают совпадать с уже
+    выданными и оформление заказов падает на уникальном индексе.
+
+    Args:
+        dialect_name: Диалект БД приложения
+
+    Raises:
+        RuntimeError: Если для PostgreSQL не задан ORDER_NUMBER_KEY
+    """
+    if dialect_name == "postgresql" and not settings.ORDER_NUMBER_KEY:
+        raise RuntimeError(
+            "Не задан ORDER_NUMBER_KEY: ключ номеров заказов обязателен и не должен меняться после первого заказа"
+        )
+
+
+order_number_generator = OrderNumberGenerator(
+    key=settings.ORDER_NUMBER_KEY or DEV_ORDER_NUMBER_KEY,
+    digits=settings.ORDER_NUMBER_DIGITS
+)
@@ -0,0 +1,224 @@
+# app/outbox.py
+import datetime
+import json
+import random
+import smtplib
+import threading
+from collections import defaultdict
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.config import settings
+from app.crud.outbox import (
+    claim_outbox_events, mark_outbox_event_done, mark_outbox_event_failed, delete_processed_outbox_events
+)
+from app.database import SessionLocal
+from app.http_cache import CACHE_PURGE, purge_surrogate_keys
+from app.logger import app_logger
+
+# Типы событий
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+
+Handler = Callable[[dict], None]
+
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+_sink_lock = threading.Lock()
+
+
+def register_handler(event_type: str) -> Callable[[Handler], Handler]:
+    """
+    Декоратор для регистрации обработчика события outbox.
+
+    Обработчик получает данные события и должен выбросить исключение при
+    ошибке — тогда событие будет повторено с экспоненциальной задержкой.
+    Доставка «как минимум один раз»: при повторе снова вызываются все
+    обработчики события, поэтому они должны переносить повторы.
+
+    Args:
+        event_type: Тип события
+
+    Returns:
+        Декоратор, возвращающий функцию без изменений
+    """
+
+    def decorator(handler: Handler) -> Handler:
+        _handlers[event_type].append(handler)
+        return handler
+
+    return decorator
+
+
+# --- Приемники сообщений ---
+
+def send_message(recipients: List[str], subject: str, body: str) -> None:
+    """
+    Отправить сообщение через настроенный приемник (settings.OUTBOX_SINK).
+
+    file — сообщение дописывается строкой JSON в файл в LOG_DIR;
+    smtp — письмо отправляется на OUTBOX_SMTP_HOST:OUTBOX_SMTP_PORT
+    (локально подходит отладочный сервер: python -m aiosmtpd -n -l localhost:1025).
+
+    Args:
+        recipients: Адреса получателей
+        subject: Тема
+        body: Текст сообщения
+    """
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return
+
+    if settings.OUTBOX_SINK == "smtp":
+        message = EmailMessage()
+        message["From"] = settings.OUTBOX_EMAIL_FROM
+        message["To"] = ", ".join(recipients)
+        message["Subject"] = subject
+        message.set_content(body)
+        with smtplib.SMTP(settings.OUTBOX_SMTP_HOST, settings.OUTBOX_SMTP_PORT, timeout=10) as smtp:
+            smtp.send_message(message)
+        return
+
+    line = json.dumps({
+        "sent_at": datetime.datetime.utcnow().isoformat(),
+        "to": recipients,
+        "subject": subject,
+        "body": body
+    }, ensure_ascii=False)
+    with _sink_lock:
+        with open(Path(settings.LOG_DIR) / settings.OUTBOX_SINK_FILE, "a", encoding="utf-8") as sink:
+            sink.write(line + "\n")
+
+
+# --- Обработчики по умолчанию ---
+
+@register_handler(ORDER_CREATED)
+def notify_managers_about_order(payload: dict) -> None:
+    """Уведомление менеджеров о новом заказе"""
+    send_message(
+        settings.OUTBOX_MANAGER_EMAILS,
+        f"Новый заказ {payload['order_number']}",
+        f"Клиент: {payload['customer_name']}\n"
+        f"Телефон: {payload['contact_phone']}\n"
+        f"Email: {payload['contact_email']}\n"
+        f"Сумма: {payload['total_amount']} ₽\n"
+        f"Примечания: {payload.get('notes') or '—'}"
+    )
+
+
+@register_handler(ORDER_CREATED)
+def email_customer_order_created(payload: dict) -> None:
+    """Письмо клиенту о принятом заказе"""
+    send_message(
+        [payload["contact_email"]],
+        f"Ваш заказ {payload['order_number']} принят",
+        f"Здравствуйте, {payload['customer_name']}!\n"
+        f"Заказ {payload['order_number']} на сумму {payload['total_amount']} ₽ принят и ожидает подтверждения."
+    )
+
+
+@register_handler(ORDER_STATUS_CHANGED)
+def email_customer_status_changed(payload: dict) -> None:
+    """Письмо клиенту о смене статуса заказа"""
+    send_message(
+        [payload["contact_email"]],
+        f"Статус заказа {payload['order_number']}: {payload['new_status']}",
+        f"Здравствуйте, {payload['customer_name']}!\n"
+        f"Статус заказа {payload['order_number']} изменен: {payload['old_status']} → {payload['new_status']}."
+    )
+
+
+@register_handler(CACHE_PURGE)
+def purge_http_cache(payload: dict) -> None:
+    """Очистка фронтового кэша по суррогатным ключам изменившихся товаров и курсов"""
+    purge_surrogate_keys(payload["keys"])
+
+
+# --- Обработка очереди ---
+
+def retry_delay(attempts: int) -> float:
+    """Экспоненциальная задержка перед повтором со случайным разбросом ±10%"""
+    delay = min(
+        settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.OUTBOX_BACKOFF_MAX_SECONDS
+    )
+    return delay * random.uniform(0.9, 1.1)
+
+
+def process_outbox_batch(batch_size: int = None) -> int:
+    """
+    Обработать одну пачку событий outbox.
+
+    Результат каждого события фиксируется сразу после его обработки: сбой
+    посреди пачки не повторяет уже отправленные письма. События, аренда
+    которых истекла, пока обрабатывались предыдущие, пропускаются — их
+    может занять другой воркер.
+
+    Args:
+        batch_size: Размер пачки (по умолчанию settings.OUTBOX_BATCH_SIZE)
+
+    Returns:
+        int: Количество занятых событий
+    """
+    db = SessionLocal()
+    try:
+        events = claim_outbox_events(
+            db, batch_size or settings.OUTBOX_BATCH_SIZE, settings.OUTBOX_LEASE_SECONDS
+        )
+        # Сроки аренды запоминаются до обработки: commit сбрасывает загруженные атрибуты
+        leases = [(event, event.available_at) for event in events]
+        for event, leased_until in leases:
+            if datetime.datetime.utcnow() >= leased_until:
+                app_logger.warning(
+                    f"Аренда события outbox {event.id} истекла до обработки, событие возвращено в очередь"
+                )
+                continue
+            try:
+                payload = json.loads(event.payload)
+                for handler in _handlers.get(event.event_type, []):
+                    handler(payload)
+                mark_outbox_event_done(db, event)
+            except Exception as e:
+                if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                    mark_outbox_event_failed(db, event, str(e))
+                    app_logger.error(
+                        f"Событие outbox {event.id} ({event.event_type}) не обработано "
+                        f"после {event.attempts} попыток: {str(e)}"
+                    )
+                else:
+                    mark_outbox_event_failed(db, event, str(e), retry_delay(event.attempts))
+                    app_logger.warning(
+                        f"Ошибка обработки события outbox {event.id} ({event.event_type}), "
+                        f"попытка {event.attempts}: {str(e)}"
+                    )
+            db.commit()
+        return len(events)
+    finally:
+        db.close()
+
+
+def drain_outbox() -> int:
+    """
+    Обрабатывать пачки, пока очередь не опустеет.
+
+    Returns:
+        int: Количество обработанных событий
+    """
+    processed = 0
+    while True:
+        claimed = process_outbox_batch()
+        processed += claimed
+        if claimed < settings.OUTBOX_BATCH_SIZE:
+            return processed
+
+
+def purge_processed_outbox_events() -> None:
+    """Удалить обработанные события старше OUTBOX_RETENTION_HOURS"""
+    db = SessionLocal()
+    try:
+        older_than = datetime.datetime.utcnow() - datetime.timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+        deleted = delete_processed_outbox_events(db, older_than)
+        if deleted:
+            app_logger.info(f"Удалено обработанных событий outbox: {deleted}")
+    finally:
+        db.close()
@@ -0,0 +1,49 @@
+# app/pricing.py
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud.currency import get_active_rate_map
+from app.models.currency import BASE_CURRENCY
+
+
+def currency_symbol(currency: str) -> str:
+    """Символ валюты из настроек CURRENCY_FORMATS (по умолчанию — код валюты)"""
+    return settings.CURRENCY_FORMATS.get(currency, {}).get("symbol", currency)
+
+
+def format_price(amount: float, currency: str) -> str:
+    """
+    Цена для отображения по настройкам валюты.
+
+    Args:
+        amount: Цена в валюте currency
+        currency: Код валюты
+
+    Returns:
+        str: Например "1,250.0 руб." или "13.1 $"
+    """
+    decimals = settings.CURRENCY_FORMATS.get(currency, {}).get("decimals", settings.CURRENCY_DEFAULT_DECIMALS)
+    return settings.CURRENCY_PRICE_TEMPLATE.format(
+        amount=f"{amount:,.{decimals}f}",
+        symbol=currency_symbol(currency)
+    )
+
+
+def resolve_currency(db: Session, currency: str) -> str:
+    """
+    Проверить, что для валюты есть активный курс.
+
+    Args:
+        db: Сессия базы данных
+        currency: Код валюты из запроса (регистр не важен)
+
+    Returns:
+        str: Код валюты в верхнем регистре
+
+    Raises:
+        ValueError: Если валюта не поддерживается
+    """
+    code = (currency or BASE_CURRENCY).strip().upper()
+    if code != BASE_CURRENCY and code not in get_active_rate_map(db):
+        raise ValueError(f"Неподдерживаемая валюта: {currency}")
+    return code
@@ -0,0 +1,283 @@
+# app/product_detail_cache.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.catalog_snapshot import catalog_snapshot
+from app.config import settings
+from app.models.currency import BASE_CURRENCY
+
+
+@dataclass(frozen=True)
+class RenderedDetail:
+    """Готовое тело ответа GET /api/products/{product_id} в одной валюте"""
+    product_id: int
+    currency: str
+    brand: Optional[str]
+    body: bytes  # JSON ProductDetail
+
+
+class _Flight:
+    """Загрузка записи, которую ждут все одновременные промахи по ключу"""
+
+    def __init__(self, generation: int, version: Optional[int]):
+        self.generation = generation
+        self.version = version
+        self.result: Optional[RenderedDetail] = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def wait(self) -> asyncio.Future:
+        """Future, завершающаяся вместе с загрузкой (добавляется под lock кэша, пока загрузка в _flights)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append((loop, future))
+        return future
+
+    def finish(self) -> None:
+        """Разбудить ожидающие запросы (после удаления из _flights: новых ожидающих нет)"""
+        for loop, future in self._waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():  # Ожидавший запрос мог быть отменен
+        future.set_result(None)
+
+
+class ProductDetailCache:
+    """
+    LRU-кэш карточек товаров с TTL: (ID товара, валюта) → готовый JSON.
+
+    Промахи по одному ключу загружаются один раз (single-flight): остальные
+    запросы асинхронно ждут первую загрузку, не занимая потоки пула.
+    update_product и delete_product заменяют или удаляют записи товара сразу
+    после commit, новый курс удаляет записи в этой валюте. Загрузка, начатая
+    до такого изменения, в кэш не попадает.
+
+    Записи хранятся вместе с версией каталога из БД
+    (catalog_snapshot.catalog_version): изменение товара или курса на любом
+    хосте увеличивает ее, и записи с прежней версией перестают выдаваться
+    везде не позже чем через CATALOG_SNAPSHOT_BUILD_INTERVAL_SECONDS.
+    Изменения в обход версии (SQL вручную) доходят через ttl_seconds.
+    Счетчики попаданий ведутся по каждому товару.
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            ttl_seconds: float,
+            version_source: Callable[[], Optional[int]] = lambda: None
+    ):
+        """
+        Args:
+            max_size: Максимальное количество записей (и товаров в счетчиках)
+            ttl_seconds: Время жизни записи в секундах
+            version_source: Текущая общая версия каталога или None, если ее нет
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.version_source = version_source
+        self._entries: "OrderedDict[Tuple[int, str], tuple]" = OrderedDict()  # ключ → (detail, expires_at, version)
+        self._flights: Dict[Tuple[int, str], _Flight] = {}
+        self._key_stats: "OrderedDict[int, List[int]]" = OrderedDict()  # ID товара → [hits, misses, coalesced]
+        self._generation = 0  # Увеличивается при каждой инвалидации
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale = 0  # Записи, отброшенные из-за новой версии каталога
+
+    def _count(self, product_id: int, column: int) -> None:
+        """Учесть обращение к товару (под self._lock)"""
+        counters = self._key_stats.get(product_id)
+        if counters is None:
+            counters = self._key_stats[product_id] = [0, 0, 0]
+            while len(self._key_stats) > self.max_size:
+                self._key_stats.popitem(last=False)
+        else:
+            self._key_stats.move_to_end(product_id)
+        counters[column] += 1
+
+    def _lookup(self, key: Tuple[int, str], version: Optional[int]) -> Optional[RenderedDetail]:
+        """Живая запись текущей версии каталога или None (под self._lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        if entry[2] != version:
+            del self._entries[key]
+            self.stale += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _store(self, detail: RenderedDetail, version: Optional[int]) -> None:
+        """Сохранить запись с версией каталога, на которой она построена (под self._lock)"""
+        key = (detail.product_id, detail.currency)
+        self._entries.pop(key, None)
+        self._entries[key] = (detail, time.monotonic() + self.ttl_seconds, version)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(
+            self,
+            product_id: int,
+            currency: str,
+            loader: Callable[[], Awaitable[Optional[RenderedDetail]]]
+    ) -> Optional[RenderedDetail]:
+        """
+        Карточка из кэша или загруженная loader (один вызов на ключ при одновременных промахах).
+
+        Остальные промахи ждут загрузку асинхронно. Если первый запрос отменен
+        (клиент отключился), ожидавшие запросы загружают карточку заново.
+
+        Args:
+            product_id: ID товара
+            currency: Код валюты в верхнем регистре
+            loader: Загрузка карточки (например, через run_in_threadpool); None — товар не найден (не кэшируется)
+
+        Returns:
+            Optional[RenderedDetail]: Карточка или None
+
+        Raises:
+            Exception: Ошибка loader (передается всем ожидавшим запросам)
+        """
+        key = (product_id, currency)
+        while True:
+            version = self.version_source()
+            with self._lock:
+                detail = self._lookup(key, version)
+                if detail is not None:
+                    self.hits += 1
+                    self._count(product_id, 0)
+                    return detail
+                flight = self._flights.get(key)
+                if flight is not None and flight.version == version:
+                    self.coalesced += 1
+                    self._count(product_id, 2)
+                    waiter = flight.wait()
+                else:
+                    flight = self._flights[key] = _Flight(self._generation, version)
+                    self.misses += 1
+                    self._count(product_id, 1)
+                    waiter = None
+
+            if waiter is None:
+                return await self._load(key, flight, loader)
+            await waiter
+            if flight.cancelled:
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+    async def _load(
+            self,
+            key: Tuple[int, str],
+            flight: _Flight,
+            loader: Callable[[], Awaitable[Optional[RenderedDetail]]]
+    ) -> Optional[RenderedDetail]:
+        """Загрузить запись первым запросом и разбудить ожидающих"""
+        try:
+            flight.result = await loader()
+        except asyncio.CancelledError:
+            flight.cancelled = True
+            raise
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                # Изменение товара или курса во время загрузки: результат мог устареть
+                if flight.result is not None and flight.generation == self._generation and self.max_size > 0:
+                    self._store(flight.result, flight.version)
+            flight.finish()
+        return flight.result
+
+    def put(self, detail: RenderedDetail) -> None:
+        """Записать карточку (write-through после изменения товара)"""
+        if self.max_size <= 0:
+            return
+        version = self.version_source()
+        with self._lock:
+            self._store(detail, version)
+
+    def _invalidate(self, matches: Callable[[Tuple[int, str]], bool]) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+            # Новые запросы не ждут загрузку, начатую до изменения
+            for key in [key for key in self._flights if matches(key)]:
+                del self._flights[key]
+
+    def invalidate_product(self, product_id: int) -> None:
+        """Удалить карточки товара во всех валютах"""
+        self._invalidate(lambda key: key[0] == product_id)
+
+    def invalidate_currency(self, currency: str) -> None:
+        """Удалить карточки в валюте (после смены курса; рублевые не меняются)"""
+        if currency != BASE_CURRENCY:
+            self._invalidate(lambda key: key[1] == currency)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._invalidate(lambda key: True)
+
+    def stats(self, top: int = 20) -> dict:
+        """
+        Метрики кэша: размер, попадания, промахи, ожидания чужой загрузки
+        и самые запрашиваемые товары со своими счетчиками.
+
+        Args:
+            top: Сколько товаров с наибольшим числом обращений вернуть
+        """
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            keys = sorted(self._key_stats.items(), key=lambda item: sum(item[1]), reverse=True)[:top]
+            currencies: Dict[int, List[str]] = {}
+            for product_id, currency in self._entries:
+                currencies.setdefault(product_id, []).append(currency)
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale": self.stale,
+                "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+                "top_keys": [
+                    {
+                        "product_id": product_id,
+                        "hits": hits,
+                        "misses": misses,
+                        "coalesced": coalesced,
+                        "hit_rate": round(hits / (hits + misses + coalesced), 4),
+                        "cached_currencies": sorted(currencies.get(product_id, [])),
+                    }
+                    for product_id, (hits, misses, coalesced) in keys
+                ]
+            }
+
+
+product_detail_cache = ProductDetailCache(
+    max_size=settings.PRODUCT_DETAIL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRODUCT_DETAIL_CACHE_TTL_SECONDS,
+    version_source=catalog_snapshot.catalog_version
+)
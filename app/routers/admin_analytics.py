@@ -0,0 +1,49 @@
+# app/routers/admin_analytics.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import get_db
+from app.schemas.analytics import SalesSummaryResponse
+from app.crud.analytics import get_sales_by_day, get_sales_by_status, get_sales_by_product
+from app.auth.jwt import get_current_admin_user
+from app.models.user import User
+import datetime
+
+router = APIRouter()
+
+MAX_RANGE_DAYS = 366 * 3
+
+
+@router.get("/analytics/sales", response_model=SalesSummaryResponse)
+async def admin_get_sales(
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        products_limit: int = Query(50, ge=1, le=1000, description="Количество товаров в рейтинге"),
+        db: Session = Depends(get_db),
+        _: User = Depends(get_current_admin_user)
+):
+    """
+    Продажи за период по дням, статусам и товарам (только для администраторов).
+
+    Данные берутся из дневных сводок sales_daily и sales_daily_products,
+    по умолчанию — за последние 30 дней.
+    """
+    date_to = date_to or datetime.date.today()
+    date_from = date_from or date_to - datetime.timedelta(days=29)
+
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from не может быть позже date_to")
+    if (date_to - date_from).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Период не может быть больше {MAX_RANGE_DAYS} дней")
+
+    days = get_sales_by_day(db, date_from, date_to)
+
+    return SalesSummaryResponse(
+        date_from=date_from,
+        date_to=date_to,
+        orders_count=sum(day["orders_count"] for day in days),
+        revenue=round(sum(day["revenue"] for day in days), 2),
+        days=days,
+        statuses=get_sales_by_status(db, date_from, date_to),
+        products=get_sales_by_product(db, date_from, date_to, limit=products_limit)
+    )
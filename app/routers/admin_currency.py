@@ -1,9 +1,13 @@
 # app/routers/admin_currency.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
 from app.database import get_db
-from app.schemas.currency import CurrencyRateCreate, CurrencyRateResponse
-from app.crud.currency import create_currency_rate, get_all_active_rates
+from app.schemas.currency import CurrencyRateCreate, CurrencyRateResponse, CurrencyConvertRequest, \
+    CurrencyConvertResponse, CurrencyConvertedAmount, CurrencyConvertedOrder
+from app.crud.currency import create_currency_rate, get_all_active_rates, get_currency_rate_at, \
+    get_currency_rate_history, convert_amounts_at, convert_order_totals
 from app.auth.jwt import get_current_admin_user
 from app.models.user import User
 
@@ -26,4 +30,57 @@ async def set_currency_rate(
 @router.get("/currency-rates")
 async def get_currency_rates(db: Session = Depends(get_db)):
     """Получение всех активных курсов валют"""
-    return get_all_active_rates(db)
\ No newline at end of file
+    return get_all_active_rates(db)
+
+
+@router.get("/currency-rates/history", response_model=List[CurrencyRateResponse])
+async def get_currency_rate_history_api(
+    currency_code: str,
+    date_from: Optional[datetime] = Query(None, description="Начало периода"),
+    date_to: Optional[datetime] = Query(None, description="Конец периода (не включительно)"),
+    current_admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """История курсов валюты за период"""
+    return get_currency_rate_history(db, currency_code.upper(), date_from, date_to)
+
+
+@router.get("/currency-rates/at", response_model=CurrencyRateResponse)
+async def get_currency_rate_at_api(
+    currency_code: str,
+    at: datetime = Query(..., description="Момент времени"),
+    current_admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Курс валюты, действовавший в указанный момент"""
+    rate = get_currency_rate_at(db, currency_code.upper(), at)
+    if rate is None:
+        raise HTTPException(status_code=404, detail="Курс на указанный момент не найден")
+    return rate
+
+
+@router.post("/currency-rates/convert", response_model=CurrencyConvertResponse)
+async def convert_by_historical_rates(
+    request_data: CurrencyConvertRequest,
+    current_admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Пересчет сумм и заказов в валюту по курсам на их моменты времени"""
+    currency_code = request_data.currency_code.upper()
+
+    converted = convert_amounts_at(
+        db, currency_code, [(item.amount_rub, item.at) for item in request_data.items]
+    )
+    totals = convert_order_totals(db, currency_code, request_data.order_ids)
+
+    return CurrencyConvertResponse(
+        currency_code=currency_code,
+        items=[
+            CurrencyConvertedAmount(amount_rub=item.amount_rub, at=item.at, rate_to_rub=rate, amount=amount)
+            for item, (rate, amount) in zip(request_data.items, converted)
+        ],
+        orders=[
+            CurrencyConvertedOrder(order_id=order_id, **totals[order_id])
+            for order_id in request_data.order_ids if order_id in totals
+        ]
+    )
@@ -1,17 +1,61 @@
 # app/routers/admin_orders.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import datetime
 from app.database import get_db
-from app.schemas.order import OrderDetailResponse, OrderListResponse, OrderListItem, OrderStatusUpdate
-from app.crud.order import get_all_orders, count_orders, get_order_by_id, update_order_status, delete_order
+from app.schemas.order import OrderDetailResponse, OrderListResponse, OrderListItem, OrderStatusUpdate, \
+    OrderBulkStatusUpdate, OrderBulkStatusResponse
+from app.crud.order import get_orders_admin_page, get_order_by_id, update_order_status, delete_order, \
+    bulk_update_order_status, MAX_BULK_ORDERS
 from app.models.order import OrderStatus
+from app.order_export import EXPORT_FORMATS, iter_order_export
 from app.auth.jwt import get_current_admin_user
 from app.models.user import User
 
 router = APIRouter()
 
 
+@router.get("/orders/export")
+async def admin_export_orders(
+        format: str = Query("csv", pattern="^(csv|jsonl)$", description="Формат выгрузки: csv или jsonl"),
+        status: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
+        current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Потоковая выгрузка заказов с товарами для бухгалтерии (только для администраторов).
+
+    Объем выгрузки не ограничен: данные читаются серверным курсором и
+    отдаются по мере чтения.
+    """
+    order_status = None
+    if status:
+        try:
+            order_status = OrderStatus(status)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Неверный статус: {status}"
+            )
+
+    print(f"📤 Admin exporting orders: format={format}, status={status}, {date_from} — {date_to}")
+
+    filename = f"orders_{date_from or 'all'}_{date_to or 'all'}.{format}"
+    return StreamingResponse(
+        iter_order_export(
+            format,
+            status=order_status,
+            date_from=datetime.datetime.combine(date_from, datetime.time.min) if date_from else None,
+            date_to=datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min) if date_to else None
+        ),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/orders/{order_id}")
 async def admin_get_order(
         order_id: int,
@@ -79,6 +123,8 @@ async def admin_get_orders(
         page: int = Query(1, ge=1),
         limit: int = Query(20, ge=1, le=100),
         status: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_admin_user)
 ):
@@ -93,21 +139,26 @@ async def admin_get_orders(
             order_status = OrderStatus(status)
         except ValueError:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
+                status_code=400,
                 detail=f"Неверный статус: {status}"
             )
 
-    # Получаем заказы
+    # Получаем страницу заказов вместе с количеством товаров одним запросом
     skip = (page - 1) * limit
-    orders = get_all_orders(db, skip=skip, limit=limit, status=order_status)
-    total_count = count_orders(db, status=order_status)
+    orders, total_count = get_orders_admin_page(
+        db,
+        status=order_status,
+        date_from=datetime.datetime.combine(date_from, datetime.time.min) if date_from else None,
+        date_to=datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min) if date_to else None,
+        skip=skip,
+        limit=limit
+    )
 
     print(f"📊 Found {len(orders)} orders, total: {total_count}")
 
     # Формируем ответ
     order_items = []
-    for order in orders:
-        items_count = sum(item.quantity for item in order.items)
+    for order, items_count in orders:
         order_items.append({
             "id": order.id,
             "order_number": order.order_number,
@@ -198,6 +249,45 @@ async def admin_update_order_status(
         )
 
 
+@router.post("/orders/bulk-status", response_model=OrderBulkStatusResponse)
+async def admin_bulk_update_order_status(
+        bulk_data: OrderBulkStatusUpdate,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Массово обновить статус заказов по ID и/или номерам (только для администраторов).
+
+    Все заказы обновляются одним запросом. Заказы, для которых переход в
+    новый статус недопустим, не меняются — результат возвращается по каждому
+    заказу отдельно.
+    """
+    requested_count = len(bulk_data.order_ids) + len(bulk_data.order_numbers)
+    if not requested_count:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Не указаны заказы"
+        )
+    if requested_count > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Можно обновить не более {MAX_BULK_ORDERS} заказов за раз"
+        )
+
+    new_status = OrderStatus(bulk_data.status.value)
+    print(f"🔄 Admin bulk updating {requested_count} orders to: {new_status.value}")
+
+    results = bulk_update_order_status(db, new_status, bulk_data.order_ids, bulk_data.order_numbers)
+    updated_count = sum(1 for result in results if result["result"] == "updated")
+
+    print(f"✅ Bulk status update: {updated_count} of {len(results)} orders updated")
+    return {
+        "status": new_status.value,
+        "updated_count": updated_count,
+        "results": results
+    }
+
+
 @router.put("/orders/{order_id}/status")
 async def admin_update_order_status_put(
         order_id: int,
@@ -1,14 +1,18 @@
 # app/routers/admin_users.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from app.database import get_db
 from app.schemas.user import UserCreate, UserResponse, UserListResponse, UserListItem, UserUpdate, UserPasswordChange, \
     UserRole
 from app.crud.user import create_user, get_user_by_email, get_user_by_username, get_all_users, update_user, \
-    change_user_password, count_users, get_user_by_id
+    change_user_password, count_users, get_user_by_id, get_users_page, count_users_filtered
 from app.auth.jwt import get_current_admin_user, get_current_superadmin_user
+from app.auth.principal_cache import principal_cache
+from app.auth.login_throttle import login_throttle
 from app.models.user import User
+from app.config import settings
 
 router = APIRouter()
 
@@ -43,8 +47,9 @@ async def admin_create_user(
             detail="Только суперадминистратор может создавать администраторов"
         )
 
-    # Создаем пользователя
-    return create_user(
+    # Создаем пользователя (хеширование пароля — в пуле потоков)
+    return await run_in_threadpool(
+        create_user,
         db=db,
         email=user_data.email,
         username=user_data.username,
@@ -58,18 +63,29 @@ async def admin_create_user(
 
 @router.get("/users", response_model=UserListResponse)
 async def admin_get_users(
-        skip: int = 0,
-        limit: int = 100,
+        q: Optional[str] = Query(None, max_length=100, description="Поиск по email, имени пользователя и ФИО"),
+        search_mode: str = Query("prefix", pattern="^(prefix|substring)$", description="prefix или substring"),
+        role: Optional[UserRole] = None,
+        is_active: Optional[bool] = None,
+        cursor: Optional[int] = Query(None, description="next_cursor предыдущей страницы"),
+        limit: int = Query(50, ge=1, le=100),
+        skip: int = Query(0, ge=0, deprecated=True),
         db: Session = Depends(get_db),
         _: User = Depends(get_current_admin_user)
 ):
-    """Получить список всех пользователей (только для администраторов)"""
-    users = get_all_users(db, skip=skip, limit=limit)
-    total = count_users(db)
+    """Получить список пользователей с поиском и фильтрами (только для администраторов)"""
+    filters = dict(search=q, search_mode=search_mode, role=role, is_active=is_active)
+
+    users, next_cursor = get_users_page(db, **filters, after_id=cursor, limit=limit, skip=skip)
+    total, is_estimate = count_users_filtered(
+        db, **filters, exact_threshold=settings.USERS_EXACT_COUNT_THRESHOLD
+    )
 
     return UserListResponse(
-        users=[UserListItem.from_orm(user) for user in users],
-        total_count=total
+        users=[UserListItem.model_validate(user) for user in users],
+        total_count=total,
+        total_is_estimate=is_estimate,
+        next_cursor=next_cursor
     )
 
 
@@ -173,7 +189,7 @@ async def admin_change_password(
             detail="Пользователь не найден"
         )
 
-    change_user_password(db, user_id, password_data.new_password)
+    await run_in_threadpool(change_user_password, db, user_id, password_data.new_password)
 
     return {"message": "Пароль успешно изменен"}
 
@@ -203,7 +219,8 @@ async def superadmin_create_user(
         )
 
     # Создаем пользователя (суперадмин может создавать пользователей с любой ролью)
-    return create_user(
+    return await run_in_threadpool(
+        create_user,
         db=db,
         email=user_data.email,
         username=user_data.username,
@@ -212,4 +229,16 @@ async def superadmin_create_user(
         notes=user_data.notes,
         role=user_data.role,
         created_by=current_superadmin.id
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/auth-cache/stats")
+async def admin_get_auth_cache_stats(_: User = Depends(get_current_admin_user)):
+    """Метрики кэша аутентифицированных пользователей в текущем процессе (только для администраторов)"""
+    return principal_cache.stats()
+
+
+@router.get("/login-throttle/stats")
+async def admin_get_login_throttle_stats(_: User = Depends(get_current_admin_user)):
+    """Счетчики ограничения попыток входа в текущем процессе (только для администраторов)"""
+    return login_throttle.stats()
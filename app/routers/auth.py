@@ -5,8 +5,9 @@ from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.database import get_db
 from app.schemas.user import Token, UserResponse
-from app.crud.user import authenticate_user
+from app.crud.user import authenticate_user_async
 from app.auth.jwt import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_user
+from app.auth.login_throttle import login_throttle, client_ip
 from app.models.user import User
 
 router = APIRouter()
@@ -14,13 +15,17 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login_for_access_token(
+        request: Request,
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: Session = Depends(get_db)
 ):
     """Вход в систему и получение токена доступа"""
     print(f"Попытка входа с username: {form_data.username}")
+
+    # Лимит попыток проверяется до обращения к БД и хеширования пароля
+    login_throttle.check(client_ip(request), form_data.username)
     
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         print(f"Аутентификация не удалась для username: {form_data.username}")
         raise HTTPException(
@@ -30,6 +35,8 @@ async def login_for_access_token(
         )
 
     print(f"Аутентификация успешна для пользователя: {user.email} (роль: {user.role})")
+    # Лимит по имени пользователя расходуют только неудачные попытки
+    login_throttle.login_succeeded(form_data.username)
     
     if not user.is_active:
         print(f"Пользователь {user.email} неактивен")
@@ -40,7 +47,7 @@ async def login_for_access_token(
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email, "role": user.role},
+        data={"sub": user.email, "role": user.role, "uid": user.id, "ver": user.token_version or 0},
         expires_delta=access_token_expires
     )
     
@@ -20,6 +20,7 @@ from app.crud.cart import (
     get_cart_item_by_id,
 )
 from app.crud.product import convert_price, get_product_by_id
+from app.pricing import currency_symbol
 import uuid
 
 router = APIRouter()
@@ -82,7 +83,7 @@ async def get_cart(request: Request, response: Response, currency: str = "RUB",
     items_response = []
     total_items = 0
     total_price_value = 0
-    currency_symbol = "руб." if currency == "RUB" else "$"
+    symbol = currency_symbol(currency)
 
     for item in cart_items:
         product = get_product_by_id(db, item.product_id)
@@ -99,15 +100,15 @@ async def get_cart(request: Request, response: Response, currency: str = "RUB",
                     quantity=item.quantity,
                     comment=item.comment,
                     price=price_per_item,
-                    price_formatted=f"{price_per_item:.1f} {currency_symbol}".replace(".", ","),
+                    price_formatted=f"{price_per_item:.1f} {symbol}".replace(".", ","),
                     total_price=item_total,
-                    total_price_formatted=f"{item_total:.1f} {currency_symbol}".replace(".", ",")
+                    total_price_formatted=f"{item_total:.1f} {symbol}".replace(".", ",")
                 )
             )
             total_items += item.quantity
             total_price_value += item_total
 
-    return CartResponse(items=items_response, total_items=total_items, total_price=f"{total_price_value:.1f} {currency_symbol}".replace(".", ","))
+    return CartResponse(items=items_response, total_items=total_items, total_price=f"{total_price_value:.1f} {symbol}".replace(".", ","))
 
 @router.post("/cart/clear")
 async def clear_user_cart(request: Request, response: Response, db: Session = Depends(get_db), session: Optional[str] = Cookie(None)):
@@ -1,27 +1,33 @@
 # app/routers/order.py
-from fastapi import APIRouter, Depends, HTTPException, Cookie, Request, Response, status, Header
+from fastapi import APIRouter, Depends, HTTPException, Cookie, Request, Response, status, Header, Query
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database import get_db
 from app.schemas.order import OrderCreate, OrderDetailResponse, OrderListResponse, OrderListItem
 from app.crud.order import (
     create_order,
-    get_user_orders,
+    get_user_orders_page,
+    get_orders_admin_page,
     get_order_by_number,
-    get_user_orders_by_id,
     get_order_by_id,
     update_order_status
 )
+from app.crud.idempotency import (
+    IdempotencyClaimLost, claim_idempotency_key, complete_idempotency_key, release_idempotency_key
+)
+from app.idempotency import idempotency_scope, request_fingerprint, validate_idempotency_key, \
+    replay_idempotent_response
 from app.routers.cart import get_user_session
-from app.auth.jwt import get_current_user, get_current_active_user, get_current_admin_user
+from app.config import settings
+from app.auth.jwt import get_current_user, get_current_active_user, get_current_admin_user, principal_from_token
+from app.auth.principal_cache import UserPrincipal
 from app.models.order import OrderStatus
-from app.models.user import User
 import datetime
 
 router = APIRouter()
 
 
-def get_user_from_token(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Optional[User]:
+def get_user_from_token(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Optional[UserPrincipal]:
     """Получить пользователя из токена (опционально)"""
     if not authorization:
         return None
@@ -33,19 +39,8 @@ def get_user_from_token(authorization: Optional[str] = Header(None), db: Session
 
         token = authorization.split(" ")[1]
 
-        from jose import jwt
-        from app.config import settings
-
-        # Декодируем токен
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-
-        if not email:
-            return None
-
-        # Получаем пользователя из БД
-        user = db.query(User).filter(User.email == email).first()
-        return user
+        # Проверяем токен и получаем пользователя из кэша или БД
+        return principal_from_token(token, db)
 
     except Exception as e:
         print(f"Failed to get user from token: {e}")
@@ -60,9 +55,19 @@ async def create_new_order(
         db: Session = Depends(get_db),
         session: Optional[str] = Cookie(None),
         x_user_session: Optional[str] = Header(None, alias="X-User-Session"),
-        current_user: Optional[User] = Depends(get_user_from_token)
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+        current_user: Optional[UserPrincipal] = Depends(get_user_from_token)
 ):
-    """Создать новый заказ из товаров в корзине"""
+    """
+    Создать новый заказ из товаров в корзине.
+
+    Повторный запрос с тем же заголовком Idempotency-Key возвращает
+    сохраненный ответ первого запроса и не трогает корзину.
+    """
+    claimed_scope = None
+    claimed_key = None
+    claimed_until = None
+    committed = False
     try:
         print("=" * 50)
         print("🔍 CREATING ORDER - START")
@@ -73,6 +78,25 @@ async def create_new_order(
         user_session = x_user_session or get_user_session(request, response, session)
         print(f"🔍 Final user session: {user_session}")
 
+        if idempotency_key is not None:
+            validate_idempotency_key(idempotency_key)
+            fingerprint = request_fingerprint(
+                user_session,
+                current_user.id if current_user else None,
+                order_data.model_dump(mode="json")
+            )
+            # Ключ уникален в пределах пользователя (для гостя — сессии)
+            scope = idempotency_scope(current_user.id if current_user else None, user_session)
+            record, claimed = claim_idempotency_key(
+                db, scope, idempotency_key, fingerprint, settings.IDEMPOTENCY_LEASE_SECONDS
+            )
+            if not claimed:
+                print(f"🔁 Replaying response for Idempotency-Key: {idempotency_key}")
+                return await replay_idempotent_response(db, record, fingerprint)
+            claimed_scope = scope
+            claimed_key = idempotency_key
+            claimed_until = record.expires_at
+
         # Check cart items for this session
         from app.models.cart import CartItem
         cart_items = db.query(CartItem).filter(CartItem.user_session == user_session).all()
@@ -96,7 +120,8 @@ async def create_new_order(
             contact_phone=order_data.contact_phone,
             contact_email=order_data.contact_email,
             notes=order_data.notes,
-            user_id=user_id
+            user_id=user_id,
+            commit=False
         )
 
         print(f"✅ Order created: {order.order_number}")
@@ -126,14 +151,36 @@ async def create_new_order(
             "created_at": order.created_at.isoformat() if order.created_at else None
         }
 
+        # Заказ и ответ для ключа идемпотентности фиксируются одной транзакцией:
+        # повтор либо получит этот ответ, либо (если заказа нет) выполнится заново
+        if claimed_key:
+            complete_idempotency_key(
+                db, claimed_scope, claimed_key, claimed_until, status.HTTP_201_CREATED, result,
+                settings.IDEMPOTENCY_KEY_TTL_SECONDS
+            )
+        db.commit()
+        committed = True
+
         print("=" * 50)
         return result
 
+    except HTTPException:
+        raise
+
+    except IdempotencyClaimLost:
+        # Аренда ключа истекла, и его занял повторный запрос: этот заказ откатывается
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Запрос с этим ключом выполняется повторно")
+
     except ValueError as e:
         print(f"❌ ValueError: {str(e)}")
+        if claimed_key and not committed:
+            release_idempotency_key(db, claimed_scope, claimed_key, claimed_until)
         raise HTTPException(status_code=400, detail=str(e))
 
     except Exception as e:
+        if claimed_key and not committed:
+            release_idempotency_key(db, claimed_scope, claimed_key, claimed_until)
         print(f"❌ UNEXPECTED ERROR: {type(e).__name__}: {str(e)}")
         import traceback
         traceback.print_exc()
@@ -144,53 +191,54 @@ async def create_new_order(
 async def get_orders_list(
         request: Request,
         response: Response,
-        page: int = 1,
-        limit: int = 10,
+        page: int = Query(1, ge=1),
+        limit: int = Query(10, ge=1, le=100),
         search_date: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
         db: Session = Depends(get_db),
         session: Optional[str] = Cookie(None),
-        current_user: Optional[User] = Depends(get_user_from_token)
+        current_user: Optional[UserPrincipal] = Depends(get_user_from_token)
 ):
-    """Получить список заказов пользователя"""
+    """
+    Получить список заказов пользователя.
 
-    print(f"Getting orders - User: {current_user.id if current_user else 'Anonymous'}, Page: {page}, Limit: {limit}")
+    search_date (ДД.ММ.ГГГГ) выбирает заказы за один день, date_from/date_to
+    (ГГГГ-ММ-ДД, включительно) — за период.
+    """
 
-    # Получаем заказы в зависимости от авторизации
-    if current_user:
-        # Если пользователь авторизован, получаем заказы по user_id
-        orders = get_user_orders_by_id(db, current_user.id)
-        print(f"Found {len(orders)} orders for user_id: {current_user.id}")
-    else:
-        # Иначе по сессии
-        user_session = get_user_session(request, response, session)
-        orders = get_user_orders(db, user_session)
-        print(f"Found {len(orders)} orders for session: {user_session}")
+    print(f"Getting orders - User: {current_user.id if current_user else 'Anonymous'}, Page: {page}, Limit: {limit}")
 
-    # Фильтрация по дате, если указана
+    # Диапазон дат для фильтрации в базе данных
+    range_start = datetime.datetime.combine(date_from, datetime.time.min) if date_from else None
+    range_end = datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min) if date_to else None
     if search_date:
         try:
             search_date_obj = datetime.datetime.strptime(search_date, "%d.%m.%Y")
-            filtered_orders = []
-            for order in orders:
-                if order.created_at.date() == search_date_obj.date():
-                    filtered_orders.append(order)
-            orders = filtered_orders
-            print(f"Filtered to {len(orders)} orders for date: {search_date}")
+            range_start = search_date_obj
+            range_end = search_date_obj + datetime.timedelta(days=1)
         except ValueError:
             pass
 
-    # Подсчет общего количества
-    total_count = len(orders)
-
-    # Пагинация
-    start = (page - 1) * limit
-    end = start + limit
-    paginated_orders = orders[start:end]
+    # Получаем заказы в зависимости от авторизации
+    skip = (page - 1) * limit
+    if current_user:
+        # Если пользователь авторизован, получаем заказы по user_id
+        orders, total_count = get_user_orders_page(
+            db, user_id=current_user.id, date_from=range_start, date_to=range_end, skip=skip, limit=limit
+        )
+        print(f"Found {total_count} orders for user_id: {current_user.id}")
+    else:
+        # Иначе по сессии
+        user_session = get_user_session(request, response, session)
+        orders, total_count = get_user_orders_page(
+            db, user_session=user_session, date_from=range_start, date_to=range_end, skip=skip, limit=limit
+        )
+        print(f"Found {total_count} orders for session: {user_session}")
 
     # Формируем ответ
     order_items = []
-    for order in paginated_orders:
-        items_count = sum(item.quantity for item in order.items)
+    for order, items_count in orders:
         order_items.append({
             "id": order.id,
             "order_number": order.order_number,
@@ -221,7 +269,7 @@ async def get_order_details(
         response: Response,
         db: Session = Depends(get_db),
         session: Optional[str] = Cookie(None),
-        current_user: Optional[User] = Depends(get_user_from_token)
+        current_user: Optional[UserPrincipal] = Depends(get_user_from_token)
 ):
     """Получить детальную информацию о заказе"""
 
@@ -288,7 +336,7 @@ async def cancel_order(
         response: Response,
         db: Session = Depends(get_db),
         session: Optional[str] = Cookie(None),
-        current_user: Optional[User] = Depends(get_user_from_token)
+        current_user: Optional[UserPrincipal] = Depends(get_user_from_token)
 ):
     """Отменить заказ"""
 
@@ -331,15 +379,15 @@ async def cancel_order(
 
 @router.get("/admin/orders", dependencies=[Depends(get_current_admin_user)])
 async def get_all_orders_admin(
-        page: int = 1,
-        limit: int = 20,
+        page: int = Query(1, ge=1),
+        limit: int = Query(20, ge=1, le=100),
         status: Optional[str] = None,
+        date_from: Optional[datetime.date] = None,
+        date_to: Optional[datetime.date] = None,
         db: Session = Depends(get_db)
 ):
     """Получить все заказы (только для администраторов)"""
 
-    from app.crud.order import get_all_orders, count_orders
-
     # Преобразуем строку статуса в enum если указан
     order_status = None
     if status:
@@ -348,15 +396,20 @@ async def get_all_orders_admin(
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Неверный статус: {status}")
 
-    # Получаем заказы
+    # Получаем страницу заказов вместе с количеством товаров одним запросом
     skip = (page - 1) * limit
-    orders = get_all_orders(db, skip=skip, limit=limit, status=order_status)
-    total_count = count_orders(db, status=order_status)
+    orders, total_count = get_orders_admin_page(
+        db,
+        status=order_status,
+        date_from=datetime.datetime.combine(date_from, datetime.time.min) if date_from else None,
+        date_to=datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min) if date_to else None,
+        skip=skip,
+        limit=limit
+    )
 
     # Формируем ответ
     order_items = []
-    for order in orders:
-        items_count = sum(item.quantity for item in order.items)
+    for order, items_count in orders:
         order_items.append({
             "id": order.id,
             "order_number": order.order_number,
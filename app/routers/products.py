@@ -1,53 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.database import get_db
-from app.schemas.product import ProductCreate, ProductUpdate, ProductDetail, ProductListItem, ProductListResponse
-from app.crud.product import get_all_products, get_product_by_id, create_product, update_product, delete_product, \
-    count_products, convert_price, search_products, count_search_results, get_unique_brands, get_price_range
+from app.schemas.product import ProductCreate, ProductUpdate, ProductDetail, ProductListItem, ProductListResponse, \
+    HttpCachePurgeRequest, HttpCachePurgeResponse
+from app.crud.product import get_all_products, create_product, update_product, delete_product, \
+    count_products, search_products, count_search_results, get_unique_brands, get_price_range, load_product_detail
 from app.auth.jwt import get_current_admin_user
 from app.models.user import User
 from app.logger import api_logger
+from app.pricing import BASE_CURRENCY, currency_symbol, format_price, resolve_currency
+from app.product_detail_cache import product_detail_cache
+from app.http_cache import CATALOG_KEY, PRODUCT_FILTERS_KEY, PRODUCT_LIST_KEY, brand_key, currency_key, \
+    enqueue_cache_purge, product_key, tag_response
 
 router = APIRouter()
 
 
+def _request_currency(db: Session, currency: str) -> str:
+    """Код валюты из запроса или 400, если для нее нет активного курса"""
+    try:
+        return resolve_currency(db, currency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _list_item(product, price, currency: str) -> ProductListItem:
+    """Элемент списка товаров с ценой в валюте"""
+    return ProductListItem(
+        id=product.id,
+        name=product.name,
+        price=float(price),
+        price_formatted=format_price(float(price), currency),
+        currency=currency_symbol(currency),
+        updated_date=product.updated_at.strftime("%d.%m.%Y"),
+        default_quantity=1,
+        brand=product.brand,
+        volume=product.volume
+    )
+
+
 @router.get("/products", response_model=ProductListResponse)
 async def read_products(
-        currency: str = Query("RUB", description="Валюта (USD/RUB)"),
+        response: Response,
+        currency: str = Query(BASE_CURRENCY, description="Код валюты (RUB или валюта с активным курсом)"),
         page: int = Query(1, ge=1, description="Номер страницы"),
         per_page: int = Query(50, ge=1, le=100, description="Товаров на странице"),
         db: Session = Depends(get_db)
 ):
     """Получить список всех товаров с пагинацией"""
+    currency = _request_currency(db, currency)
+    tag_response(response, PRODUCT_LIST_KEY, currency_key(currency))
     try:
         offset = (page - 1) * per_page
-        products = get_all_products(db, skip=offset, limit=per_page)
+        products = get_all_products(db, skip=offset, limit=per_page, currency=currency)
         total_count = count_products(db)
 
-        product_items = []
-        for product in products:
-            try:
-                converted_price = convert_price(db, float(product.price_rub), currency)
-                currency_symbol = "руб." if currency == "RUB" else "$"
-
-                item = ProductListItem(
-                    id=product.id,
-                    name=product.name,
-                    price=converted_price,
-                    price_formatted=f"{converted_price:,.1f} {currency_symbol}",
-                    currency=currency_symbol,
-                    updated_date=product.updated_at.strftime("%d.%m.%Y"),
-                    default_quantity=1,
-                    brand=product.brand,
-                    volume=product.volume
-                )
-                product_items.append(item)
-
-            except ValueError:
-                # Обработка ошибки конвертации цены
-                api_logger.error(f"Ошибка конвертации цены для товара {product.id}")
-                pass
+        product_items = [_list_item(product, price, currency) for product, price in products]
 
         return ProductListResponse(
             products=product_items,
@@ -65,11 +75,12 @@ async def read_products(
 
 @router.get("/products/search", response_model=ProductListResponse)
 async def search_products_api(
+        response: Response,
         title: Optional[str] = None,
         brand: Optional[str] = None,
-        min_price: Optional[float] = None,
-        max_price: Optional[float] = None,
-        currency: str = Query("RUB", description="Валюта (USD/RUB)"),
+        min_price: Optional[float] = Query(None, description="Минимальная цена в валюте currency"),
+        max_price: Optional[float] = Query(None, description="Максимальная цена в валюте currency"),
+        currency: str = Query(BASE_CURRENCY, description="Код валюты (RUB или валюта с активным курсом)"),
         sort_by: str = Query("name", description="Поле для сортировки (name/price/date)"),
         sort_dir: str = Query("asc", description="Направление сортировки (asc/desc)"),
         page: int = Query(1, ge=1, description="Номер страницы"),
@@ -77,8 +88,13 @@ async def search_products_api(
         db: Session = Depends(get_db)
 ):
     """Расширенный поиск товаров"""
+    currency = _request_currency(db, currency)
+    tag_response(response, PRODUCT_LIST_KEY, currency_key(currency), brand_key(brand) if brand else None)
     try:
-        api_logger.info(f"Поиск товаров: title={title}, brand={brand}, min_price={min_price}, max_price={max_price}")
+        api_logger.info(
+            f"Поиск товаров: title={title}, brand={brand}, min_price={min_price}, max_price={max_price}, "
+            f"currency={currency}"
+        )
 
         offset = (page - 1) * per_page
 
@@ -91,7 +107,8 @@ async def search_products_api(
             sort_by=sort_by,
             sort_dir=sort_dir,
             skip=offset,
-            limit=per_page
+            limit=per_page,
+            currency=currency
         )
 
         total_count = count_search_results(
@@ -99,32 +116,11 @@ async def search_products_api(
             title=title,
             brand=brand,
             min_price=min_price,
-            max_price=max_price
+            max_price=max_price,
+            currency=currency
         )
 
-        product_items = []
-        for product in products:
-            try:
-                converted_price = convert_price(db, float(product.price_rub), currency)
-                currency_symbol = "руб." if currency == "RUB" else "$"
-
-                item = ProductListItem(
-                    id=product.id,
-                    name=product.name,
-                    price=converted_price,
-                    price_formatted=f"{converted_price:,.1f} {currency_symbol}",
-                    currency=currency_symbol,
-                    updated_date=product.updated_at.strftime("%d.%m.%Y"),
-                    default_quantity=1,
-                    brand=product.brand,
-                    volume=product.volume
-                )
-                product_items.append(item)
-
-            except ValueError:
-                # Обработка ошибки конвертации цены
-                api_logger.error(f"Ошибка конвертации цены для товара {product.id}")
-                pass
+        product_items = [_list_item(product, price, currency) for product, price in products]
 
         return ProductListResponse(
             products=product_items,
@@ -141,11 +137,17 @@ async def search_products_api(
 
 
 @router.get("/products/filters")
-async def get_filters(db: Session = Depends(get_db)):
+async def get_filters(
+        response: Response,
+        currency: str = Query(BASE_CURRENCY, description="Валюта диапазона цен"),
+        db: Session = Depends(get_db)
+):
     """Получить данные для фильтров (бренды, диапазон цен)"""
+    currency = _request_currency(db, currency)
+    tag_response(response, PRODUCT_FILTERS_KEY, currency_key(currency))
     try:
         brands = get_unique_brands(db)
-        min_price, max_price = get_price_range(db)
+        min_price, max_price = get_price_range(db, currency=currency)
 
         return {
             "brands": brands,
@@ -160,37 +162,38 @@ async def get_filters(db: Session = Depends(get_db)):
 
 
 @router.get("/products/{product_id}", response_model=ProductDetail)
-async def read_product(product_id: int, currency: str = "RUB", db: Session = Depends(get_db)):
-    """Получить детальную информацию о товаре по ID"""
-    product = get_product_by_id(db, product_id)
-    if product is None:
-        api_logger.warning(f"Товар с ID {product_id} не найден")
-        raise HTTPException(status_code=404, detail="Товар не найден")
-
+async def read_product(product_id: int, currency: str = BASE_CURRENCY, db: Session = Depends(get_db)):
+    """Получить детальную информацию о товаре по ID (из кэша карточек, при промахе — из БД)"""
     try:
-        # Конвертируем цену в нужную валюту
-        converted_price = convert_price(db, float(product.price_rub), currency)
-        currency_symbol = "руб." if currency == "RUB" else "$"
-
-        # Создаем объект с детальной информацией о товаре
-        product_detail = ProductDetail(
-            id=product.id,
-            name=product.name,
-            price=converted_price,
-            price_formatted=f"{converted_price:,.1f} {currency_symbol}",
-            currency=currency_symbol,
-            description=product.description,
-            brand=product.brand,
-            volume=product.volume,
-            created_at=product.created_at,
-            updated_at=product.updated_at
+        currency = resolve_currency(db, currency)
+        # Попадание отдается без пула потоков; промах загружается в пуле,
+        # одновременные промахи по товару ждут эту загрузку асинхронно
+        detail = await product_detail_cache.get_or_load(
+            product_id, currency, lambda: run_in_threadpool(load_product_detail, db, product_id, currency)
         )
-
-        return product_detail
     except ValueError as e:
         api_logger.error(f"Ошибка при получении информации о товаре {product_id}: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
+    if detail is None:
+        api_logger.warning(f"Товар с ID {product_id} не найден")
+        raise HTTPException(status_code=404, detail="Товар не найден")
+
+    response = Response(content=detail.body, media_type="application/json")
+    tag_response(
+        response, product_key(product_id), brand_key(detail.brand) if detail.brand else None, currency_key(currency)
+    )
+    return response
+
+
+@router.get("/admin/product-detail-cache/stats")
+async def get_product_detail_cache_stats(
+        top: int = Query(20, ge=1, le=1000, description="Сколько самых запрашиваемых товаров показать"),
+        current_user: User = Depends(get_current_admin_user)
+):
+    """Метрики кэша карточек товаров в текущем процессе, по товарам (только для администраторов)"""
+    return product_detail_cache.stats(top)
+
 
 @router.post("/admin/products", response_model=ProductDetail, status_code=status.HTTP_201_CREATED)
 async def create_product_api(
@@ -212,16 +215,12 @@ async def create_product_api(
             volume=product_data.volume
         )
 
-        # Конвертируем цену для ответа
-        currency = "RUB"
-        currency_symbol = "руб."
-
         return ProductDetail(
             id=new_product.id,
             name=new_product.name,
             price=float(new_product.price_rub),
-            price_formatted=f"{float(new_product.price_rub):,.1f} {currency_symbol}",
-            currency=currency_symbol,
+            price_formatted=format_price(float(new_product.price_rub), BASE_CURRENCY),
+            currency=currency_symbol(BASE_CURRENCY),
             description=new_product.description,
             brand=new_product.brand,
             volume=new_product.volume,
@@ -257,16 +256,12 @@ async def update_product_api(
         api_logger.warning(f"Товар с ID {product_id} не найден при попытке обновления")
         raise HTTPException(status_code=404, detail="Товар не найден")
 
-    # Конвертируем цену для ответа
-    currency = "RUB"
-    currency_symbol = "руб."
-
     return ProductDetail(
         id=updated_product.id,
         name=updated_product.name,
         price=float(updated_product.price_rub),
-        price_formatted=f"{float(updated_product.price_rub):,.1f} {currency_symbol}",
-        currency=currency_symbol,
+        price_formatted=format_price(float(updated_product.price_rub), BASE_CURRENCY),
+        currency=currency_symbol(BASE_CURRENCY),
         description=updated_product.description,
         brand=updated_product.brand,
         volume=updated_product.volume,
@@ -289,4 +284,29 @@ async def delete_product_api(
         api_logger.warning(f"Товар с ID {product_id} не найден при попытке удаления")
         raise HTTPException(status_code=404, detail="Товар не найден")
 
-    return {"message": "Товар успешно удален"}
\ No newline at end of file
+    return {"message": "Товар успешно удален"}
+
+
+@router.post("/admin/http-cache/purge", response_model=HttpCachePurgeResponse)
+async def purge_http_cache_api(
+        purge: HttpCachePurgeRequest,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Очистить фронтовой кэш по суррогатным ключам (только для администраторов).
+
+    Товары, бренды и валюты переводятся в ключи заголовка Surrogate-Key;
+    без параметров очищаются все ответы каталога. Очистка идет через outbox
+    и не выполняется, если не задан HTTP_CACHE_PURGE_URL.
+    """
+    keys = [product_key(product_id) for product_id in purge.product_ids]
+    keys += [brand_key(brand) for brand in purge.brands]
+    keys += [currency_key(currency) for currency in purge.currencies]
+    keys += [key.strip() for key in purge.keys if key.strip()]
+    keys = sorted(set(keys or [CATALOG_KEY]))
+
+    queued = enqueue_cache_purge(db, keys)
+    db.commit()
+    api_logger.info(f"Очистка фронтового кэша по ключам {' '.join(keys)}: {'в очереди' if queued else 'не настроена'}")
+    return HttpCachePurgeResponse(keys=keys, queued=queued)
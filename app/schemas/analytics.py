@@ -0,0 +1,35 @@
+# app/schemas/analytics.py
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+class SalesDayItem(BaseModel):
+    day: date
+    orders_count: int
+    revenue: float
+    cancelled_count: int
+    cancelled_revenue: float
+
+
+class SalesStatusItem(BaseModel):
+    status: str
+    orders_count: int
+    revenue: float
+
+
+class SalesProductItem(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    units: int
+    revenue: float
+
+
+class SalesSummaryResponse(BaseModel):
+    date_from: date
+    date_to: date
+    orders_count: int  # Без отмененных заказов
+    revenue: float  # Без отмененных заказов
+    days: List[SalesDayItem] = []
+    statuses: List[SalesStatusItem] = []
+    products: List[SalesProductItem] = []
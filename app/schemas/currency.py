@@ -1,5 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
+from typing import List, Optional
+
+# Максимум сумм и заказов в одном запросе пересчета
+MAX_CONVERT_ITEMS = 10000
 
 
 class CurrencyRateCreate(BaseModel):
@@ -12,7 +16,43 @@ class CurrencyRateResponse(BaseModel):
     currency_code: str
     rate_to_rub: float
     is_active: bool
+    valid_from: datetime
+    valid_to: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CurrencyConvertItem(BaseModel):
+    """Сумма в рублях на момент времени"""
+    amount_rub: float
+    at: datetime
+
+
+class CurrencyConvertRequest(BaseModel):
+    """Пересчет сумм и заказов в валюту по историческим курсам"""
+    currency_code: str
+    items: List[CurrencyConvertItem] = Field(default_factory=list, max_length=MAX_CONVERT_ITEMS)
+    order_ids: List[int] = Field(default_factory=list, max_length=MAX_CONVERT_ITEMS)
+
+
+class CurrencyConvertedAmount(BaseModel):
+    amount_rub: float
+    at: datetime
+    rate_to_rub: Optional[float] = None  # None, если курса на этот момент не было
+    amount: Optional[float] = None
+
+
+class CurrencyConvertedOrder(BaseModel):
+    order_id: int
+    total_amount_rub: float
+    created_at: datetime
+    rate_to_rub: Optional[float] = None
+    total_amount: Optional[float] = None
+
+
+class CurrencyConvertResponse(BaseModel):
+    currency_code: str
+    items: List[CurrencyConvertedAmount]
+    orders: List[CurrencyConvertedOrder]
@@ -70,3 +70,24 @@ class OrderListResponse(BaseModel):
 
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
+
+
+# Схемы для массового обновления статуса заказов
+class OrderBulkStatusUpdate(BaseModel):
+    status: OrderStatus
+    order_ids: List[int] = Field(default_factory=list)
+    order_numbers: List[str] = Field(default_factory=list)
+
+
+class OrderBulkStatusResult(BaseModel):
+    order_id: Optional[int] = None
+    order_number: Optional[str] = None
+    old_status: Optional[str] = None
+    status: Optional[str] = None
+    result: str  # updated, unchanged, invalid_transition, not_found
+
+
+class OrderBulkStatusResponse(BaseModel):
+    status: str
+    updated_count: int
+    results: List[OrderBulkStatusResult]
@@ -67,3 +67,17 @@ class ProductListResponse(BaseModel):
     per_page: int
     has_next: bool
     has_prev: bool
+
+
+class HttpCachePurgeRequest(BaseModel):
+    """Очистка фронтового кэша: товары, бренды, валюты или произвольные суррогатные ключи"""
+    product_ids: List[int] = Field(default_factory=list)
+    brands: List[str] = Field(default_factory=list)
+    currencies: List[str] = Field(default_factory=list)
+    keys: List[str] = Field(default_factory=list)
+
+
+class HttpCachePurgeResponse(BaseModel):
+    """Результат постановки очистки в очередь"""
+    keys: List[str]
+    queued: bool
@@ -60,6 +60,8 @@ class UserListItem(BaseModel):
 class UserListResponse(BaseModel):
     users: List[UserListItem]
     total_count: int
+    total_is_estimate: bool = False  # total_count — оценка планировщика
+    next_cursor: Optional[int] = None  # Передать как cursor для следующей страницы
 
 
 class Token(BaseModel):
@@ -0,0 +1,203 @@
+# app/warmup.py
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import configure_mappers
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.crud.currency import get_active_rate_map
+from app.crud.product import count_products, get_all_products, get_price_range, get_unique_brands
+from app.database import SessionLocal, engine
+from app.logger import app_logger
+from app.models.currency import BASE_CURRENCY
+
+
+class WarmupState:
+    """Состояние прогрева процесса для /health/ready"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.timings: Dict[str, float] = {}
+        self.errors: List[str] = []
+
+    def as_dict(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "timings": {step: round(seconds, 4) for step, seconds in self.timings.items()},
+            "errors": self.errors,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def open_pool_connections(count: int) -> int:
+    """
+    Открыть соединения пула заранее, чтобы первые запросы не ждали подключения к БД.
+
+    Соединения берутся из пула все сразу (иначе пул отдавал бы одно и то же
+    соединение) и затем возвращаются в него.
+
+    Args:
+        count: Сколько соединений открыть (не больше размера пула)
+
+    Returns:
+        int: Количество открытых соединений
+    """
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        count = min(count, pool_size())
+
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connection.exec_driver_sql("SELECT 1")
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def prime_caches() -> List[str]:
+    """
+    Заполнить кэши курсов, каталога и фильтров.
+
+    Первая страница каталога, количество товаров и диапазон цен
+    загружаются для рубля и каждой валюты с активным курсом.
+
+    Returns:
+        List[str]: Валюты, для которых прогрет каталог
+    """
+    configure_mappers()
+
+    db = SessionLocal()
+    try:
+        currencies = [BASE_CURRENCY] + sorted(get_active_rate_map(db))
+        count_products(db)
+        get_unique_brands(db)
+        for currency in currencies:
+            get_all_products(db, skip=0, limit=settings.WARMUP_CATALOG_PAGE_SIZE, currency=currency)
+            get_price_range(db, currency=currency)
+        return currencies
+    finally:
+        db.close()
+
+
+def _first_product_id() -> Optional[int]:
+    """ID любого товара для прогрева карточки товара"""
+    db = SessionLocal()
+    try:
+        products = get_all_products(db, skip=0, limit=settings.WARMUP_CATALOG_PAGE_SIZE, currency=BASE_CURRENCY)
+        return products[0][0].id if products else None
+    finally:
+        db.close()
+
+
+async def _asgi_get(app, path: str) -> int:
+    """
+    Выполнить GET-запрос к приложению внутри процесса, без сети.
+
+    Returns:
+        int: HTTP-статус ответа
+    """
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup"), (b"x-warmup", b"1")],
+        "client": ("127.0.0.1", 0),
+        "server": ("warmup", 80),
+    }
+    status = {}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Ответ уже получен — ждать отключения клиента незачем
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status.get("code", 0)
+
+
+async def exercise_routes(app, currencies: List[str]) -> List[Tuple[str, int]]:
+    """
+    Вызвать публичные маршруты по одному разу: маршрутизация, зависимости,
+    запросы ORM и сериализация ответов проходят первый (медленный) раз здесь.
+
+    Args:
+        app: Приложение FastAPI
+        currencies: Валюты для маршрутов с параметром {currency}
+
+    Returns:
+        List[Tuple[str, int]]: Путь и HTTP-статус ответа
+    """
+    product_id = await run_in_threadpool(_first_product_id)
+
+    results = []
+    for template in settings.WARMUP_PATHS:
+        if "{product_id}" in template and product_id is None:
+            continue
+        for currency in (currencies if "{currency}" in template else [BASE_CURRENCY]):
+            path = template.format(product_id=product_id, currency=currency)
+            results.append((path, await _asgi_get(app, path)))
+    return results
+
+
+async def run_warmup(app) -> None:
+    """
+    Прогрев процесса после запуска: пул соединений, кэши, маршруты.
+
+    Ошибки шагов логируются и не мешают запуску: после прогрева (даже
+    частичного) /health/ready отвечает 200.
+    """
+    warmup_state.started_at = time.perf_counter()
+    currencies = [BASE_CURRENCY]
+
+    async def step(name: str, coroutine):
+        started = time.perf_counter()
+        try:
+            return await coroutine
+        except Exception as e:
+            warmup_state.errors.append(f"{name}: {str(e)}")
+            app_logger.error(f"Ошибка прогрева ({name}): {str(e)}")
+        finally:
+            warmup_state.timings[name] = time.perf_counter() - started
+
+    opened = await step("pool", run_in_threadpool(open_pool_connections, settings.WARMUP_POOL_CONNECTIONS))
+    primed = await step("caches", run_in_threadpool(prime_caches))
+    if primed:
+        currencies = primed
+    routes = await step("routes", exercise_routes(app, currencies))
+
+    warmup_state.timings["total"] = time.perf_counter() - warmup_state.started_at
+    warmup_state.ready = True
+
+    failed = [f"{path} → {code}" for path, code in routes or [] if code >= 400]
+    app_logger.info(
+        f"Прогрев завершен за {warmup_state.timings['total']:.3f}s: "
+        + ", ".join(f"{name}={seconds:.3f}s" for name, seconds in warmup_state.timings.items() if name != "total")
+        + f"; соединений: {opened or 0}, валюты: {', '.join(currencies)}, маршрутов: {len(routes or [])}"
+    )
+    if failed:
+        app_logger.warning(f"Маршруты с ошибкой при прогреве: {', '.join(failed)}")
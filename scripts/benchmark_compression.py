@@ -0,0 +1,185 @@
+# scripts/benchmark_compression.py
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.compression import brotli
+from app.config import settings
+
+# Ответы для замера: публичные страницы и админские списки ({product_id} — первый товар)
+PATHS = [
+    "/api/products?per_page=20",
+    "/api/products?per_page=100",
+    "/api/products/search?sort_by=price&per_page=100",
+    "/api/products/filters",
+    "/api/products/{product_id}",
+    "/api/admin/orders?limit=100",
+    "/api/admin/users?limit=100",
+]
+
+# Кодировка и уровень сжатия
+LEVELS = [("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 5), ("br", 11)]
+
+
+async def _fetch(app, path: str, headers: dict) -> tuple:
+    """GET-запрос к приложению внутри процесса без сжатия; возвращает (статус, тело)"""
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": raw_path, "raw_path": raw_path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": [(b"accept-encoding", b"identity")] + [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+    }
+    status, chunks = {}, []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status.get("code", 0), b"".join(chunks)
+
+
+def _admin_headers() -> dict:
+    """Заголовок авторизации администратора из БД (пустой, если администраторов нет)"""
+    from app.auth.jwt import create_access_token
+    from app.database import SessionLocal
+    from app.models.user import User, UserRole
+
+    db = SessionLocal()
+    try:
+        admin = db.query(User).filter(User.role.in_([UserRole.ADMIN, UserRole.SUPERADMIN])).first()
+        if admin is None:
+            return {}
+        token = create_access_token(
+            data={"sub": admin.email, "role": admin.role, "uid": admin.id, "ver": admin.token_version or 0}
+        )
+        return {"Authorization": f"Bearer {token}"}
+    finally:
+        db.close()
+
+
+def fetch_bodies(paths: list) -> list:
+    """Тела ответов без сжатия; недоступные пути (не 200) пропускаются"""
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.product import Product
+
+    db = SessionLocal()
+    try:
+        product_id = db.query(Product.id).order_by(Product.id).limit(1).scalar()
+    finally:
+        db.close()
+    admin_headers = _admin_headers()
+
+    bodies = []
+    for template in paths:
+        path = template.format(product_id=product_id)
+        status, body = asyncio.run(_fetch(app, path, admin_headers if "/admin/" in path else {}))
+        if status == 200:
+            bodies.append((path, body))
+        else:
+            print(f"   {path}: пропущен (статус {status})")
+    return bodies
+
+
+def _compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _time_per_call(function, min_seconds: float) -> float:
+    """Среднее время одного вызова (повторяется не меньше min_seconds)"""
+    calls, started = 0, time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def benchmark(paths: list, min_seconds: float, output: Path = None) -> bool:
+    """
+    Сравнивает сжатие ответов: сэкономленные байты против затрат CPU.
+
+    Для каждого ответа и уровня сжатия печатает размер, экономию, время
+    сжатия и пропускную способность, а также цену попадания в кэш сжатых
+    вариантов (хеш тела вместо повторного сжатия).
+
+    Returns:
+        True если замер выполнен, иначе False
+    """
+    levels = [(encoding, level) for encoding, level in LEVELS if encoding != "br" or brotli is not None]
+    if brotli is None:
+        print("   brotli не установлен — замеряется только gzip")
+
+    bodies = fetch_bodies(paths)
+    if not bodies:
+        print("❌ Нет ответов для замера (пустая база?)")
+        return False
+
+    results = []
+    header = f"{'Ответ':<48} {'Сжатие':<8} {'Байт':>9} {'Экономия':>9} {'мс':>8} {'МБ/с':>8}"
+    print(header)
+    print("-" * len(header))
+    for path, body in bodies:
+        digest_seconds = _time_per_call(lambda: hashlib.blake2b(body, digest_size=16).digest(), min_seconds)
+        print(f"{path[:48]:<48} {'—':<8} {len(body):>9} {'':>9} {'':>8} {'':>8}")
+        for encoding, level in levels:
+            compressed = _compress(body, encoding, level)
+            seconds = _time_per_call(lambda: _compress(body, encoding, level), min_seconds)
+            saved = 1 - len(compressed) / len(body) if body else 0
+            current = (encoding == "gzip" and level == settings.COMPRESSION_GZIP_LEVEL) or \
+                      (encoding == "br" and level == settings.COMPRESSION_BROTLI_QUALITY)
+            label = f"{encoding}-{level}{'*' if current else ''}"
+            print(f"{'':<48} {label:<8} {len(compressed):>9} {saved:>8.1%} {seconds * 1000:>8.3f} "
+                  f"{len(body) / seconds / 1024 / 1024:>8.1f}")
+            results.append({
+                "path": path, "encoding": encoding, "level": level, "raw_bytes": len(body),
+                "compressed_bytes": len(compressed), "compress_ms": round(seconds * 1000, 4),
+            })
+        print(f"{'':<48} {'кэш':<8} {'':>9} {'':>9} {digest_seconds * 1000:>8.3f} "
+              f"{len(body) / digest_seconds / 1024 / 1024:>8.1f}")
+
+    print("\n* — текущие настройки (COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY); "
+          "«кэш» — хеш тела при попадании в кэш сжатых вариантов")
+    print("\nИтого по всем ответам:")
+    raw_total = sum(len(body) for _, body in bodies)
+    for encoding, level in levels:
+        rows = [row for row in results if row["encoding"] == encoding and row["level"] == level]
+        compressed_total = sum(row["compressed_bytes"] for row in rows)
+        ms_total = sum(row["compress_ms"] for row in rows)
+        print(f"   {f'{encoding}-{level}':<8} {raw_total:>9} → {compressed_total:>8} байт "
+              f"({1 - compressed_total / raw_total:.1%} экономии), {ms_total:.2f} мс CPU")
+
+    if output:
+        output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"💾 Результаты: {output}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замер сжатия ответов API: байты против CPU")
+    parser.add_argument("--path", action="append", help="Путь для замера (можно несколько; по умолчанию PATHS)")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Минимальное время замера одного варианта")
+    parser.add_argument("--output", type=Path, help="Файл результатов JSON")
+    args = parser.parse_args()
+
+    sys.exit(0 if benchmark(args.path or PATHS, args.min_seconds, args.output) else 1)
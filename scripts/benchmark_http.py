@@ -0,0 +1,335 @@
+# scripts/benchmark_http.py
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.generate_data import BRANDS, generate
+
+PROJECT_ROOT = Path(__file__).parent.parent
+ADMIN_EMAIL = "benchmark-admin@example.com"
+ADMIN_PASSWORD = "benchmark-password"
+
+# Бренды для поиска — самые частые у генератора данных
+SEARCH_BRANDS = [latin for latin, _ in BRANDS[:8]]
+
+# Сценарии нагрузки: имя → доля запросов
+SCENARIOS = {
+    "products": 30,
+    "search": 20,
+    "detail": 25,
+    "cart": 10,
+    "order": 5,
+    "admin_orders": 5,
+    "admin_users": 5,
+}
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed_database(products: int, orders: int, users: int) -> dict:
+    """
+    Заполняет пустую базу генератором scripts/generate_data.py и добавляет администратора.
+
+    Args:
+        products: Количество товаров
+        orders: Количество заказов
+        users: Количество пользователей для списка в админке
+
+    Returns:
+        dict: Количество созданных строк по таблицам
+    """
+    from sqlalchemy import select
+    from app.crud.user import create_user
+    from app.database import Base, SessionLocal, engine
+    from app.models import Product
+    from app.models.user import UserRole
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.execute(select(Product.id).limit(1)).first() is not None:
+            print("   База уже заполнена, генерация пропущена")
+            return {}
+
+        result = generate(products=products, orders=orders, users=users, verbose=False)
+        create_user(db, ADMIN_EMAIL, "benchmark-admin", ADMIN_PASSWORD, "Benchmark Admin",
+                    role=UserRole.SUPERADMIN)
+        return result["rows"]
+    finally:
+        db.close()
+
+
+def start_server(database_url: str, port: int, workers: int, workdir: Path) -> subprocess.Popen:
+    """Запускает uvicorn с приложением в отдельном процессе и ждет /health/ready"""
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        QUERY_COUNT_HEADER="true",
+        LOG_LEVEL="WARNING",
+        CATALOG_SNAPSHOT_DIR=str(workdir / "catalog-snapshot"),
+        PYTHONPATH=str(PROJECT_ROOT.resolve()),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Сервер завершился при запуске")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            connection.request("GET", "/health/ready")
+            if connection.getresponse().status == 200:
+                return server
+        except OSError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Сервер не стал готов за 60 секунд")
+
+
+class LoadClient:
+    """Клиент одного потока нагрузки: постоянное соединение и запись замеров"""
+
+    def __init__(self, port: int, token: str, products: int, seed: int):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        self.admin_headers = {"Authorization": f"Bearer {token}"}
+        self.products = products
+        self.rng = random.Random(seed)
+        self.session = f"bench-{seed}"
+        self.samples = []
+
+    def request(self, scenario: str, method: str, path: str, body: dict = None, headers: dict = None) -> int:
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status, queries = response.status, response.getheader("X-Query-Count")
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            status, queries = 0, None
+        self.samples.append((scenario, time.perf_counter() - started, status,
+                             int(queries) if queries is not None else None))
+        return status
+
+    def run_scenario(self, scenario: str) -> None:
+        rng = self.rng
+        currency = rng.choice(["RUB", "RUB", "USD", "EUR"])
+        if scenario == "products":
+            pages = max(1, self.products // 50)
+            self.request(scenario, "GET", f"/api/products?page={rng.randint(1, min(pages, 20))}&currency={currency}")
+        elif scenario == "search":
+            query = urllib.parse.urlencode({
+                "brand": rng.choice(SEARCH_BRANDS), "min_price": rng.choice([0, 500, 1000]),
+                "sort_by": rng.choice(["name", "price", "date"]), "currency": "RUB",
+            })
+            self.request(scenario, "GET", f"/api/products/search?{query}")
+        elif scenario == "detail":
+            self.request(scenario, "GET", f"/api/products/{rng.randint(1, self.products)}?currency={currency}")
+        elif scenario == "cart":
+            self.request(scenario, "GET", "/api/cart", headers={"X-User-Session": self.session})
+        elif scenario == "order":
+            session = {"X-User-Session": f"{self.session}-{len(self.samples)}"}
+            self.request("cart_add", "POST", "/api/cart/add",
+                         {"id": rng.randint(1, self.products), "count": rng.randint(1, 3)}, session)
+            self.request(scenario, "POST", "/api/orders", {
+                "customer_name": "Benchmark", "contact_phone": "+70000000000",
+                "contact_email": "benchmark@example.com"
+            }, session)
+        elif scenario == "admin_orders":
+            self.request(scenario, "GET", f"/api/admin/orders?page={rng.randint(1, 20)}", headers=self.admin_headers)
+        elif scenario == "admin_users":
+            self.request(scenario, "GET", "/api/admin/users?limit=50", headers=self.admin_headers)
+
+
+def login(port: int) -> str:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    connection.request(
+        "POST", "/api/auth/login",
+        body=urllib.parse.urlencode({"username": ADMIN_EMAIL, "password": ADMIN_PASSWORD}),
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    response = connection.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"Не удалось войти администратором: {response.status} {response.read()[:200]}")
+    return json.loads(response.read())["access_token"]
+
+
+def run_load(port: int, token: str, products: int, concurrency: int, duration: float, warmup: float) -> tuple:
+    """
+    Нагрузка смесью сценариев SCENARIOS из concurrency потоков.
+
+    Returns:
+        tuple: (замеры после прогрева, длительность замера в секундах)
+    """
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name] for name in names]
+    clients = [LoadClient(port, token, products, seed) for seed in range(concurrency)]
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    def worker(client: LoadClient):
+        warm = True
+        while time.perf_counter() < deadline:
+            if warm and time.perf_counter() >= measure_from:
+                client.samples.clear()
+                warm = False
+            client.run_scenario(client.rng.choices(names, weights)[0])
+
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [sample for client in clients for sample in client.samples], duration
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """p50/p95/p99, RPS, ошибки и SQL-запросы на запрос по сценариям и в целом"""
+    def stats(rows: list) -> dict:
+        latencies = [latency for _, latency, _, _ in rows]
+        queries = [count for _, _, _, count in rows if count is not None]
+        return {
+            "requests": len(rows),
+            "errors": sum(1 for _, _, status, _ in rows if status == 0 or status >= 400),
+            "rps": round(len(rows) / duration, 1),
+            "p50_ms": round(statistics.median(latencies) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+        }
+
+    by_scenario = {}
+    for sample in samples:
+        by_scenario.setdefault(sample[0], []).append(sample)
+    result = {name: stats(rows) for name, rows in sorted(by_scenario.items())}
+    if samples:
+        result["total"] = stats(samples)
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    print(f"{'Сценарий':<14} {'запросов':>9} {'ошибок':>7} {'RPS':>8} {'p50, мс':>9} {'p95, мс':>9} "
+          f"{'p99, мс':>9} {'SQL/запрос':>11}")
+    for name, row in results.items():
+        line = (f"{name:<14} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8} {row['p50_ms']:>9} "
+                f"{row['p95_ms']:>9} {row['p99_ms']:>9} {str(row['queries_per_request']):>11}")
+        previous = (baseline or {}).get(name)
+        if previous:
+            line += f"   RPS {row['rps'] - previous['rps']:+.1f}, p95 {row['p95_ms'] - previous['p95_ms']:+.2f} мс"
+        print(line)
+
+
+def benchmark(args) -> bool:
+    """
+    Запускает приложение на локальной БД, заполняет ее и измеряет задержки под нагрузкой.
+
+    Returns:
+        True если запросы выполнялись без ошибок, иначе False
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="benchmark-http-"))
+    database_url = args.database_url or f"sqlite:///{workdir / 'benchmark.db'}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["LOG_DIR"] = str(workdir / "logs")
+
+    print(f"📦 Заполнение базы: {args.products} товаров, {args.orders} заказов, {args.users} пользователей")
+    started = time.perf_counter()
+    seeded = seed_database(args.products, args.orders, args.users)
+    print(f"   {seeded or 'без изменений'} за {time.perf_counter() - started:.1f}s")
+
+    print(f"🚀 Запуск сервера: {args.workers} воркер(ов), порт {args.port}")
+    server = start_server(database_url, args.port, args.workers, workdir)
+    try:
+        token = login(args.port)
+        print(f"🔥 Нагрузка: {args.concurrency} потоков, прогрев {args.warmup}s, замер {args.duration}s")
+        samples, duration = run_load(args.port, token, args.products, args.concurrency, args.duration, args.warmup)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    results = summarize(samples, duration)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    output = Path(args.output) if args.output else (
+        PROJECT_ROOT / "benchmark-results" / f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{_git_commit()}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": _git_commit(),
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "database": database_url.split("://")[0],
+            "config": {
+                "products": args.products, "orders": args.orders, "users": args.users,
+                "workers": args.workers, "concurrency": args.concurrency,
+                "duration": args.duration, "warmup": args.warmup, "scenarios": SCENARIOS,
+            },
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"💾 Результаты: {output}")
+
+    total = results.get("total")
+    if not total or total["errors"]:
+        print(f"❌ Ошибок: {total['errors'] if total else 'нет замеров'}")
+        return False
+    print(f"✅ {total['requests']} запросов, {total['rps']} RPS")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк HTTP API")
+    parser.add_argument("--database-url", help="Пустая локальная БД (по умолчанию — временная SQLite)")
+    parser.add_argument("--products", type=int, default=5000, help="Количество товаров")
+    parser.add_argument("--orders", type=int, default=20000, help="Количество заказов")
+    parser.add_argument("--users", type=int, default=2000, help="Количество пользователей")
+    parser.add_argument("--workers", type=int, default=1, help="Воркеров uvicorn")
+    parser.add_argument("--concurrency", type=int, default=16, help="Параллельных клиентов")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность замера, с")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Прогрев перед замером, с")
+    parser.add_argument("--port", type=int, default=8765, help="Порт сервера")
+    parser.add_argument("--output", help="Файл результатов JSON (по умолчанию benchmark-results/<время>-<коммит>.json)")
+    parser.add_argument("--baseline", help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args()
+
+    sys.exit(0 if benchmark(args) else 1)
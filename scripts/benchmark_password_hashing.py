@@ -0,0 +1,105 @@
+# scripts/benchmark_password_hashing.py
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.auth.passwords import PasswordHashing
+
+
+def _percentile(values: list, percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run_logins(hashing: PasswordHashing, hashed_password: str, logins: int, legacy_salt: str = None) -> dict:
+    """Параллельно проверяет пароль logins раз через асинхронный интерфейс, как обработчик /login"""
+    latencies = []
+
+    async def login():
+        started = time.perf_counter()
+        assert await hashing.verify_async("benchmark-password", hashed_password, legacy_salt)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "logins_per_second": round(logins / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1)
+    }
+
+
+def benchmark(costs: list, logins: int, workers: int, max_concurrency: int, r: int, p: int) -> list:
+    """
+    Измеряет пропускную способность входа для каждого значения стоимости scrypt.
+
+    Для каждой стоимости замеряется время одного хеширования и пропускная
+    способность параллельных проверок пароля через пул потоков с тем же
+    ограничением параллельности, что и в приложении. Первой строкой идет
+    старый SHA-256 для сравнения.
+
+    Args:
+        costs: Значения параметра n
+        logins: Количество проверок пароля на каждую стоимость
+        workers: Потоков в пуле хеширования
+        max_concurrency: Максимум одновременных проверок
+        r: Размер блока scrypt
+        p: Параллелизм scrypt
+
+    Returns:
+        list: Результаты по каждой стоимости
+    """
+    results = []
+
+    legacy_salt = os.urandom(32).hex()
+    legacy_hash = hashlib.sha256(("benchmark-password" + legacy_salt).encode("utf-8")).hexdigest()
+    hashing = PasswordHashing(n=costs[0], r=r, p=p, workers=workers, max_concurrency=max_concurrency)
+    results.append({"algorithm": "sha256 (legacy)", "hash_ms": 0.0,
+                    **asyncio.run(_run_logins(hashing, legacy_hash, logins, legacy_salt))})
+
+    for n in costs:
+        hashing = PasswordHashing(n=n, r=r, p=p, workers=workers, max_concurrency=max_concurrency)
+        started = time.perf_counter()
+        hashed_password = hashing.hash("benchmark-password")
+        hash_ms = (time.perf_counter() - started) * 1000
+
+        results.append({"algorithm": f"scrypt n=2^{n.bit_length() - 1} r={r} p={p}", "hash_ms": round(hash_ms, 1),
+                        **asyncio.run(_run_logins(hashing, hashed_password, logins))})
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк хеширования паролей и пропускной способности входа")
+    parser.add_argument("--costs", type=int, nargs="+", default=[13, 14, 15, 16], help="Степени двойки для n")
+    parser.add_argument("--logins", type=int, default=100, help="Проверок пароля на каждую стоимость")
+    parser.add_argument("--workers", type=int, default=4, help="Потоков в пуле хеширования")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Максимум одновременных проверок")
+    parser.add_argument("--r", type=int, default=8, help="Размер блока scrypt")
+    parser.add_argument("--p", type=int, default=1, help="Параллелизм scrypt")
+    parser.add_argument("--json", help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    rows = benchmark([2 ** cost for cost in args.costs], args.logins, args.workers, args.max_concurrency, args.r, args.p)
+
+    print(f"{'Алгоритм':<28} {'хеш, мс':>8} {'вход/с':>9} {'p50, мс':>8} {'p95, мс':>8} {'p99, мс':>8}")
+    for row in rows:
+        print(f"{row['algorithm']:<28} {row['hash_ms']:>8} {row['logins_per_second']:>9} "
+              f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,81 @@
+# scripts/check_order_numbers.py
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.order_numbers import OrderNumberGenerator
+
+
+def check_order_numbers(count: int, digits: int, key: str) -> bool:
+    """
+    Проверяет, что генератор выдает номера без коллизий.
+
+    Генерирует count номеров для порядковых номеров 1..count и проверяет,
+    что все они уникальны, имеют фиксированную длину и не идут подряд.
+
+    Args:
+        count: Количество номеров для проверки
+        digits: Количество цифр в номере
+        key: Ключ перестановки
+
+    Returns:
+        True если проверка пройдена, иначе False
+    """
+    generator = OrderNumberGenerator(key=key, digits=digits)
+    if count >= generator.domain:
+        print(f"❌ Для {digits} цифр доступно не более {generator.domain - 1} номеров")
+        return False
+
+    # Битовая карта вместо множества строк: миллионы номеров в нескольких МБ
+    seen = bytearray(generator.domain // 8 + 1) if digits <= 9 else None
+    seen_large = set()
+    sequential = 0
+    previous = None
+
+    start = time.perf_counter()
+    for sequence in range(1, count + 1):
+        number = generator.format(sequence)
+        if len(number) != digits:
+            print(f"❌ Неверная длина номера {number} для {sequence}")
+            return False
+
+        value = int(number)
+        if seen is not None:
+            byte, bit = divmod(value, 8)
+            collision = seen[byte] & (1 << bit)
+            seen[byte] |= 1 << bit
+        else:
+            collision = value in seen_large
+            seen_large.add(value)
+        if collision:
+            print(f"❌ Коллизия: номер {number} для порядкового номера {sequence}")
+            return False
+
+        if previous is not None and value == previous + 1:
+            sequential += 1
+        previous = value
+
+    elapsed = time.perf_counter() - start
+
+    # Номера должны выглядеть случайными, а не идти подряд
+    if sequential > count // 1000:
+        print(f"❌ Слишком много последовательных номеров: {sequential}")
+        return False
+
+    print(f"✅ {count} номеров из {digits} цифр без коллизий")
+    print(f"   Время: {elapsed:.2f}s ({count / elapsed:,.0f} номеров/с)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка генератора номеров заказов")
+    parser.add_argument("--count", type=int, default=2_000_000, help="Количество номеров")
+    parser.add_argument("--digits", type=int, default=8, help="Количество цифр в номере")
+    parser.add_argument("--key", default="check-order-numbers", help="Ключ перестановки")
+    args = parser.parse_args()
+
+    sys.exit(0 if check_order_numbers(args.count, args.digits, args.key) else 1)
@@ -0,0 +1,144 @@
+# scripts/check_query_plans.py
+import datetime
+import json
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.crud.cart import get_cart_item, get_cart_items
+from app.crud.currency import get_active_currency_rate, get_currency_rate_at
+from app.crud.order import get_user_orders_page, get_orders_admin_page, get_order_by_number
+from app.crud.product import search_products
+from app.crud.user import get_user_by_email, get_users_page
+from app.models.order import OrderStatus
+
+# Горячие запросы: имя → (вызов CRUD-функции, допустимые индексы)
+HOT_QUERIES = {
+    "orders by user_id": (
+        lambda db: get_user_orders_page(db, user_id=1),
+        ("ix_orders_user_id_created_at",)
+    ),
+    "orders by user_session": (
+        lambda db: get_user_orders_page(db, user_session="check-session"),
+        ("ix_orders_user_session_created_at",)
+    ),
+    "orders by status": (
+        lambda db: get_orders_admin_page(db, status=OrderStatus.PENDING),
+        ("ix_orders_status_created_at",)
+    ),
+    "order by number": (
+        lambda db: get_order_by_number(db, "00000000"),
+        ("ix_orders_order_number",)
+    ),
+    "cart items by session": (
+        lambda db: get_cart_items(db, "check-session"),
+        ("ix_cart_items_user_session", "ix_cart_items_user_session_product_id")
+    ),
+    "cart item by session and product": (
+        lambda db: get_cart_item(db, "check-session", 1),
+        ("ix_cart_items_user_session_product_id",)
+    ),
+    "active currency rate": (
+        lambda db: get_active_currency_rate(db, "USD"),
+        ("ix_currency_rates_currency_code_is_active",)
+    ),
+    "currency rate at moment": (
+        lambda db: get_currency_rate_at(db, "USD", datetime.datetime(2026, 1, 1)),
+        ("ix_currency_rates_currency_code_valid_from",)
+    ),
+    "products by price range": (
+        lambda db: search_products(db, min_price=100, max_price=500, sort_by="price"),
+        ("ix_products_price_rub",)
+    ),
+    "products by price range in currency": (
+        lambda db: search_products(db, min_price=1, max_price=5, sort_by="price", currency="USD"),
+        ("ix_product_prices_currency_code_price",)
+    ),
+    "user by email": (
+        lambda db: get_user_by_email(db, "check@example.com"),
+        ("ix_users_email",)
+    ),
+    "users search by prefix": (
+        lambda db: get_users_page(db, search="check"),
+        ("ix_users_email_trgm", "ix_users_email_prefix")
+    ),
+}
+
+INDEX_NODES = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def _plan_indexes(node: dict) -> list:
+    """Собирает имена индексов из дерева плана EXPLAIN (FORMAT JSON)"""
+    found = []
+    if node.get("Node Type") in INDEX_NODES:
+        found.append(node.get("Index Name"))
+    for child in node.get("Plans", []):
+        found.extend(_plan_indexes(child))
+    return found
+
+
+def check_query_plans() -> bool:
+    """
+    Выполняет EXPLAIN для каждого горячего запроса и проверяет, что используется ожидаемый индекс.
+
+    CRUD-функции вызываются как есть, их SQL перехватывается на уровне
+    драйвера и повторяется с EXPLAIN. Последовательное сканирование
+    отключается (enable_seqscan = off), чтобы на маленькой или пустой базе
+    планировщик выбрал индекс, если он вообще применим.
+
+    Returns:
+        True если все запросы используют ожидаемые индексы, иначе False
+    """
+    if engine.dialect.name != "postgresql":
+        print("❌ Проверка планов поддерживается только для PostgreSQL")
+        return False
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    all_ok = True
+    db = SessionLocal()
+    try:
+        connection = db.connection()
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+        for name, (run_query, expected_indexes) in HOT_QUERIES.items():
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                run_query(db)
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+
+            indexes = []
+            for statement, parameters in list(captured):
+                plan = connection.exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + statement, parameters
+                ).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                indexes.extend(_plan_indexes(plan[0]["Plan"]))
+
+            used = ", ".join(sorted(set(indexes))) or "нет"
+            if any(index in indexes for index in expected_indexes):
+                print(f"✅ {name}: {used}")
+            else:
+                all_ok = False
+                print(f"❌ {name}: ожидался {' или '.join(expected_indexes)}, использованы индексы: {used}")
+    finally:
+        db.rollback()
+        db.close()
+
+    return all_ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
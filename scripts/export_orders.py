@@ -0,0 +1,69 @@
+# scripts/export_orders.py
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.models.order import OrderStatus
+from app.order_export import EXPORT_FORMATS, iter_order_export
+
+
+def export_orders(
+        output: str,
+        export_format: str,
+        date_from: datetime.date = None,
+        date_to: datetime.date = None,
+        status: OrderStatus = None
+) -> bool:
+    """
+    Выгружает заказы с товарами в файл или stdout.
+
+    Args:
+        output: Путь к файлу или "-" для stdout
+        export_format: csv или jsonl
+        date_from: Первый день периода
+        date_to: Последний день периода (включительно)
+        status: Статус для фильтрации
+
+    Returns:
+        True если выгрузка завершена, иначе False
+    """
+    started = time.perf_counter()
+    chunks = iter_order_export(
+        export_format,
+        status=status,
+        date_from=datetime.datetime.combine(date_from, datetime.time.min) if date_from else None,
+        date_to=datetime.datetime.combine(date_to + datetime.timedelta(days=1), datetime.time.min) if date_to else None
+    )
+
+    target = sys.stdout if output == "-" else open(output, "w", encoding="utf-8", newline="")
+    written = 0
+    try:
+        for chunk in chunks:
+            target.write(chunk)
+            written += len(chunk)
+    except Exception as e:
+        print(f"❌ Ошибка выгрузки: {e}", file=sys.stderr)
+        return False
+    finally:
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"✅ Выгружено {written:,} символов за {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Выгрузка заказов с товарами для бухгалтерии")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv", help="Формат выгрузки")
+    parser.add_argument("--date-from", type=datetime.date.fromisoformat, help="Первый день (ГГГГ-ММ-ДД)")
+    parser.add_argument("--date-to", type=datetime.date.fromisoformat, help="Последний день (ГГГГ-ММ-ДД)")
+    parser.add_argument("--status", type=OrderStatus, help="Статус заказа")
+    parser.add_argument("--output", default="-", help="Файл выгрузки (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    sys.exit(0 if export_orders(args.output, args.format, args.date_from, args.date_to, args.status) else 1)
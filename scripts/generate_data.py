@@ -0,0 +1,589 @@
+# scripts/generate_data.py
+import argparse
+import bisect
+import csv
+import datetime
+import io
+import itertools
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Бренды (латиница, кириллица) в порядке популярности: вес бренда ~ 1 / rank^BRAND_SKEW
+BRANDS = [
+    ("Tom Ford", "Том Форд"), ("Chanel", "Шанель"), ("Dior", "Диор"), ("Kilian", "Килиан"),
+    ("Creed", "Крид"), ("Amouage", "Амуаж"), ("Byredo", "Байредо"), ("Guerlain", "Герлен"),
+    ("Maison Francis Kurkdjian", "Мезон Франсис Куркджан"), ("Parfums de Marly", "Парфюм де Марли"),
+    ("Initio", "Инитио"), ("Xerjoff", "Ксерджофф"), ("Montale", "Монталь"), ("Mancera", "Мансера"),
+    ("Giorgio Armani", "Джорджио Армани"), ("Yves Saint Laurent", "Ив Сен Лоран"), ("Lancome", "Ланком"),
+    ("Hermes", "Гермес"), ("Prada", "Прада"), ("Givenchy", "Живанши"), ("Versace", "Версаче"),
+    ("Narciso Rodriguez", "Нарцисо Родригес"), ("Jo Malone", "Джо Малон"), ("Le Labo", "Ле Лабо"),
+    ("Nishane", "Нишан"), ("Memo", "Мемо"), ("Zielinski & Rozen", "Зелински и Розен"),
+    ("Escentric Molecules", "Эксцентрик Молекулс"), ("Juliette Has A Gun", "Джульетта с пистолетом"),
+    ("Ex Nihilo", "Экс Нихило"), ("Roja Dove", "Роджа Дав"), ("Clive Christian", "Клайв Кристиан"),
+    ("Frederic Malle", "Фредерик Малль"), ("Serge Lutens", "Серж Лютанс"), ("Diptyque", "Диптик"),
+    ("Penhaligon's", "Пенхалигонс"), ("Atelier Cologne", "Ателье Колонь"), ("Bvlgari", "Булгари"),
+    ("Carolina Herrera", "Каролина Эррера"), ("Paco Rabanne", "Пако Рабан"),
+]
+BRAND_SKEW = 1.1
+
+FRAGRANCE_WORDS = [
+    ("Black", "Блэк"), ("Orchid", "Орхид"), ("Oud", "Уд"), ("Wood", "Вуд"), ("Rose", "Роуз"),
+    ("Amber", "Амбер"), ("Vanilla", "Ванилла"), ("Tobacco", "Тобакко"), ("Leather", "Лезер"),
+    ("Velvet", "Вельвет"), ("Noir", "Нуар"), ("Intense", "Интенс"), ("Santal", "Сантал"),
+    ("Musk", "Маск"), ("Iris", "Ирис"), ("Neroli", "Нероли"), ("Cherry", "Черри"), ("Lost", "Лост"),
+    ("Royal", "Роял"), ("Imperial", "Империал"), ("Silver", "Сильвер"), ("Aventus", "Авентус"),
+    ("Baccarat", "Баккара"), ("Rouge", "Руж"), ("Sauvage", "Саваж"), ("Bleu", "Блю"),
+    ("Elixir", "Эликсир"), ("Absolu", "Абсолю"), ("Mojave", "Мохаве"), ("Ghost", "Гоуст"),
+]
+
+# Концентрации: (латиница, кириллица, множитель цены)
+CONCENTRATIONS = [
+    ("edp", "парфюмерная вода", 1.0),
+    ("edt", "туалетная вода", 0.8),
+    ("parfum", "духи", 1.4),
+    ("extrait", "экстракт", 1.6),
+    ("edc", "одеколон", 0.6),
+]
+CONCENTRATION_WEIGHTS = [50, 30, 10, 6, 4]
+
+# Объемы: (мл, вес, отливант ли это)
+VOLUMES = [(1.5, 10, True), (2, 18, True), (3, 8, True), (5, 16, True), (10, 10, True),
+           (30, 8, False), (50, 14, False), (75, 4, False), (100, 12, False)]
+
+# Доля заказов по статусам для заказов старше недели
+SETTLED_STATUS_WEIGHTS = {"DELIVERED": 86, "CANCELLED": 14}
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Иван", "Елена", "Сергей", "Ольга", "Алексей",
+               "Наталья", "Андрей", "Татьяна", "Максим", "Ирина", "Артем", "Екатерина", "Jalol", "Alex",
+               "Kamila", "Timur", "Aigerim", "Nikita", "Sofia", "Daniyar"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Васильев", "Петров", "Соколов", "Михайлов",
+              "Новиков", "Федоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Karimov", "Nazarbaev",
+              "Usmanov", "Abdullaev"]
+EMAIL_DOMAIN = "generated.example"
+
+# Курсы к рублю в начале периода и дневная волатильность
+CURRENCY_START_RATES = {"USD": 75.0, "EUR": 82.0, "KZT": 0.17}
+CURRENCY_VOLATILITY = 0.008
+CURRENCY_RATE_STEP_DAYS = 7
+
+# Таблицы в порядке загрузки (удаления — в обратном)
+GENERATED_TABLES = ("users", "products", "currency_rates", "orders", "order_items")
+DEPENDENT_TABLES = ("sales_daily_products", "sales_daily", "product_prices", "cart_items")
+
+MAINTENANCE_WORK_MEM = "512MB"
+
+COLUMNS = {
+    "users": ("id", "email", "username", "hashed_password", "salt", "full_name", "is_active", "role",
+              "token_version", "created_at", "updated_at"),
+    "products": ("id", "name", "price_rub", "brand", "volume", "description", "created_at", "updated_at"),
+    "currency_rates": ("id", "currency_code", "rate_to_rub", "is_active", "valid_from", "valid_to",
+                       "created_at", "updated_at"),
+    "orders": ("id", "order_number", "user_session", "user_id", "status", "total_amount", "customer_name",
+               "contact_phone", "contact_email", "notes", "created_at", "updated_at"),
+    "order_items": ("id", "order_id", "product_id", "quantity", "price", "comment"),
+}
+
+
+def _cumulative(weights: Iterable[float]) -> List[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _timestamp(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Суточный профиль заказов: ночью мало, пик вечером
+_HOUR_WEIGHTS = [1, 1, 1, 1, 1, 1, 2, 3, 4, 5, 6, 7, 8, 8, 7, 7, 7, 8, 9, 10, 11, 10, 7, 4]
+_HOUR_CUM_WEIGHTS = _cumulative(_HOUR_WEIGHTS)
+
+
+class DataGenerator:
+    """
+    Детерминированный генератор данных магазина.
+
+    Все значения берутся из одного random.Random(seed) в фиксированном
+    порядке, а даты отсчитываются от end_date, а не от текущего времени:
+    одинаковые параметры всегда дают одинаковые строки.
+    """
+
+    def __init__(self, seed: int = 42, end_date: datetime.date = datetime.date(2026, 1, 1), days: int = 730,
+                 growth: float = 3.0):
+        """
+        Args:
+            seed: Начальное значение генератора случайных чисел
+            end_date: День после последнего заказа
+            days: Длина периода с заказами
+            growth: Во сколько раз заказов в конце периода больше, чем в начале (минус 1)
+        """
+        self.rng = random.Random(seed)
+        self.end = datetime.datetime.combine(end_date, datetime.time.min)
+        self.start = self.end - datetime.timedelta(days=days)
+        self.days = days
+        self.growth = growth
+        self.product_prices: List[float] = []
+        self.product_cum_weights: List[float] = []
+        self.user_count = 0
+        self._day_prefixes = [f"{self.start.date() + datetime.timedelta(days=day)} " for day in range(days + 1)]
+
+    # --- Товары ---
+
+    def products(self, count: int) -> Iterator[tuple]:
+        """
+        Строки products: перекос популярности брендов, названия на латинице,
+        кириллице и вперемешку, отливанты и полные флаконы с ценой по объему.
+
+        Попутно запоминает цены и популярность товаров для заказов.
+        """
+        rng = self.rng
+        brand_cum = _cumulative(1 / rank ** BRAND_SKEW for rank in range(1, len(BRANDS) + 1))
+        concentration_cum = _cumulative(CONCENTRATION_WEIGHTS)
+        volume_cum = _cumulative(weight for _, weight, _ in VOLUMES)
+        created_span = self.days * 86400
+
+        self.product_prices = [0.0] * (count + 1)
+        for product_id in range(1, count + 1):
+            brand_latin, brand_cyrillic = BRANDS[bisect.bisect(brand_cum, rng.random() * brand_cum[-1])]
+            words = rng.sample(FRAGRANCE_WORDS, rng.randint(1, 2))
+            concentration_latin, concentration_cyrillic, price_factor = CONCENTRATIONS[
+                bisect.bisect(concentration_cum, rng.random() * concentration_cum[-1])
+            ]
+            volume_ml, _, is_decant = VOLUMES[bisect.bisect(volume_cum, rng.random() * volume_cum[-1])]
+            volume_text = f"{volume_ml:g}"
+
+            style = rng.random()
+            if style < 0.5:
+                name = (f"{brand_latin} {' '.join(w[0] for w in words)} "
+                        f"{concentration_latin} {volume_text} ml")
+            elif style < 0.8:
+                name = (f"{brand_cyrillic} {' '.join(w[1] for w in words)} "
+                        f"{concentration_cyrillic} {volume_text} мл")
+            else:
+                name = (f"{brand_latin} - {' '.join(w[0] for w in words)} "
+                        f"{concentration_cyrillic.capitalize()} {volume_text} мл")
+            if is_decant:
+                name += " ОТЛИВАНТ"
+
+            # Цена полного флакона 100 мл — логнормальная (медиана ~15 000 руб.),
+            # отливанты дороже в пересчете на миллилитр
+            bottle_price = rng.lognormvariate(9.6, 0.55) * price_factor
+            if is_decant:
+                price = round(bottle_price / 100 * volume_ml * 1.6 + 150, -1)
+            else:
+                price = round(bottle_price * (volume_ml / 100) ** 0.8, -2)
+            price = max(price, 100.0)
+            self.product_prices[product_id] = price
+
+            created_at = self._stamp(int(rng.random() * created_span))
+            yield (
+                product_id, name, price, brand_latin, f"{volume_text} мл",
+                f"{brand_latin} {words[0][0]}: {concentration_cyrillic}, {volume_text} мл.",
+                created_at, created_at,
+            )
+
+        # Популярность товаров в заказах: закон Ципфа по случайному порядку товаров
+        ranks = list(range(1, count + 1))
+        rng.shuffle(ranks)
+        self.product_cum_weights = _cumulative(1 / rank ** 0.9 for rank in ranks)
+
+    # --- Пользователи ---
+
+    def users(self, count: int) -> Iterator[tuple]:
+        """Строки users с ролью USER и адресами в домене EMAIL_DOMAIN"""
+        rng = self.rng
+        self.user_count = count
+        created_span = self.days * 86400
+        for user_id in range(1, count + 1):
+            full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            created_at = self._stamp(int(rng.random() * created_span))
+            yield (
+                user_id, f"user{user_id}@{EMAIL_DOMAIN}", f"user{user_id}", "-", None, full_name,
+                rng.random() > 0.03, "USER", 0, created_at, created_at,
+            )
+
+    # --- Курсы валют ---
+
+    def currency_rates(self) -> Iterator[tuple]:
+        """История курсов: новый курс раз в CURRENCY_RATE_STEP_DAYS дней, последний активен"""
+        rng = self.rng
+        rate_id = 0
+        for code, rate in CURRENCY_START_RATES.items():
+            moments = [self.start + datetime.timedelta(days=day)
+                       for day in range(0, self.days, CURRENCY_RATE_STEP_DAYS)]
+            for index, valid_from in enumerate(moments):
+                rate *= math.exp(rng.gauss(0, CURRENCY_VOLATILITY * math.sqrt(CURRENCY_RATE_STEP_DAYS)))
+                is_last = index == len(moments) - 1
+                rate_id += 1
+                yield (
+                    rate_id, code, round(rate, 4), is_last, _timestamp(valid_from),
+                    None if is_last else _timestamp(moments[index + 1]),
+                    _timestamp(valid_from), _timestamp(valid_from),
+                )
+
+    # --- Заказы ---
+
+    def _stamp(self, seconds: int) -> str:
+        """Метка времени через seconds секунд от начала периода (без datetime на каждую строку)"""
+        day, seconds = divmod(seconds, 86400)
+        hours, seconds = divmod(seconds, 3600)
+        return f"{self._day_prefixes[day]}{hours:02d}:{seconds // 60:02d}:{seconds % 60:02d}"
+
+    def _order_moment(self, index: int, count: int) -> int:
+        """
+        Момент заказа в секундах от начала периода: равномерная доля периода
+        пересчитывается через обратную функцию линейного роста, час — по суточному профилю.
+        """
+        rng = self.rng
+        share = (index + rng.random()) / count
+        if self.growth:
+            share = (math.sqrt(1 + self.growth * (2 + self.growth) * share) - 1) / self.growth
+        day = min(int(share * self.days), self.days - 1)
+        hour = bisect.bisect(_HOUR_CUM_WEIGHTS, rng.random() * _HOUR_CUM_WEIGHTS[-1])
+        return day * 86400 + hour * 3600 + int(rng.random() * 3600)
+
+    def _order_status(self, seconds: int) -> str:
+        """Статус зависит от возраста заказа: свежие еще в работе, старые доставлены или отменены"""
+        age_days = self.days - seconds / 86400
+        roll = self.rng.random()
+        if age_days < 1:
+            status = "PENDING" if roll < 0.6 else "PROCESSING" if roll < 0.9 else "CANCELLED"
+        elif age_days < 3:
+            status = "PROCESSING" if roll < 0.5 else "SHIPPED" if roll < 0.9 else "CANCELLED"
+        elif age_days < 7:
+            status = "SHIPPED" if roll < 0.4 else "DELIVERED" if roll < 0.88 else "CANCELLED"
+        else:
+            status = "DELIVERED" if roll * 100 < SETTLED_STATUS_WEIGHTS["DELIVERED"] else "CANCELLED"
+        return status
+
+    def orders(self, count: int, mean_items: float = 5.0, chunk_size: int = 50000) -> Iterator[Tuple[list, list]]:
+        """
+        Заказы и их позиции пачками по chunk_size заказов.
+
+        Число позиций — геометрическое распределение со средним mean_items,
+        товары выбираются по популярности, количество чаще всего 1. Треть
+        заказов оформлена зарегистрированными пользователями.
+
+        Yields:
+            Tuple[list, list]: Строки orders и order_items одной пачки
+        """
+        from app.models.order import OrderStatus
+        from app.order_numbers import order_number_generator
+
+        if not self.product_cum_weights:
+            raise ValueError("Сначала нужно сгенерировать товары")
+
+        rng = self.rng
+        random_ = rng.random
+        bisect_ = bisect.bisect
+        statuses = {status.name: status.value for status in OrderStatus}
+        cum_weights = self.product_cum_weights
+        total_weight = cum_weights[-1]
+        prices = self.product_prices
+        log_keep = math.log(1 - 1 / mean_items) if mean_items > 1 else None
+        item_id = 1
+
+        for chunk_start in range(0, count, chunk_size):
+            order_rows, item_rows = [], []
+            for index in range(chunk_start, min(chunk_start + chunk_size, count)):
+                order_id = index + 1
+                moment = self._order_moment(index, count)
+                size = 1 if log_keep is None else min(1 + int(math.log(1 - random_()) / log_keep), 40)
+
+                total = 0.0
+                # Повторно выбранный товар не дает второй позиции: размер заказа чуть меньше size
+                for product_id in {bisect_(cum_weights, random_() * total_weight) + 1 for _ in range(size)}:
+                    roll = random_()
+                    quantity = 1 if roll < 0.82 else 2 if roll < 0.96 else 3 + int(random_() * 3)
+                    price = prices[product_id]
+                    total += quantity * price
+                    item_rows.append((item_id, order_id, product_id, quantity, price, None))
+                    item_id += 1
+
+                user_id = 1 + int(random_() * self.user_count) if self.user_count and random_() < 0.33 else None
+                session = f"user-{user_id}" if user_id else f"guest-{rng.getrandbits(48):012x}"
+                customer = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                stamp = self._stamp(moment)
+                order_rows.append((
+                    order_id, order_number_generator.format(order_id), session, user_id,
+                    statuses[self._order_status(moment)], round(total, 2), customer,
+                    f"+79{int(random_() * 1e9):09d}", f"buyer{order_id}@{EMAIL_DOMAIN}",
+                    "Позвонить перед доставкой" if random_() < 0.05 else None, stamp, stamp,
+                ))
+            yield order_rows, item_rows
+
+
+class BulkLoader:
+    """
+    Пакетная загрузка строк: COPY FROM STDIN для PostgreSQL, executemany для остальных СУБД.
+
+    Все пачки пишутся в одной транзакции; commit выполняет вызывающий код.
+    """
+
+    def __init__(self, connection):
+        """
+        Args:
+            connection: Соединение SQLAlchemy (Connection) с открытой транзакцией
+        """
+        self.connection = connection
+        self.is_postgresql = connection.dialect.name == "postgresql"
+        self.rows_loaded = 0
+        self.seconds = 0.0
+
+    def load(self, table: str, rows: Sequence[tuple]) -> int:
+        """
+        Загрузить одну пачку строк в таблицу.
+
+        Args:
+            table: Имя таблицы из COLUMNS
+            rows: Строки в порядке COLUMNS[table]
+
+        Returns:
+            int: Количество загруженных строк
+        """
+        if not rows:
+            return 0
+        started = time.perf_counter()
+        columns = COLUMNS[table]
+        cursor = self.connection.connection.dbapi_connection.cursor()
+        try:
+            if self.is_postgresql:
+                # В CSV пустое значение без кавычек — NULL, поэтому в строках None, а не ""
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+                )
+            else:
+                placeholders = ", ".join("?" for _ in columns)
+                cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        finally:
+            cursor.close()
+        self.rows_loaded += len(rows)
+        self.seconds += time.perf_counter() - started
+        return len(rows)
+
+    def load_chunks(self, table: str, rows: Iterable[tuple], chunk_size: int) -> int:
+        """Загрузить строки из итератора пачками по chunk_size"""
+        loaded = 0
+        iterator = iter(rows)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return loaded
+            loaded += self.load(table, chunk)
+
+
+def _clear_tables(connection) -> None:
+    """Удалить ранее сгенерированные данные (и сводки, цены, корзины, зависящие от них)"""
+    from sqlalchemy import text
+
+    if connection.dialect.name == "postgresql":
+        tables = ", ".join(DEPENDENT_TABLES + GENERATED_TABLES)
+        connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+        return
+    for table in DEPENDENT_TABLES + tuple(reversed(GENERATED_TABLES)):
+        connection.execute(text(f"DELETE FROM {table}"))
+
+
+def _defer_indexes_and_foreign_keys(connection, tables: Sequence[str]) -> List[str]:
+    """
+    Удалить вторичные индексы и внешние ключи таблиц перед загрузкой (PostgreSQL).
+
+    Построить индекс и проверить внешний ключ один раз по всем загруженным
+    данным быстрее, чем обновлять индексы и запускать проверку на каждой
+    строке COPY. Первичные ключи и уникальные ограничения остаются.
+
+    Returns:
+        List[str]: Команды восстановления (сначала индексы, затем внешние ключи)
+    """
+    from sqlalchemy import text
+
+    indexes = connection.execute(text(
+        "SELECT i.indexname, i.indexdef FROM pg_indexes i "
+        "WHERE i.schemaname = current_schema() AND i.tablename = ANY(:tables) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname)"
+    ), {"tables": list(tables)}).all()
+    foreign_keys = connection.execute(text(
+        "SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid) FROM pg_constraint c "
+        "WHERE c.contype = 'f' AND (c.conrelid::regclass::text = ANY(:tables) "
+        "OR c.confrelid::regclass::text = ANY(:tables))"
+    ), {"tables": list(tables)}).all()
+
+    for table, name, _ in foreign_keys:
+        connection.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+    for name, _ in indexes:
+        connection.execute(text(f'DROP INDEX "{name}"'))
+    return [definition for _, definition in indexes] + [
+        f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}' for table, name, definition in foreign_keys
+    ]
+
+
+def _restore_ddl(connection, statements: Sequence[str]) -> None:
+    """Выполнить команды восстановления из _defer_indexes_and_foreign_keys"""
+    from sqlalchemy import text
+
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def _finish_postgresql(connection, orders: int) -> None:
+    """Сдвинуть последовательности после загрузки с явными id"""
+    from sqlalchemy import text
+    from app.models.order import order_number_seq
+
+    connection.execute(text("SELECT setval(:seq, :value)"), {"seq": order_number_seq.name, "value": orders + 1})
+    for table in GENERATED_TABLES:
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+        ))
+
+
+def generate(products: int, orders: int, users: int, mean_items: float = 5.0, seed: int = 42,
+             end_date: datetime.date = datetime.date(2026, 1, 1), days: int = 730,
+             chunk_size: int = 50000, truncate: bool = False, verbose: bool = True) -> dict:
+    """
+    Сгенерировать и загрузить данные, затем пересчитать цены в валютах и сводки продаж.
+
+    Args:
+        products: Количество товаров
+        orders: Количество заказов
+        users: Количество пользователей
+        mean_items: Среднее число позиций в заказе
+        seed: Начальное значение генератора
+        end_date: День после последнего заказа
+        days: Длина периода с заказами
+        chunk_size: Размер пачки загрузки (строк)
+        truncate: Удалить существующие пользователей, товары, заказы и курсы
+        verbose: Печатать ход загрузки
+
+    Returns:
+        dict: Количество строк по таблицам, время загрузки и скорость (строк/с)
+
+    Raises:
+        ValueError: Если таблицы не пусты и truncate не указан
+    """
+    from sqlalchemy import text
+    from app.crud.analytics import rebuild_sales_rollups
+    from app.crud.currency import rebuild_product_prices
+    from app.database import Base, SessionLocal, engine
+    from app.order_numbers import check_order_number_key
+
+    def report(message: str) -> None:
+        if verbose:
+            print(message, flush=True)
+
+    # Номера сгенерированных заказов строятся тем же ключом, что и в приложении
+    check_order_number_key(engine.dialect.name)
+    Base.metadata.create_all(bind=engine)
+    generator = DataGenerator(seed=seed, end_date=end_date, days=days)
+    counts = {}
+    started = time.perf_counter()
+
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            # Вне транзакции: до первого запроса соединения
+            connection.exec_driver_sql("PRAGMA synchronous = OFF")
+        if truncate:
+            _clear_tables(connection)
+        else:
+            for table in GENERATED_TABLES:
+                if connection.execute(text(f"SELECT 1 FROM {table} LIMIT 1")).first() is not None:
+                    raise ValueError(f"Таблица {table} не пуста (используйте --truncate)")
+
+        deferred_ddl = []
+        if connection.dialect.name == "postgresql":
+            deferred_ddl = _defer_indexes_and_foreign_keys(connection, GENERATED_TABLES)
+            # Память для построения индексов после загрузки
+            connection.exec_driver_sql(f"SET LOCAL maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+
+        loader = BulkLoader(connection)
+        counts["users"] = loader.load_chunks("users", generator.users(users), chunk_size)
+        counts["products"] = loader.load_chunks("products", generator.products(products), chunk_size)
+        counts["currency_rates"] = loader.load_chunks("currency_rates", generator.currency_rates(), chunk_size)
+        report(f"   users: {counts['users']}, products: {counts['products']}, "
+               f"currency_rates: {counts['currency_rates']}")
+
+        counts["orders"] = counts["order_items"] = 0
+        orders_per_chunk = max(1, int(chunk_size / (mean_items + 1)))
+        for order_rows, item_rows in generator.orders(orders, mean_items, orders_per_chunk):
+            counts["orders"] += loader.load("orders", order_rows)
+            counts["order_items"] += loader.load_chunks("order_items", item_rows, chunk_size)
+            elapsed = time.perf_counter() - started
+            report(f"   orders: {counts['orders']}/{orders}, order_items: {counts['order_items']} "
+                   f"({sum(counts.values()) / elapsed:,.0f} строк/с)")
+
+        if connection.dialect.name == "postgresql":
+            ddl_started = time.perf_counter()
+            _restore_ddl(connection, deferred_ddl)
+            report(f"   Индексы и внешние ключи ({len(deferred_ddl)}) восстановлены "
+                   f"за {time.perf_counter() - ddl_started:.1f}s")
+            _finish_postgresql(connection, counts["orders"])
+        connection.commit()
+
+    load_seconds = time.perf_counter() - started
+    report("   Пересчет цен в валютах и сводок продаж...")
+    db = SessionLocal()
+    try:
+        counts["product_prices"] = rebuild_product_prices(db)
+        db.commit()
+        if counts["orders"]:
+            rebuild_sales_rollups(db, generator.start.date(), (generator.end - datetime.timedelta(days=1)).date())
+        if engine.dialect.name == "postgresql":
+            db.execute(text("ANALYZE"))
+            db.commit()
+    finally:
+        db.close()
+
+    rows = sum(count for table, count in counts.items() if table in GENERATED_TABLES)
+    return {
+        "rows": counts,
+        "load_seconds": round(load_seconds, 2),
+        "total_seconds": round(time.perf_counter() - started, 2),
+        "rows_per_second": round(rows / load_seconds) if load_seconds else 0,
+    }
+
+
+def main() -> bool:
+    """Точка входа CLI: генерация данных с параметрами из командной строки"""
+    parser = argparse.ArgumentParser(description="Генерация реалистичных данных магазина для нагрузочных тестов")
+    parser.add_argument("--products", type=int, default=200000, help="Количество товаров")
+    parser.add_argument("--orders", type=int, default=2000000, help="Количество заказов")
+    parser.add_argument("--users", type=int, default=100000, help="Количество пользователей")
+    parser.add_argument("--items-per-order", type=float, default=5.0, help="Среднее число позиций в заказе")
+    parser.add_argument("--seed", type=int, default=42, help="Начальное значение генератора")
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date(2026, 1, 1),
+                        help="День после последнего заказа (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=730, help="Длина периода с заказами в днях")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Строк в одной пачке загрузки")
+    parser.add_argument("--truncate", action="store_true",
+                        help="Удалить существующих пользователей, товары, заказы и курсы перед загрузкой")
+    args = parser.parse_args()
+
+    print(f"🧪 Генерация: {args.products} товаров, {args.orders} заказов, {args.users} пользователей "
+          f"(seed={args.seed})")
+    try:
+        result = generate(
+            products=args.products, orders=args.orders, users=args.users, mean_items=args.items_per_order,
+            seed=args.seed, end_date=args.end_date, days=args.days, chunk_size=args.chunk_size,
+            truncate=args.truncate,
+        )
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        return False
+
+    rows = result["rows"]
+    print(f"✅ Загружено {sum(rows[table] for table in GENERATED_TABLES):,} строк за {result['load_seconds']}s "
+          f"({result['rows_per_second']:,} строк/с), всего {result['total_seconds']}s")
+    for table, count in rows.items():
+        print(f"   {table}: {count:,}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
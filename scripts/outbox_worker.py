@@ -0,0 +1,49 @@
+# scripts/outbox_worker.py
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.outbox import drain_outbox, purge_processed_outbox_events
+
+
+def run_worker(once: bool = False) -> None:
+    """
+    Обработчик outbox отдельным процессом.
+
+    Используется вместо встроенного в приложение обработчика
+    (OUTBOX_WORKER_ENABLED=false), чтобы побочные эффекты заказов не делили
+    процесс с API. Несколько процессов можно запускать параллельно.
+
+    Args:
+        once: Обработать накопившиеся события и завершиться
+    """
+    last_purge = 0.0
+    while True:
+        started = time.perf_counter()
+        processed = drain_outbox()
+        if processed:
+            print(f"Обработано событий: {processed} ({time.perf_counter() - started:.2f}s)")
+
+        if time.monotonic() - last_purge >= settings.OUTBOX_PURGE_INTERVAL_SECONDS:
+            purge_processed_outbox_events()
+            last_purge = time.monotonic()
+
+        if once:
+            return
+        time.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Обработчик событий outbox")
+    parser.add_argument("--once", action="store_true", help="Обработать очередь и завершиться")
+    args = parser.parse_args()
+
+    try:
+        run_worker(args.once)
+    except KeyboardInterrupt:
+        pass
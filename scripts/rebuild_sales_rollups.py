@@ -0,0 +1,78 @@
+# scripts/rebuild_sales_rollups.py
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.crud.analytics import rebuild_sales_rollups
+from app.models.order import Order
+
+
+def rebuild(date_from: datetime.date = None, date_to: datetime.date = None, batch_days: int = 31) -> bool:
+    """
+    Перестраивает сводки продаж из orders и order_items по частям.
+
+    Каждая часть (batch_days дней) пересчитывается в отдельной транзакции,
+    поэтому большие периоды не держат долгих блокировок.
+
+    Args:
+        date_from: Первый день (по умолчанию — дата первого заказа)
+        date_to: Последний день (по умолчанию — сегодня)
+        batch_days: Количество дней в одной транзакции
+
+    Returns:
+        True если сводки перестроены, иначе False
+    """
+    db = SessionLocal()
+    try:
+        if date_from is None:
+            first_order = db.query(func.min(Order.created_at)).scalar()
+            if first_order is None:
+                print("Заказов нет, перестраивать нечего")
+                return True
+            date_from = first_order.date()
+        date_to = date_to or datetime.date.today()
+
+        print(f"Перестраиваем сводки продаж с {date_from} по {date_to}")
+        started = time.perf_counter()
+        total_status_rows = total_product_rows = 0
+
+        batch_start = date_from
+        while batch_start <= date_to:
+            batch_end = min(batch_start + datetime.timedelta(days=batch_days - 1), date_to)
+            batch_started = time.perf_counter()
+
+            status_rows, product_rows = rebuild_sales_rollups(db, batch_start, batch_end)
+            total_status_rows += status_rows
+            total_product_rows += product_rows
+
+            print(f"  {batch_start} — {batch_end}: {status_rows} строк по статусам, "
+                  f"{product_rows} строк по товарам ({time.perf_counter() - batch_started:.2f}s)")
+            batch_start = batch_end + datetime.timedelta(days=1)
+
+        print(f"✅ Готово: {total_status_rows} строк по статусам, {total_product_rows} строк по товарам "
+              f"за {time.perf_counter() - started:.2f}s")
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при перестроении сводок: {e}")
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Перестроение сводок продаж")
+    parser.add_argument("--date-from", type=datetime.date.fromisoformat, help="Первый день (ГГГГ-ММ-ДД)")
+    parser.add_argument("--date-to", type=datetime.date.fromisoformat, help="Последний день (ГГГГ-ММ-ДД)")
+    parser.add_argument("--batch-days", type=int, default=31, help="Дней в одной транзакции")
+    args = parser.parse_args()
+
+    sys.exit(0 if rebuild(args.date_from, args.date_to, args.batch_days) else 1)
@@ -0,0 +1,182 @@
+# scripts/restore_db.py
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Добавляем корневую директорию проекта в sys.path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+from app.backup import (
+    BackupError, analyze_database, compare_table_stats, latest_backup, load_manifest, restore_backup,
+    table_stats, verify_files
+)
+from app.config import settings
+
+# Части дампа при восстановлении схемы отдельно: индексы и ограничения
+# строятся после загрузки всех данных
+SECTIONS = ("pre-data", "data", "post-data")
+
+
+def is_live_database(database_url: str) -> bool:
+    """
+    Указывает ли URL на рабочую базу приложения (settings.DATABASE_URL).
+
+    Сравниваются сервер, порт и имя базы: драйвер и учетные данные
+    могут отличаться у одной и той же базы.
+    """
+    def identity(url: str) -> tuple:
+        parsed = make_url(url)
+        return parsed.get_backend_name(), parsed.host or "localhost", parsed.port or 5432, parsed.database
+
+    try:
+        return identity(database_url) == identity(settings.DATABASE_URL)
+    except Exception:
+        # Нераспознанный URL сравнивается как строка
+        return database_url == settings.DATABASE_URL
+
+
+def restore_database(
+        backup_path: Path,
+        database_url: str,
+        jobs: int = settings.BACKUP_JOBS,
+        schema_first: bool = False,
+        clean: bool = False,
+        analyze: bool = True,
+        validate: bool = True,
+        report_path: Path = None,
+        force: bool = False
+) -> bool:
+    """
+    Восстанавливает базу из резервной копии scripts/backup_db.py и проверяет результат.
+
+    Этапы: проверка файлов по манифесту, pg_restore -j (целиком или по
+    частям pre-data → data → post-data), ANALYZE, сверка количества строк и
+    контрольных сумм таблиц с манифестом. Длительность каждого этапа
+    печатается и, если указан report_path, сохраняется в JSON.
+
+    Восстановление в рабочую базу приложения (settings.DATABASE_URL)
+    выполняется только с force.
+
+    Args:
+        backup_path: Каталог копии
+        database_url: URL пустой базы (или существующей, если clean)
+        jobs: Параллельных потоков pg_restore и ANALYZE
+        schema_first: Восстановить схему отдельно и построить индексы после данных
+        clean: Удалить существующие объекты базы перед восстановлением
+        analyze: Собрать статистику планировщика после восстановления
+        validate: Сверить таблицы с манифестом
+        report_path: Файл JSON с длительностями этапов и результатом сверки
+        force: Разрешить восстановление в рабочую базу приложения
+
+    Returns:
+        True если база восстановлена и совпадает с манифестом, иначе False
+    """
+    if is_live_database(database_url) and not force:
+        print("❌ Целевая база совпадает с DATABASE_URL приложения; "
+              "для восстановления в рабочую базу укажите --force")
+        return False
+
+    timings = {}
+    problems = []
+    started = time.perf_counter()
+
+    def phase(name: str, action) -> None:
+        phase_started = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - phase_started
+        print(f"   {name}: {timings[name]:.1f}s")
+
+    try:
+        manifest = load_manifest(backup_path)
+        print(f"♻️ Восстановление {backup_path} (копия от {manifest['created_at']}, {jobs} поток(ов))")
+
+        phase("verify_files", lambda: problems.extend(verify_files(backup_path, manifest, jobs)))
+        if problems:
+            for problem in problems:
+                print(f"❌ {problem}")
+            return False
+
+        if schema_first:
+            for section in SECTIONS:
+                phase(f"restore_{section}", lambda section=section: restore_backup(
+                    backup_path, database_url, jobs, section=section, clean=clean and section == "pre-data"
+                ))
+        else:
+            phase("restore", lambda: restore_backup(backup_path, database_url, jobs, clean=clean))
+
+        if analyze:
+            phase("analyze", lambda: analyze_database(database_url, jobs))
+
+        if validate and manifest["tables"]:
+            def validate_tables():
+                engine = create_engine(database_url, poolclass=NullPool)
+                try:
+                    with engine.connect() as connection:
+                        problems.extend(compare_table_stats(manifest["tables"], table_stats(connection)))
+                finally:
+                    engine.dispose()
+
+            phase("validate", validate_tables)
+        elif validate:
+            print("   В манифесте нет статистики таблиц (копия с --no-table-stats), сверка пропущена")
+    except BackupError as e:
+        problems.append(str(e))
+
+    timings["total"] = time.perf_counter() - started
+    if report_path:
+        report_path.write_text(json.dumps({
+            "backup": str(backup_path),
+            "jobs": jobs,
+            "schema_first": schema_first,
+            "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+            "problems": problems,
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return False
+    print(f"✅ База восстановлена за {timings['total']:.1f}s"
+          + (f", таблиц сверено: {len(manifest['tables'])}" if validate and manifest["tables"] else ""))
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Восстановление PostgreSQL из копии scripts/backup_db.py")
+    parser.add_argument("backup", nargs="?", type=Path,
+                        help="Каталог копии (по умолчанию — последняя в BACKUP_DIR)")
+    parser.add_argument("--database-url", required=True,
+                        help="База для восстановления (рабочая база приложения — только с --force)")
+    parser.add_argument("--jobs", type=int, default=settings.BACKUP_JOBS, help="Параллельных потоков pg_restore")
+    parser.add_argument("--schema-first", action="store_true",
+                        help="Сначала схема, затем данные, индексы и ограничения — после данных")
+    parser.add_argument("--clean", action="store_true", help="Удалить существующие объекты перед восстановлением")
+    parser.add_argument("--no-analyze", action="store_true", help="Не выполнять ANALYZE")
+    parser.add_argument("--no-validate", action="store_true", help="Не сверять таблицы с манифестом")
+    parser.add_argument("--report", type=Path, help="Сохранить длительности этапов в JSON")
+    parser.add_argument("--force", action="store_true",
+                        help="Разрешить восстановление в базу из DATABASE_URL (заменит рабочие данные)")
+    args = parser.parse_args()
+
+    backup = args.backup or latest_backup(Path(settings.BACKUP_DIR))
+    if backup is None:
+        print(f"❌ В {settings.BACKUP_DIR} нет резервных копий")
+        sys.exit(1)
+
+    sys.exit(0 if restore_database(
+        backup,
+        database_url=args.database_url,
+        jobs=args.jobs,
+        schema_first=args.schema_first,
+        clean=args.clean,
+        analyze=not args.no_analyze,
+        validate=not args.no_validate,
+        report_path=args.report,
+        force=args.force
+    ) else 1)
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.models.product import Product
 from app.models.currency import CurrencyRate
 from app.database import SessionLocal
+from app.crud.currency import rebuild_product_prices
 
 
 def create_test_data():
@@ -66,6 +67,8 @@ def create_test_data():
         for product in products:
             db.add(product)
 
+        db.flush()
+        rebuild_product_prices(db)
         db.commit()
         print(f"✅ Успешно добавлено:")
         print(f"   - Товаров: {len(products)}")